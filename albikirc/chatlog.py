@@ -0,0 +1,517 @@
+from __future__ import annotations
+
+import gzip
+import lzma
+import mmap
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Callable, Iterable
+from urllib.parse import quote, unquote
+
+# When to fsync log files: never (leave it to the OS), when a file is closed
+# (daily rotation, eviction from the open-file cache, shutdown) or after every batch
+FSYNC_NEVER = "never"
+FSYNC_ROTATE = "rotate"
+FSYNC_ALWAYS = "always"
+FSYNC_POLICIES = (FSYNC_NEVER, FSYNC_ROTATE, FSYNC_ALWAYS)
+
+COMPRESSORS: dict[str, tuple[str, Callable[..., Any]]] = {
+    "gzip": (".gz", gzip.open),
+    "lzma": (".xz", lzma.open),
+}
+
+LOG_SUFFIX = ".log"
+
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+# (second, "YYYY-MM-DDTHH:MM:SS"), reused while lines arrive within the same second
+_stamp_cache: tuple[int, str] = (-1, "")
+
+
+def _stamp(ts: float) -> str:
+    global _stamp_cache
+    sec = int(ts)
+    cached = _stamp_cache
+    if cached[0] != sec:
+        cached = _stamp_cache = (sec, time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(sec)))
+    return cached[1]
+
+
+def format_line(ts: float, sender: str, text: str, kind: str) -> str:
+    """One log line: local ISO time, kind, sender and text separated by tabs."""
+    return (f"{_stamp(ts)}.{int(ts * 1000) % 1000:03d}\t{kind}\t"
+            f"{sender.translate(_ESCAPES)}\t{text.translate(_ESCAPES)}\n")
+
+
+def _unescape(s: str) -> str:
+    if "\\" not in s:
+        return s
+    out = []
+    i, n = 0, len(s)
+    while i < n:
+        ch = s[i]
+        if ch == "\\" and i + 1 < n:
+            nxt = s[i + 1]
+            out.append({"t": "\t", "n": "\n", "r": "\r"}.get(nxt, nxt))
+            i += 2
+        else:
+            out.append(ch)
+            i += 1
+    return "".join(out)
+
+
+def parse_line(line: str) -> tuple[float, str, str, str] | None:
+    """Inverse of `format_line`: `(ts, sender, text, kind)`, or None if malformed."""
+    parts = line.rstrip("\n").split("\t", 3)
+    if len(parts) != 4:
+        return None
+    stamp, kind, sender, text = parts
+    try:
+        base, _, millis = stamp.partition(".")
+        ts = time.mktime(time.strptime(base, "%Y-%m-%dT%H:%M:%S")) + int(millis or 0) / 1000
+    except (ValueError, OverflowError):
+        return None
+    return ts, _unescape(sender), _unescape(text), kind
+
+
+def safe_name(name: str) -> str:
+    """File-system safe, reversible form of a network or target name (lowercased)."""
+    s = quote((name or "").lower(), safe="#&+!-_")
+    # Keep "." out so names can never be "." or ".." or look like file extensions
+    return s.replace(".", "%2E") or "_"
+
+
+def target_dir(root: Path, network: str, target: str) -> Path:
+    return Path(root) / safe_name(network) / safe_name(target)
+
+
+def list_targets(root: Path) -> list[tuple[str, str]]:
+    """`(network, target)` pairs that have a log directory under `root`."""
+    out: list[tuple[str, str]] = []
+    try:
+        for net in sorted(os.scandir(root), key=lambda e: e.name):
+            if not net.is_dir():
+                continue
+            for tgt in sorted(os.scandir(net.path), key=lambda e: e.name):
+                if tgt.is_dir():
+                    out.append((unquote(net.name), unquote(tgt.name)))
+    except OSError:
+        pass
+    return out
+
+
+class _OpenLog:
+    __slots__ = ("path", "day", "fh")
+
+    def __init__(self, path: Path, day: str, fh):
+        self.path = path
+        self.day = day
+        self.fh = fh
+
+
+class LogWriter:
+    """Append-only per-network, per-target chat logs, written by one thread.
+
+    `write()` only appends to an in-memory queue, so callers on the reader
+    or UI threads never touch the disk. The writer thread wakes when
+    `flush_lines` lines are pending or `flush_interval` seconds have passed,
+    groups the batch by file and writes each file once. Files live in
+    `<root>/<network>/<target>/<YYYY-MM-DD>.log`, one per local day. When a
+    day is over its file is closed and compressed (gzip or lzma) on a
+    separate low-priority thread; `compress=None` keeps plain text.
+
+    If more than `max_pending` lines are waiting (the disk has stalled),
+    new lines are dropped and counted in `dropped` rather than growing
+    memory without bound.
+    """
+
+    def __init__(self, root: Path, *, flush_lines: int = 1000, flush_interval: float = 1.0,
+                 fsync: str = FSYNC_NEVER, compress: str | None = "gzip", max_open: int = 64,
+                 max_pending: int = 200_000, name: str = "albikirc-log"):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"unknown fsync policy {fsync!r}")
+        if compress is not None and compress not in COMPRESSORS:
+            raise ValueError(f"unknown compression {compress!r}")
+        self.root = Path(root)
+        self.flush_lines = max(1, int(flush_lines))
+        self.flush_interval = max(0.05, float(flush_interval))
+        self.fsync = fsync
+        self.compress = compress
+        self.max_open = max(1, int(max_open))
+        self.max_pending = max(1, int(max_pending))
+        self.name = name
+        self.dropped = 0
+        self.written = 0
+        self._cond = threading.Condition()
+        self._queue: deque[tuple[str, str, list[tuple[float | None, str, str, str]]]] = deque()
+        self._pending = 0
+        self._busy = False
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        # Output path -> open file; least recently written first. Only the writer thread touches it.
+        self._files: OrderedDict[Path, _OpenLog] = OrderedDict()
+        self._compress_q: queue.Queue[Path | None] = queue.Queue()
+        self._compress_thread: threading.Thread | None = None
+        # Called on the writer thread with (network, target, path) for each file a batch touched
+        self._listeners: list = []
+
+    # Public API
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        if self.compress:
+            self._compress_thread = threading.Thread(
+                target=self._run_compress, name=f"{self.name}-compress", daemon=True,
+            )
+            self._compress_thread.start()
+            self._compress_q.put(None)  # first job: sweep files left from earlier days
+
+    def write(self, network: str, target: str,
+              entries: Iterable[tuple[float | None, str, str, str]]):
+        """Queue `(ts, sender, text, kind)` entries for a target's log; never blocks on I/O."""
+        batch = list(entries)
+        if not batch:
+            return
+        with self._cond:
+            if self._stopping:
+                return
+            if self._pending + len(batch) > self.max_pending:
+                self.dropped += len(batch)
+                return
+            self._queue.append((network, target, batch))
+            before = self._pending
+            self._pending += len(batch)
+            if before < self.flush_lines <= self._pending:
+                self._cond.notify()
+
+    def pending(self) -> int:
+        return self._pending
+
+    def add_listener(self, callback):
+        """Call `callback(network, target, path)` after each batch written to `path`,
+        and with the compressed file once a finished day has been compressed.
+
+        Runs on the writer or compression thread, so it should only hand the work off.
+        """
+        self._listeners.append(callback)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wake the writer and wait until everything queued so far is on disk (or in the OS)."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify()
+            while (self._pending or self._busy) and self._thread is not None \
+                    and self._thread.is_alive():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, 0.05))
+        return True
+
+    def close(self, timeout: float = 5.0):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._compress_thread is not None:
+            self._compress_q.put(None)
+            self._compress_thread = None
+
+    # Writer thread
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and self._pending < self.flush_lines:
+                    self._cond.wait(self.flush_interval)
+                batch = self._queue
+                self._queue = deque()
+                self._pending = 0
+                self._busy = bool(batch)
+                stopping = self._stopping
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception:
+                    pass
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+            self._close_finished_days()
+            if stopping:
+                with self._cond:
+                    leftover = self._queue
+                    self._queue = deque()
+                    self._pending = 0
+                if leftover:
+                    try:
+                        self._write_batch(leftover)
+                    except Exception:
+                        pass
+                for path in list(self._files):
+                    self._close_file(path, compress=False)
+                return
+
+    def _write_batch(self, batch):
+        # Group by output file so each file gets one write per batch
+        chunks: dict[tuple[str, str, str], list[str]] = {}
+        now = time.time()
+        for network, target, entries in batch:
+            for ts, sender, text, kind in entries:
+                ts = now if ts is None else ts
+                line = format_line(ts, sender, text, kind)
+                # The date is the first 10 characters of the line's timestamp
+                chunks.setdefault((network, target, line[:10]), []).append(line)
+        touched: list[tuple[str, str, Path]] = []
+        for (network, target, day), lines in chunks.items():
+            log = self._open(target_dir(self.root, network, target), day)
+            if log is None:
+                continue
+            try:
+                log.fh.write("".join(lines))
+                log.fh.flush()
+                if self.fsync == FSYNC_ALWAYS:
+                    os.fsync(log.fh.fileno())
+            except OSError:
+                continue
+            self.written += len(lines)
+            touched.append((network, target, log.path))
+        self._notify(touched)
+
+    def _notify(self, touched: list[tuple[str, str, Path]]):
+        for callback in self._listeners:
+            for network, target, path in touched:
+                try:
+                    callback(network, target, path)
+                except Exception:
+                    pass
+
+    def _open(self, directory: Path, day: str) -> _OpenLog | None:
+        path = directory / f"{day}{LOG_SUFFIX}"
+        log = self._files.get(path)
+        if log is not None:
+            self._files.move_to_end(path)
+            return log
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            fh = open(path, "a", encoding="utf-8", newline="\n", buffering=1 << 16)
+        except OSError:
+            return None
+        log = self._files[path] = _OpenLog(path, day, fh)
+        while len(self._files) > self.max_open:
+            self._close_file(next(iter(self._files)), compress=False)
+        return log
+
+    def _close_file(self, path: Path, compress: bool):
+        log = self._files.pop(path, None)
+        if log is None:
+            return
+        try:
+            log.fh.flush()
+            if self.fsync != FSYNC_NEVER:
+                os.fsync(log.fh.fileno())
+            log.fh.close()
+        except OSError:
+            pass
+        if compress and self.compress:
+            self._compress_q.put(path)
+
+    def _close_finished_days(self):
+        today = time.strftime("%Y-%m-%d")
+        for path, log in list(self._files.items()):
+            if log.day < today:
+                self._close_file(path, compress=True)
+
+    # Compression thread
+    def _run_compress(self):
+        while True:
+            path = self._compress_q.get()
+            if path is None:
+                if self._compress_thread is None:
+                    return
+                self._sweep()
+                continue
+            self._compress_file(path)
+
+    def _sweep(self):
+        # Compress plain logs from earlier days, e.g. after a crash or a session spanning midnight
+        today = f"{time.strftime('%Y-%m-%d')}{LOG_SUFFIX}"
+        try:
+            for dirpath, _, filenames in os.walk(self.root):
+                for fn in filenames:
+                    if fn.endswith(LOG_SUFFIX) and fn < today:
+                        path = Path(dirpath) / fn
+                        if path not in self._files:
+                            self._compress_file(path)
+        except OSError:
+            pass
+
+    def _compress_file(self, path: Path):
+        if self.compress is None:
+            return
+        suffix, opener = COMPRESSORS[self.compress]
+        dest = path.with_name(path.name + suffix)
+        tmp = dest.with_name(dest.name + ".tmp")
+        try:
+            with open(path, "rb") as src, opener(tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            if dest.exists():
+                # Late lines for a day already compressed: gzip and xz both allow
+                # concatenated streams
+                with open(tmp, "rb") as src, open(dest, "ab") as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+                os.remove(tmp)
+            else:
+                os.replace(tmp, dest)
+            os.remove(path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        # The day now lives in `dest`; directory names are the quoted network and target
+        self._notify([(unquote(dest.parent.parent.name), unquote(dest.parent.name), dest)])
+
+
+def log_files(root: Path, network: str, target: str) -> list[Path]:
+    """A target's daily log files, oldest first (plain and compressed)."""
+    directory = target_dir(root, network, target)
+    found: list[tuple[str, int, Path]] = []
+    try:
+        for entry in os.scandir(directory):
+            name = entry.name
+            day, sep, rest = name.partition(LOG_SUFFIX)
+            if not sep:
+                continue
+            if rest == "":
+                found.append((day, 1, Path(entry.path)))
+            elif rest in {suffix for suffix, _ in COMPRESSORS.values()}:
+                # A compressed day sorts before its plain leftover (late lines)
+                found.append((day, 0, Path(entry.path)))
+    except OSError:
+        return []
+    found.sort()
+    return [p for _, _, p in found]
+
+
+class LogCursor:
+    """Read a target's logs backwards, a page of lines at a time.
+
+    Plain files are memory-mapped and scanned backward for line breaks, so
+    reading the last lines of a multi-gigabyte log touches only its end.
+    Compressed days cannot be read backward; each is decompressed once when
+    the cursor reaches it. No file stays open between calls.
+    The set of files and the end of the newest one are fixed when the
+    cursor is created, so lines written later are never returned, however
+    long after creation the first page is read. If the newest file has been
+    compressed meanwhile, its compressed copy is read instead and lines
+    stamped after the cursor's creation are skipped.
+    """
+
+    def __init__(self, root: Path, network: str, target: str):
+        self._files = log_files(root, network, target)
+        self._created = time.time()
+        # End of the newest file when it is still plain text and being appended to
+        self._newest_end: int | None = None
+        if self._files and self._files[-1].suffix == LOG_SUFFIX:
+            try:
+                self._newest_end = self._files[-1].stat().st_size
+            except OSError:
+                pass
+        self._path: Path | None = None
+        # Unread part of the current file is [0, _pos); None means "from its end"
+        self._pos: int | None = None
+        self._data: bytes | None = None  # decompressed contents of a compressed day
+        # Skip lines newer than this (set when reading a day compressed after creation)
+        self._until: float | None = None
+
+    @property
+    def exhausted(self) -> bool:
+        return self._path is None and not self._files
+
+    def older(self, n: int) -> list[tuple[float, str, str, str]]:
+        """Up to `n` lines before the ones already returned, oldest first."""
+        out: list[tuple[float, str, str, str]] = []
+        while len(out) < n:
+            if self._path is None:
+                if not self._files:
+                    break
+                self._path = self._files.pop()
+                # Only the first file popped is the newest one
+                self._pos, self._newest_end = self._newest_end, None
+                self._data = None
+            try:
+                done = self._read_back(n - len(out), out)
+            except (OSError, ValueError, EOFError, lzma.LZMAError):
+                done = True
+            if done:
+                self._path = None
+                self._data = None
+        out.reverse()
+        return out
+
+    def _read_back(self, n: int, out: list) -> bool:
+        # Appends newest-first; returns True when the current file has no more lines
+        path = self._path
+        if path is None:
+            return True
+        if path.suffix == LOG_SUFFIX and not path.exists():
+            compressed = self._compressed_copy(path)
+            if compressed is None:
+                return True
+            # Compressed since the cursor was created: offsets no longer apply, timestamps do
+            path = self._path = compressed
+            self._pos = None
+            self._until = self._created
+        if path.suffix == LOG_SUFFIX:
+            with open(path, "rb") as fh:
+                size = os.fstat(fh.fileno()).st_size
+                end = size if self._pos is None else min(self._pos, size)
+                if end <= 0:
+                    return True
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    end = self._scan(buf, end, n, out)
+        else:
+            if self._data is None:
+                opener = next(op for suffix, op in COMPRESSORS.values()
+                              if path.name.endswith(suffix))
+                with opener(path, "rb") as fh:
+                    self._data = fh.read()
+            end = len(self._data) if self._pos is None else self._pos
+            end = self._scan(self._data, end, n, out)
+        self._pos = end
+        return end <= 0
+
+    def _compressed_copy(self, path: Path) -> Path | None:
+        for suffix, _ in COMPRESSORS.values():
+            candidate = path.with_name(path.name + suffix)
+            if candidate.exists():
+                if self._files and self._files[-1] == candidate:
+                    # Late lines were appended to an existing compressed day; read it once
+                    self._files.pop()
+                return candidate
+        return None
+
+    def _scan(self, buf, end: int, n: int, out: list) -> int:
+        until = self._until
+        count = 0
+        while count < n and end > 0:
+            # Skip the line's own terminator, then find the one before it
+            stop = end - 1 if buf[end - 1:end] == b"\n" else end
+            start = buf.rfind(b"\n", 0, stop) + 1
+            parsed = parse_line(buf[start:stop].decode("utf-8", "replace"))
+            if parsed is not None and (until is None or parsed[0] < until):
+                out.append(parsed)
+                count += 1
+            end = start
+        return end
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from .events import MessageEvent, StatusEvent
+from .highlight import HighlightMatcher
+
+KIND_CHANNEL = "channel"
+KIND_PRIVATE = "private"
+KIND_NOTICE = "notice"
+KIND_ACTION = "action"
+KIND_ACTIVITY = "activity"
+KIND_STATUS = "status"
+
+_NOTICE_PREFIX = "[notice] "
+
+
+class Classification:
+    """What an incoming line is and what notifications it should trigger.
+
+    `sound` is the sound file to play ("" for none), `speech` the text to
+    speak (None for none) and `beep` whether to play the receive beep.
+    """
+
+    __slots__ = ("kind", "private", "highlight", "sound", "speech", "beep")
+
+    def __init__(self, kind: str, *, private: bool = False, highlight: bool = False,
+                 sound: str = "", speech: str | None = None, beep: bool = False):
+        self.kind = kind
+        self.private = private
+        self.highlight = highlight
+        self.sound = sound
+        self.speech = speech
+        self.beep = beep
+
+    def __repr__(self) -> str:
+        return (f"Classification(kind={self.kind!r}, private={self.private}, "
+                f"highlight={self.highlight}, sound={self.sound!r}, speech={self.speech!r}, "
+                f"beep={self.beep})")
+
+
+class MessageClassifier:
+    """Classify events once, against a snapshot of the notification settings.
+
+    Built from the settings dict on the UI thread and replaced whenever those
+    settings change; `classify` only reads the snapshot, so it is safe to call
+    from the event dispatcher thread. `current_nick` reports the nick in use
+    on the server; the highlight matcher is recompiled only when it changes.
+    """
+
+    def __init__(self, settings: dict[str, Any], *, beeps_enabled: bool = False,
+                 tts: dict[str, Any] | None = None,
+                 current_nick: Callable[[], str | None] | None = None):
+        snd = settings.get('sounds', {}) or {}
+        self._sounds = bool(snd.get('enabled'))
+        self._snd_notice = snd.get('notice', '') or ''
+        self._snd_mention = snd.get('mention', '') or ''
+        self._snd_private = snd.get('message_private', '') or snd.get('message', '') or ''
+        self._snd_channel = snd.get('message_channel', '') or snd.get('message', '') or ''
+        self._beeps = bool(beeps_enabled)
+        tts = tts or {}
+        events = tts.get('events', {}) or {}
+        enabled = bool(tts.get('enabled'))
+        self._tts_notice = enabled and bool(events.get('notice'))
+        self._tts_mention = enabled and bool(events.get('mention'))
+        self._tts_private = enabled and bool(events.get('private_message'))
+        self._tts_channel = enabled and bool(events.get('channel_message'))
+        self._settings = settings
+        self._current_nick = current_nick
+        self._matcher_nick: str | None = None
+        self._matcher = self._build_matcher(None)
+
+    def _build_matcher(self, live_nick: str | None) -> HighlightMatcher:
+        nicks = [self._settings.get('nick', '') or '']
+        if live_nick:
+            nicks.append(live_nick)
+        self._matcher_nick = live_nick
+        return HighlightMatcher.from_settings(self._settings, nicks)
+
+    @property
+    def matcher(self) -> HighlightMatcher:
+        live = self._current_nick() if self._current_nick else None
+        if live != self._matcher_nick:
+            self._matcher = self._build_matcher(live)
+        return self._matcher
+
+    def classify(self, event: MessageEvent | StatusEvent) -> Classification:
+        if isinstance(event, StatusEvent):
+            return self._classify_status(event)
+        return self._classify_message(event)
+
+    def _is_highlight(self, event: MessageEvent) -> bool:
+        return self.matcher.matches(event.text, None if event.is_private else event.target)
+
+    def _classify_message(self, event: MessageEvent) -> Classification:
+        private = event.is_private
+        target, sender, text = event.target, event.sender, event.text
+        if event.is_notice:
+            kind = KIND_NOTICE
+        elif event.is_activity:
+            kind = KIND_ACTIVITY
+        elif event.is_action:
+            kind = KIND_ACTION
+        else:
+            kind = KIND_PRIVATE if private else KIND_CHANNEL
+        # Activity summaries list nicks, so they never count as highlights
+        highlight = kind != KIND_ACTIVITY and self._is_highlight(event)
+
+        sound = ""
+        if self._sounds:
+            if kind == KIND_NOTICE:
+                sound = self._snd_notice
+            elif highlight and not private:
+                # Mentions only apply to channel messages
+                sound = self._snd_mention
+            else:
+                sound = self._snd_private if private else self._snd_channel
+
+        speech = None
+        if kind == KIND_NOTICE:
+            if self._tts_notice:
+                body = text.removeprefix(_NOTICE_PREFIX)
+                where = "" if private else f" in {target}"
+                speech = f"Notice from {sender}{where}: {body}"
+        elif highlight and not private and self._tts_mention:
+            speech = f"Mentioned by {sender} in {target}: {text}"
+        elif private and self._tts_private:
+            speech = f"Private message from {sender}: {text}"
+        elif not private and self._tts_channel:
+            speech = f"{sender} in {target}: {text}"
+
+        return Classification(kind, private=private, highlight=highlight, sound=sound,
+                              speech=speech, beep=self._beeps and kind != KIND_ACTIVITY)
+
+    def _classify_status(self, event: StatusEvent) -> Classification:
+        # Only NOTICEs shown in Console notify; CTCP traffic never does, to avoid spam
+        notify = event.is_notice and not event.is_ctcp
+        return Classification(
+            KIND_NOTICE if event.is_notice else KIND_STATUS,
+            sound=self._snd_notice if notify and self._sounds else "",
+            speech=event.text if notify and self._tts_notice else None,
+        )
@@ -45,6 +45,7 @@ DEFAULTS: Dict[str, Any] = {
     "appearance": {
         "theme": "system",  # one of: system, light, dark
         "timestamps": True,
+        "scrollback_lines": 5000,  # per tab; older lines are trimmed from the transcript
     },
     "beeps": {
         "enabled": False,
@@ -75,6 +76,15 @@ DEFAULTS: Dict[str, Any] = {
             "notice": False,
         },
     },
+    "highlight": {
+        # Your nick is always a highlight; these add to it (matched as whole words)
+        "alternate_nicks": [],
+        "keywords": [],
+        "regexes": [],
+        # Extra keywords/regexes for specific channels:
+        # {"#chan": {"keywords": [...], "regexes": [...]}}
+        "channels": {},
+    },
     "sounds": {
         "enabled": bool(_DEFAULT_SOUND_DIR),
         "message": _default_sound_path("receive.wav"),
@@ -84,6 +94,28 @@ DEFAULTS: Dict[str, Any] = {
         "mention": _default_sound_path("mention.wav"),
         "notice": _default_sound_path("notice.wav"),
     },
+    "history": {
+        # Resident message history across all tabs; older messages spill to a temporary file
+        "memory_budget_mb": 32,
+    },
+    "logging": {
+        # Chat logs in ~/.albikirc/logs/<network>/<target>/<date>.log,
+        # written by a background thread
+        "enabled": True,
+        "flush_lines": 1000,  # write as soon as this many lines are waiting...
+        "flush_interval": 1.0,  # ...or after this many seconds
+        "fsync": "never",  # never | rotate (when a day's file is closed) | always (every batch)
+        "compress": "gzip",  # gzip | lzma | "" to keep finished days as plain text
+        "restore_lines": 200,  # lines loaded from the log when a tab is first shown (0 to disable)
+    },
+    "search": {
+        # Full-text index of the chat logs in ~/.albikirc/search.db (needs logging)
+        "enabled": True,
+    },
+    "events": {
+        "async_delivery": False,  # deliver event-bus subscribers from a thread pool
+        "workers": 2,
+    },
     "servers": []
 }
 
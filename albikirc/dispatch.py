@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+
+from .event_bus import EventBus
+from .events import Event
+
+DEFAULT_MAXSIZE = 20000
+
+
+class EventDispatcher:
+    """Publish events to an `EventBus` from a dedicated worker thread.
+
+    Protocol threads call `submit` and move on; subscribers run later on the
+    dispatcher thread, in submission order. A slow subscriber therefore delays
+    other subscribers, but never the reader that has to answer server PINGs.
+    This holds in async bus mode too: a full bus queue with the BLOCK policy
+    stalls the dispatcher thread, not the reader.
+
+    `submit` never blocks. The queue holds at most `maxsize` events; beyond
+    that the oldest is discarded and counted in `dropped` (per topic in
+    `dropped_by_topic`), so a stuck subscriber cannot grow memory without
+    bound.
+    """
+
+    def __init__(self, bus: EventBus, name: str = "irc-events", maxsize: int = DEFAULT_MAXSIZE):
+        self._bus = bus
+        self._name = name
+        self.maxsize = max(1, int(maxsize))
+        self._queue: deque[tuple[str, Event]] = deque()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self.dropped = 0
+        self.dropped_by_topic: dict[str, int] = {}
+
+    def submit(self, topic: str, event: Event):
+        with self._cond:
+            queue = self._queue
+            if len(queue) >= self.maxsize:
+                old_topic, _ = queue.popleft()
+                self.dropped += 1
+                self.dropped_by_topic[old_topic] = self.dropped_by_topic.get(old_topic, 0) + 1
+            queue.append((topic, event))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def _run(self):
+        queue = self._queue
+        publish = self._bus.publish
+        while True:
+            with self._cond:
+                while not queue:
+                    self._cond.wait()
+                topic, event = queue.popleft()
+            # EventBus.publish already isolates subscriber errors
+            publish(topic, event)
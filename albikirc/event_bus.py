@@ -1,35 +1,329 @@
 from __future__ import annotations
 
-from typing import Callable, Any
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Any, Hashable
+
+# Backpressure policies for async delivery (see EventBus.configure_topic)
+BLOCK = "block"                      # publisher waits for room
+DROP_OLDEST = "drop_oldest"          # discard the oldest queued event
+COALESCE_LATEST = "coalesce_latest"  # replace a queued event with the same key
+POLICIES = (BLOCK, DROP_OLDEST, COALESCE_LATEST)
+
+_DRAIN_BATCH = 64
+# Recent handler durations kept per subscriber for percentile estimates
+_LATENCY_SAMPLES = 512
+
+
+def _callback_name(callback: Callable) -> str:
+    module = getattr(callback, "__module__", None) or ""
+    name = (getattr(callback, "__qualname__", None) or getattr(callback, "__name__", None)
+            or repr(callback))
+    return f"{module}.{name}" if module else name
+
+
+class _HandlerStats:
+    __slots__ = ("name", "calls", "errors", "total_ns", "max_ns", "samples", "last_error")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.samples: deque[int] = deque(maxlen=_LATENCY_SAMPLES)
+        self.last_error: str | None = None
+
+
+class _TopicStats:
+    __slots__ = ("published", "handlers")
+
+    def __init__(self):
+        self.published = 0
+        self.handlers: dict[Callable, _HandlerStats] = {}
+
+
+def _percentile(ordered: list[int], pct: float) -> int:
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+class _TopicQueue:
+    """Pending async deliveries for one topic (or a group of topics sharing it)."""
+
+    __slots__ = ("policy", "maxsize", "key", "items", "latest", "running", "dropped")
+
+    def __init__(self, policy: str, maxsize: int, key: Callable[..., Hashable] | None):
+        self.policy = policy
+        self.maxsize = maxsize
+        self.key = key
+        # Entries are [event_type, args, kwargs, coalesce_key]; lists so coalescing can
+        # update them in place
+        self.items: deque[list] = deque()
+        self.latest: dict[tuple[str, Hashable], list] = {}
+        self.running = False
+        self.dropped = 0
 
 
 class EventBus:
+    """Topic-based publish/subscribe.
+
+    By default `publish` calls subscribers inline. After `start_async`,
+    events go to a bounded queue per topic and are delivered from a thread
+    pool; events of one topic (and of topics routed into it with
+    `share_with`) are delivered in order, one batch at a time. What happens
+    when a queue is full depends on the topic's policy.
+    """
+
     def __init__(self):
-        self._subscribers: dict[str, list[Callable]] = {}
+        # Copy-on-write: publish reads the tuple without locking or copying
+        self._subscribers: dict[str, tuple[Callable, ...]] = {}
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._executor: ThreadPoolExecutor | None = None
+        self._topics: dict[str, tuple[str, int, Callable[..., Hashable] | None, str]] = {}
+        self._queues: dict[str, _TopicQueue] = {}
+        self._worker = threading.local()
+        self.default_maxsize = 1000
+        self._stats: dict[str, _TopicStats] = {}
+        self._stats_lock = threading.Lock()
 
     def subscribe(self, event_type: str, callback: Callable):
-        if event_type not in self._subscribers:
-            self._subscribers[event_type] = []
-        self._subscribers[event_type].append(callback)
+        with self._lock:
+            self._subscribers[event_type] = self._subscribers.get(event_type, ()) + (callback,)
         return callback
 
     def unsubscribe(self, event_type: str, callback: Callable):
-        subscribers = self._subscribers.get(event_type)
-        if not subscribers:
+        with self._lock:
+            subscribers = self._subscribers.get(event_type)
+            if not subscribers or callback not in subscribers:
+                return
+            remaining = list(subscribers)
+            remaining.remove(callback)
+            if remaining:
+                self._subscribers[event_type] = tuple(remaining)
+            else:
+                self._subscribers.pop(event_type, None)
+
+    def configure_topic(
+        self,
+        event_type: str,
+        *,
+        policy: str = BLOCK,
+        maxsize: int | None = None,
+        key: Callable[..., Hashable] | None = None,
+        share_with: str | None = None,
+    ):
+        """Set the async queue policy for `event_type`.
+
+        `key(*args, **kwargs)` picks what COALESCE_LATEST collapses on (default:
+        one pending event per topic). `share_with` routes the topic into
+        another topic's queue so the two keep their relative order; the
+        queue's size and policy then come from that topic.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown event bus policy: {policy}")
+        size = max(1, int(maxsize if maxsize is not None else self.default_maxsize))
+        with self._cond:
+            self._topics[event_type] = (policy, size, key, share_with or event_type)
+
+    @property
+    def async_enabled(self) -> bool:
+        return self._executor is not None
+
+    def start_async(self, workers: int = 2):
+        with self._cond:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)),
+                                                    thread_name_prefix="event-bus")
+
+    def stop_async(self, wait: bool = True):
+        """Return to synchronous delivery; events still queued are discarded."""
+        with self._cond:
+            executor = self._executor
+            self._executor = None
+            self._queues.clear()
+            self._cond.notify_all()
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def queue_depth(self, event_type: str | None = None) -> int:
+        with self._cond:
+            if event_type is None:
+                return sum(len(q.items) for q in self._queues.values())
+            q = self._queues.get(self._lane(event_type))
+            return len(q.items) if q else 0
+
+    def publish(self, event_type: str, *args: Any, **kwargs: Any):
+        with self._stats_lock:
+            stats = self._stats.get(event_type)
+            if stats is None:
+                stats = self._stats[event_type] = _TopicStats()
+            stats.published += 1
+        if self._executor is None:
+            self._deliver(event_type, args, kwargs)
             return
-        try:
-            subscribers.remove(callback)
-        except ValueError:
+        if event_type not in self._subscribers:
             return
+        self._enqueue(event_type, args, kwargs)
+
+    def _deliver(self, event_type: str, args: tuple, kwargs: dict):
+        subscribers = self._subscribers.get(event_type, ())
         if not subscribers:
-            self._subscribers.pop(event_type, None)
+            return
+        handlers = self._stats[event_type].handlers
+        clock = time.perf_counter_ns
+        for callback in subscribers:
+            error = None
+            start = clock()
+            try:
+                callback(*args, **kwargs)
+            except Exception:
+                error = traceback.format_exc()
+            elapsed = clock() - start
+            with self._stats_lock:
+                h = handlers.get(callback)
+                if h is None:
+                    h = handlers[callback] = _HandlerStats(_callback_name(callback))
+                h.calls += 1
+                h.total_ns += elapsed
+                if elapsed > h.max_ns:
+                    h.max_ns = elapsed
+                h.samples.append(elapsed)
+                if error is not None:
+                    h.errors += 1
+                    h.last_error = error
+
+    def stats_snapshot(self) -> dict[str, dict[str, Any]]:
+        """Per-topic counters and per-subscriber timings (milliseconds).
+
+        Shape: ``{topic: {"published", "queue_depth", "dropped", "handlers":
+        [{"name", "calls", "errors", "total_ms", "p50_ms", "p99_ms",
+        "max_ms", "last_error"}, ...]}}``. Percentiles cover the most recent
+        calls of each subscriber.
+        """
+        with self._stats_lock:
+            raw = [
+                (topic, ts.published, [
+                    (h.name, h.calls, h.errors, h.total_ns, h.max_ns, sorted(h.samples),
+                     h.last_error)
+                    for h in ts.handlers.values()
+                ])
+                for topic, ts in self._stats.items()
+            ]
+        with self._cond:
+            queues = {topic: self._queues.get(self._lane(topic)) for topic, _, _ in raw}
+            depths = {topic: len(q.items) if q else 0 for topic, q in queues.items()}
+            dropped = {topic: q.dropped if q else 0 for topic, q in queues.items()}
+        ms = 1_000_000.0
+        out: dict[str, dict[str, Any]] = {}
+        for topic, published, handlers in raw:
+            out[topic] = {
+                "published": published,
+                "queue_depth": depths[topic],
+                "dropped": dropped[topic],
+                "handlers": [
+                    {
+                        "name": name,
+                        "calls": calls,
+                        "errors": errors,
+                        "total_ms": total / ms,
+                        "p50_ms": _percentile(samples, 0.50) / ms,
+                        "p99_ms": _percentile(samples, 0.99) / ms,
+                        "max_ms": max_ns / ms,
+                        "last_error": last_error,
+                    }
+                    for name, calls, errors, total, max_ns, samples, last_error in handlers
+                ],
+            }
+        return out
+
+    def reset_stats(self):
+        with self._stats_lock:
+            for ts in self._stats.values():
+                ts.published = 0
+                ts.handlers.clear()
+
+    # Async internals (call with self._cond held)
+    def _lane(self, event_type: str) -> str:
+        cfg = self._topics.get(event_type)
+        return cfg[3] if cfg else event_type
+
+    def _queue_for(self, lane: str) -> _TopicQueue:
+        q = self._queues.get(lane)
+        if q is None:
+            default = (BLOCK, self.default_maxsize, None, lane)
+            policy, size, key, _ = self._topics.get(lane) or default
+            q = self._queues[lane] = _TopicQueue(policy, size, key)
+        return q
+
+    def _enqueue(self, event_type: str, args: tuple, kwargs: dict):
+        with self._cond:
+            queued = self._put(event_type, args, kwargs)
+        if not queued:
+            # Async delivery was stopped in the meantime
+            self._deliver(event_type, args, kwargs)
+
+    def _put(self, event_type: str, args: tuple, kwargs: dict) -> bool:
+        lane = self._lane(event_type)
+        if self._executor is None:
+            return False
+        q = self._queue_for(lane)
+        ckey = None
+        if q.policy == COALESCE_LATEST:
+            ckey = (event_type, q.key(*args, **kwargs) if q.key else None)
+            entry = q.latest.get(ckey)
+            if entry is not None:
+                entry[1] = args
+                entry[2] = kwargs
+                return True
+        if len(q.items) >= q.maxsize:
+            if q.policy != BLOCK:
+                old = q.items.popleft()
+                if old[3] is not None:
+                    q.latest.pop(old[3], None)
+                q.dropped += 1
+            elif not getattr(self._worker, "active", False):
+                # Bus workers never wait here, or a subscriber that publishes could
+                # deadlock its own topic
+                while len(q.items) >= q.maxsize:
+                    self._cond.wait()
+                    if self._executor is None or self._queues.get(lane) is not q:
+                        return False
+        entry = [event_type, args, kwargs, ckey]
+        q.items.append(entry)
+        if ckey is not None:
+            q.latest[ckey] = entry
+        if not q.running:
+            q.running = True
+            self._executor.submit(self._drain, lane, q)
+        return True
+
+    def _drain(self, lane: str, q: _TopicQueue):
+        self._worker.active = True
+        try:
+            with self._cond:
+                batch: list[list] = []
+                while q.items and len(batch) < _DRAIN_BATCH:
+                    entry = q.items.popleft()
+                    if entry[3] is not None:
+                        q.latest.pop(entry[3], None)
+                    batch.append(entry)
+                self._cond.notify_all()
+            for event_type, args, kwargs, _ in batch:
+                self._deliver(event_type, args, kwargs)
+        finally:
+            self._worker.active = False
+            with self._cond:
+                # Resubmit rather than loop so other topics get a turn on the pool
+                if q.items and self._executor is not None and self._queues.get(lane) is q:
+                    self._executor.submit(self._drain, lane, q)
+                else:
+                    q.running = False
 
-    def publish(self, event_type: str, *args: Any, **kwargs: Any):
-        if event_type in self._subscribers:
-            for callback in list(self._subscribers[event_type]):
-                try:
-                    callback(*args, **kwargs)
-                except Exception as e:
-                    print(f"Error in event handler for {event_type}: {e}")
 
 event_bus = EventBus()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import time
+
+
+class Event:
+    """Base for event-bus payloads.
+
+    `conn_id` identifies the IRCClient that produced the event, `received`
+    is a `time.monotonic()` stamp taken when it was produced and
+    `server_time` is the IRCv3 `time` tag of the originating line, if any.
+    """
+
+    __slots__ = ("conn_id", "received", "server_time")
+
+    def __init__(self, conn_id: int, server_time: str | None = None):
+        self.conn_id = conn_id
+        self.received = time.monotonic()
+        self.server_time = server_time
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._repr_fields())
+        return f"{type(self).__name__}({fields})"
+
+    @classmethod
+    def _repr_fields(cls) -> list[str]:
+        names: list[str] = []
+        for klass in reversed(cls.__mro__):
+            names.extend(getattr(klass, "__slots__", ()))
+        return names
+
+
+class StatusEvent(Event):
+    """A Console status line ("irc.status")."""
+
+    __slots__ = ("text", "is_notice", "is_ctcp")
+
+    def __init__(self, conn_id: int, text: str, *, is_notice: bool = False, is_ctcp: bool = False,
+                 server_time: str | None = None):
+        super().__init__(conn_id, server_time)
+        self.text = text
+        self.is_notice = is_notice
+        self.is_ctcp = is_ctcp
+
+
+class MessageEvent(Event):
+    """A line for a channel or private conversation ("irc.message").
+
+    `sender` is "*" for emotes and client-generated lines (joins, parts,
+    activity summaries); `nick` is the user the line came from, if any.
+    `tab_target` is where the line belongs: the channel, or the other party
+    of a private conversation.
+    """
+
+    __slots__ = ("target", "sender", "text", "nick", "tab_target",
+                 "is_private", "is_notice", "is_action", "is_activity")
+
+    def __init__(self, conn_id: int, target: str, sender: str, text: str, *, nick: str = "",
+                 tab_target: str | None = None, is_private: bool = False,
+                 is_notice: bool = False, is_action: bool = False, is_activity: bool = False,
+                 server_time: str | None = None):
+        super().__init__(conn_id, server_time)
+        self.target = target
+        self.sender = sender
+        self.text = text
+        self.nick = nick
+        self.tab_target = tab_target or target
+        self.is_private = is_private
+        self.is_notice = is_notice
+        self.is_action = is_action
+        self.is_activity = is_activity
+
+
+class ConnectionEvent(Event):
+    """Connection lifecycle progress ("irc.connection")."""
+
+    __slots__ = ("state", "detail")
+
+    def __init__(self, conn_id: int, state: str, detail: str = ""):
+        super().__init__(conn_id)
+        self.state = state
+        self.detail = detail
+
+
+class UsersSnapshot(Event):
+    """Full, sorted user list for a channel ("irc.users").
+
+    `prefixes` maps nicks to their status prefixes (e.g. "@+"); `symbols`
+    lists the server's prefix symbols from highest rank to lowest.
+    """
+
+    __slots__ = ("target", "users", "prefixes", "symbols")
+
+    def __init__(self, conn_id: int, target: str, users: list[str],
+                 prefixes: dict[str, str] | None = None, symbols: str = "@+"):
+        super().__init__(conn_id)
+        self.target = target
+        self.users = users
+        self.prefixes = prefixes or {}
+        self.symbols = symbols
+
+
+class UsersDelta(Event):
+    """Incremental change against the last snapshot for a channel ("irc.users.delta").
+
+    `modes` lists `(nick, prefixes)` for members whose status prefixes changed.
+    """
+
+    __slots__ = ("target", "added", "removed", "renamed", "modes")
+
+    def __init__(self, conn_id: int, target: str, added: list[str], removed: list[str],
+                 renamed: list[tuple[str, str]], modes: list[tuple[str, str]] | None = None):
+        super().__init__(conn_id)
+        self.target = target
+        self.added = added
+        self.removed = removed
+        self.renamed = renamed
+        self.modes = modes or []
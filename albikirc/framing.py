@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import socket
+from typing import Iterator
+
+
+class LineFramer:
+    """Incremental line framer over a fixed, preallocated receive buffer.
+
+    Data is read with ``recv_into`` and scanned with a moving offset, so a
+    burst of lines costs one pass over the bytes instead of re-copying the
+    unconsumed tail for every line. Lines end with CRLF or a bare LF.
+
+    A line longer than ``max_line_length`` is dropped and the framer resyncs at
+    the next LF; ``dropped`` counts how many lines were discarded that way.
+    """
+
+    def __init__(self, max_line_length: int = 8703, recv_size: int = 4096):
+        self.max_line_length = max(512, int(max_line_length))
+        self.recv_size = max(512, int(recv_size))
+        # Room for one maximal partial line plus a full read after compaction
+        self._buf = bytearray(self.max_line_length + self.recv_size + 2)
+        self._view = memoryview(self._buf)
+        self._start = 0     # first unconsumed byte
+        self._scan = 0      # first byte not yet searched for LF
+        self._end = 0       # end of valid data
+        self._discarding = False
+        self.dropped = 0
+
+    def reset(self):
+        self._start = self._scan = self._end = 0
+        self._discarding = False
+
+    def pending(self) -> int:
+        """Number of buffered bytes belonging to an incomplete line."""
+        return self._end - self._start
+
+    def recv_into(self, sock: socket.socket) -> int:
+        """Read once from ``sock`` into the buffer. Returns 0 on EOF."""
+        if len(self._buf) - self._end < self.recv_size:
+            self._compact()
+        n = sock.recv_into(self._view[self._end:], self.recv_size)
+        self._end += n
+        return n
+
+    def lines(self) -> Iterator[bytes]:
+        """Yield every complete line currently buffered, without terminators."""
+        buf = self._buf
+        while True:
+            nl = buf.find(b"\n", self._scan, self._end)
+            if nl < 0:
+                break
+            start = self._start
+            self._start = self._scan = nl + 1
+            if self._discarding:
+                self._discarding = False
+                continue
+            stop = nl
+            if stop > start and buf[stop - 1] == 0x0D:
+                stop -= 1
+            if stop - start > self.max_line_length:
+                self.dropped += 1
+                continue
+            yield bytes(self._view[start:stop])
+        self._scan = self._end
+        pending = self._end - self._start
+        if pending and buf[self._end - 1] == 0x0D:
+            # A trailing CR may be the first half of a CRLF split across reads
+            pending -= 1
+        if pending > self.max_line_length:
+            # No terminator within the limit: drop what we have and skip the
+            # rest of this line when its LF finally arrives.
+            if not self._discarding:
+                self.dropped += 1
+            self._discarding = True
+            self._start = self._scan = self._end
+        if self._start == self._end:
+            self._start = self._scan = self._end = 0
+
+    def _compact(self):
+        start, end = self._start, self._end
+        if start == 0:
+            return
+        n = end - start
+        if n:
+            self._view[0:n] = self._view[start:end]
+        self._start = 0
+        self._scan -= start
+        self._end = n
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Iterable
+
+# Characters that may appear in a nick besides letters and digits (RFC 2812 "special" plus "-").
+# A highlight only counts when it is not glued to any of them, so "al" does not match
+# "also" or "al_".
+_WORD = r"\w\[\]\\`^{|}\-"
+_BOUNDARY_BEFORE = rf"(?<![{_WORD}])"
+_BOUNDARY_AFTER = rf"(?![{_WORD}])"
+_TOKEN = re.compile(rf"[{_WORD}]+")
+
+
+def _clean(values: Iterable[Any]) -> list[str]:
+    out: list[str] = []
+    seen: set[str] = set()
+    for v in values or ():
+        s = str(v or "").strip()
+        if s and s.lower() not in seen:
+            seen.add(s.lower())
+            out.append(s)
+    return out
+
+
+class _CompiledRules:
+    """Compiled form of one rule set.
+
+    Literals that are a single word (nicks, most keywords) go in a dict and
+    are found by splitting the text into words once, so the cost does not
+    grow with the number of keywords. Literals with spaces or punctuation
+    share one combined regex; user regexes are run as given.
+    """
+
+    __slots__ = ("words", "literal", "names", "regexes")
+
+    def __init__(self, literals: list[tuple[str, str]], regexes: list[tuple[str, re.Pattern]]):
+        # literals: (text, rule name); later duplicates keep the first rule name
+        self.words: dict[str, str] = {}
+        self.names: dict[str, str] = {}
+        for text, rule in literals:
+            key = text.lower()
+            if _TOKEN.fullmatch(text):
+                self.words.setdefault(key, rule)
+            else:
+                self.names.setdefault(key, rule)
+        if self.names:
+            # Longest first so "deploy now" wins over "deploy" at the same position
+            alternation = "|".join(re.escape(t) for t in sorted(self.names, key=len, reverse=True))
+            self.literal: re.Pattern | None = re.compile(
+                f"{_BOUNDARY_BEFORE}(?:{alternation}){_BOUNDARY_AFTER}", re.IGNORECASE,
+            )
+        else:
+            self.literal = None
+        self.regexes = regexes
+
+    def matches(self, text: str) -> bool:
+        """Whether anything in `text` matches; stops at the first hit."""
+        words = self.words
+        if words:
+            for m in _TOKEN.finditer(text):
+                if m.group(0).lower() in words:
+                    return True
+        if self.literal is not None and self.literal.search(text):
+            return True
+        for _, rx in self.regexes:
+            for m in rx.finditer(text):
+                if m.end() > m.start():
+                    return True
+        return False
+
+    def find(self, text: str) -> list[tuple[int, int, str]]:
+        spans: list[tuple[int, int, str]] = []
+        words = self.words
+        if words:
+            for m in _TOKEN.finditer(text):
+                rule = words.get(m.group(0).lower())
+                if rule is not None:
+                    spans.append((m.start(), m.end(), rule))
+        if self.literal is not None:
+            names = self.names
+            for m in self.literal.finditer(text):
+                spans.append((m.start(), m.end(), names.get(m.group(0).lower(), "keyword")))
+        for rule, rx in self.regexes:
+            for m in rx.finditer(text):
+                if m.end() > m.start():
+                    spans.append((m.start(), m.end(), rule))
+        if len(spans) > 1:
+            spans.sort()
+        return spans
+
+
+class HighlightMatcher:
+    """Find highlights (your nicks, keywords, regexes) in message text.
+
+    Everything is compiled up front: nicks and keywords become a word table
+    plus one case-insensitive alternation with nick-aware word boundaries,
+    and each user regex is compiled once. Channel-specific rules get their own
+    combined matcher that includes the global rules. Build a new matcher when
+    the configuration changes; `find` itself never compiles anything.
+    Invalid regexes are skipped and listed in `errors`.
+    """
+
+    def __init__(
+        self,
+        nicks: Iterable[str] = (),
+        keywords: Iterable[str] = (),
+        regexes: Iterable[str] = (),
+        channels: dict[str, dict[str, Any]] | None = None,
+    ):
+        self.errors: list[str] = []
+        self._literals = [(n, f"nick:{n}") for n in _clean(nicks)]
+        self._literals += [(k, f"keyword:{k}") for k in _clean(keywords)]
+        self._regexes = self._compile_regexes(regexes)
+        self._global = _CompiledRules(self._literals, self._regexes)
+        self._channels: dict[str, _CompiledRules] = {}
+        for chan, rules in (channels or {}).items():
+            rules = rules or {}
+            extra_literals = [(k, f"keyword:{k}") for k in _clean(rules.get("keywords", []))]
+            extra_regexes = self._compile_regexes(rules.get("regexes", []))
+            if extra_literals or extra_regexes:
+                self._channels[str(chan).lower()] = _CompiledRules(
+                    self._literals + extra_literals, self._regexes + extra_regexes,
+                )
+
+    def _compile_regexes(self, patterns: Iterable[str]) -> list[tuple[str, re.Pattern]]:
+        out: list[tuple[str, re.Pattern]] = []
+        for p in _clean(patterns):
+            try:
+                out.append((f"regex:{p}", re.compile(p, re.IGNORECASE)))
+            except re.error as e:
+                self.errors.append(f"{p}: {e}")
+        return out
+
+    @classmethod
+    def from_settings(cls, settings: dict[str, Any], nicks: Iterable[str] = ()) -> HighlightMatcher:
+        """Build from the `highlight` config section plus the given nicks."""
+        hl = settings.get("highlight", {}) or {}
+        all_nicks = list(nicks) + list(hl.get("alternate_nicks", []) or [])
+        return cls(
+            nicks=all_nicks,
+            keywords=hl.get("keywords", []) or [],
+            regexes=hl.get("regexes", []) or [],
+            channels=hl.get("channels", {}) or {},
+        )
+
+    def matches(self, text: str, channel: str | None = None) -> bool:
+        """Whether `text` contains any highlight; cheaper than `find` without the positions."""
+        rules = self._channels.get(channel.lower(), self._global) if channel else self._global
+        return rules.matches(text)
+
+    def find(self, text: str, channel: str | None = None) -> list[tuple[int, int, str]]:
+        """Return `(start, end, rule)` spans in `text`, ordered by position."""
+        rules = self._channels.get(channel.lower(), self._global) if channel else self._global
+        return rules.find(text)
@@ -3,12 +3,29 @@ from __future__ import annotations
 import socket
 import ssl
 import threading
+from collections import deque
 from dataclasses import dataclass, field
 from typing import Callable, Optional
 import base64
+import itertools
+import random
 import time
 
+from .dispatch import EventDispatcher
 from .event_bus import event_bus
+from .events import ConnectionEvent, MessageEvent, StatusEvent, UsersDelta, UsersSnapshot
+from .framing import LineFramer
+from .irc_parser import Message, parse_line
+from .membership import ChannelMembers, nick_key
+from .outbound import OutboundQueue
+from .scheduler import Scheduler, TimerHandle
+
+
+_CONN_IDS = itertools.count(1)
+
+
+class _ConnectCancelled(Exception):
+    pass
 
 
 @dataclass
@@ -20,6 +37,8 @@ class IRCClient:
     """
 
     connected: bool = field(default=False, init=False)
+    # Identifies this client in published events
+    conn_id: int = field(default_factory=lambda: next(_CONN_IDS), init=False)
     nick: str | None = field(default=None, init=False)
     real_name: str | None = field(default=None, init=False)
     # Auth / TLS extras
@@ -29,9 +48,12 @@ class IRCClient:
     tls_client_certfile: str | None = field(default=None)
     tls_client_keyfile: str | None = field(default=None)
     _reg_sent: bool = field(default=False, init=False)
+    _registered: bool = field(default=False, init=False)
     _cap_in_progress: bool = field(default=False, init=False)
     _awaiting_auth_plus: bool = field(default=False, init=False)
     _quit_sent: bool = field(default=False, init=False)
+    # Reason from the server's ERROR line, reported when the reader loop ends
+    _disconnect_reason: str = field(default="", init=False)
 
     # CTCP preferences
     respond_to_ctcp_version: bool = field(default=True)
@@ -51,19 +73,60 @@ class IRCClient:
     tcp_keepalive_interval: int = field(default=30)   # seconds between probes
     tcp_keepalive_count: int = field(default=4)       # number of failed probes before drop
 
+    # Longest accepted inbound line in bytes (tags + message); longer lines are dropped
+    max_line_length: int = field(default=8703)
+
+    # Raw protocol traffic ring buffer (off by default; see raw_log_snapshot)
+    raw_log_enabled: bool = field(default=False)
+    raw_log_size: int = field(default=2000)
+
+    # Outbound flood control: burst of lines sent at once, then refill rate (lines/second)
+    flood_burst: int = field(default=5)
+    flood_rate: float = field(default=0.5)
+
     # Optional server password (PASS). Not persisted here.
     server_password: str | None = field(default=None)
 
     _sock: Optional[socket.socket] = field(default=None, init=False)
+    _outq: Optional[OutboundQueue] = field(default=None, init=False)
     _rx_thread: Optional[threading.Thread] = field(default=None, init=False)
     _stop_event: threading.Event = field(default_factory=threading.Event, init=False)
+    # Background connect: attempts are numbered; cancel/disconnect/new connect bump the number
+    _connect_lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+    _connect_state_lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+    _connect_gen: int = field(default=0, init=False)
+    _connecting: bool = field(default=False, init=False)
+    _pending_sock: Optional[socket.socket] = field(default=None, init=False)
     # In-memory channel membership tracking (lower-cased channel keys)
-    _chan_users: dict[str, set[str]] = field(default_factory=dict, init=False)
+    _chan_users: dict[str, ChannelMembers] = field(default_factory=dict, init=False)
     _chan_display: dict[str, str] = field(default_factory=dict, init=False)
+    # Reverse index: nick_key(nick) -> channel keys where we have seen that nick
+    _nick_chans: dict[str, set[str]] = field(default_factory=dict, init=False)
+    # RPL_NAMREPLY chunks collected per channel key until RPL_ENDOFNAMES: (nicks, prefixes)
+    _names_pending: dict[str, tuple[list[str], dict[str, str]]] = field(default_factory=dict,
+                                                                         init=False)
+    # ISUPPORT PREFIX, e.g. (qaohv)~&@%+ ; symbols are ordered highest rank first
+    _prefix_modes: str = field(default="ov", init=False)
+    _prefix_symbols: str = field(default="@+", init=False)
+    # ISUPPORT CHANMODES: list modes and modes that always take a parameter, and those that
+    # take one only when set
+    _chanmodes_param: str = field(default="beIk", init=False)
+    _chanmodes_param_set: str = field(default="l", init=False)
     # Activity summaries batching
     _activity: dict[str, dict[str, set[str]]] = field(default_factory=dict, init=False)  # keys: 'join','part','kick'
-    _activity_timers: dict[str, threading.Timer] = field(default_factory=dict, init=False)
+    _activity_timers: dict[str, TimerHandle] = field(default_factory=dict, init=False)
+    # One timer thread for all client timers (activity flushes and future keepalive/backoff work)
+    _scheduler: Scheduler = field(default_factory=Scheduler, init=False)
     _activity_lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+    # Subscribers run on this worker, never on the reader thread
+    _dispatcher: EventDispatcher = field(default_factory=lambda: EventDispatcher(event_bus),
+                                         init=False)
+    # Entries are (wall-clock time, "<-" or "->", line)
+    _raw_log: deque[tuple[float, str, str]] = field(default_factory=deque, init=False)
+    _raw_log_lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def __post_init__(self):
+        self._scheduler.on_error = self._on_timer_error
 
     def _queue_activity(self, channel: str, *, joined: list[str] | None = None, parted: list[str] | None = None, kicked: list[str] | None = None):
         key = channel.lower()
@@ -77,24 +140,15 @@ class IRCClient:
                 rec["kick"].update(kicked)
             if key not in self._activity_timers:
                 delay = max(1, int(self.activity_window_seconds or 10))
-                t = threading.Timer(delay, self._flush_activity, args=(key,))
-                t.daemon = True
-                self._activity_timers[key] = t
-                try:
-                    t.start()
-                except Exception:
-                    # Fallback: flush immediately on failure to start timer
-                    self._flush_activity(key)
+                self._activity_timers[key] = self._scheduler.call_later(delay, self._flush_activity,
+                                                                        key)
 
     def _flush_activity(self, key: str):
         with self._activity_lock:
             rec = self._activity.pop(key, None)
             t = self._activity_timers.pop(key, None)
             if t:
-                try:
-                    t.cancel()
-                except Exception:
-                    pass
+                t.cancel()
         if not rec:
             return
         joined = sorted(rec.get("join", set()))
@@ -112,26 +166,121 @@ class IRCClient:
         chan = self._chan_display.get(key, key)
         text = "[activity] " + "; ".join(parts)
         # Post as a channel message from '*'
-        self._emit_message(chan, "*", text)
-
-    def _emit_status(self, text: str):
-        event_bus.publish("irc.status", text=text)
-
-    def _emit_message(self, target: str, sender: str, text: str):
-        event_bus.publish("irc.message", target=target, sender=sender, text=text)
-
-    def _emit_users(self, target: str, users: list[str]):
-        event_bus.publish("irc.users", target=target, users=users)
+        self._emit_message(chan, "*", text, activity=True)
+
+    def _emit_status(self, text: str, *, msg: Optional[Message] = None, notice: bool = False,
+                     ctcp: bool = False):
+        self._dispatcher.submit("irc.status", StatusEvent(
+            self.conn_id, text, is_notice=notice, is_ctcp=ctcp, server_time=self._server_time(msg),
+        ))
+
+    def _emit_message(self, target: str, sender: str, text: str, *, msg: Optional[Message] = None,
+                      notice: bool = False, action: bool = False, activity: bool = False):
+        # Classified once here so subscribers don't re-derive it from strings
+        nick = (msg.nick or "") if msg is not None else ""
+        me = (self.nick or "").lower()
+        is_private = bool(me) and target.lower() == me
+        self._dispatcher.submit("irc.message", MessageEvent(
+            self.conn_id, target, sender, text, nick=nick,
+            tab_target=(nick or sender) if is_private else target,
+            is_private=is_private, is_notice=notice, is_action=action, is_activity=activity,
+            server_time=self._server_time(msg),
+        ))
+
+    def _emit_connection(self, state: str, detail: str = ""):
+        self._dispatcher.submit("irc.connection", ConnectionEvent(self.conn_id, state, detail))
+
+    def _emit_users(self, target: str, users: list[str], prefixes: dict[str, str] | None = None):
+        # Full snapshot, sorted case-insensitively
+        self._dispatcher.submit("irc.users", UsersSnapshot(
+            self.conn_id, target, users, prefixes, self._prefix_symbols,
+        ))
+
+    def _emit_users_delta(self, target: str, *, added: list[str] | None = None,
+                          removed: list[str] | None = None,
+                          renamed: list[tuple[str, str]] | None = None,
+                          modes: list[tuple[str, str]] | None = None):
+        # Incremental change against the last snapshot for this target
+        self._dispatcher.submit("irc.users.delta", UsersDelta(
+            self.conn_id, target, added or [], removed or [], renamed or [], modes,
+        ))
+
+    @staticmethod
+    def _server_time(msg: Optional[Message]) -> Optional[str]:
+        if msg is None or not msg.raw_tags:
+            return None
+        return msg.tags.get("time")
+
+    # Outbound commands whose arguments carry credentials, and NickServ subcommands that do
+    _SECRET_COMMANDS = frozenset(("PASS", "OPER", "AUTHENTICATE"))
+    _SECRET_NICKSERV = frozenset(("IDENTIFY", "REGISTER", "GHOST", "RECOVER", "SASL"))
+    # AUTHENTICATE arguments that are safe to keep: mechanism names and the empty reply
+    _AUTH_PUBLIC = frozenset(("+", "*", "PLAIN", "EXTERNAL"))
+
+    @classmethod
+    def redact_message(cls, target: str, text: str) -> str:
+        """`text` sent to `target` with NickServ credentials masked, for history and logs."""
+        if target.lower() not in ("nickserv", "ns"):
+            return text
+        sub, sep, _ = text.partition(" ")
+        if sep and sub.upper() in cls._SECRET_NICKSERV:
+            return f"{sub} ***"
+        return text
+
+    @classmethod
+    def _redact_raw(cls, line: str) -> str:
+        """`line` with passwords and SASL payloads replaced by `***`, for the raw traffic log."""
+        command, _, rest = line.partition(" ")
+        command = command.upper()
+        if command in cls._SECRET_COMMANDS:
+            if command == "AUTHENTICATE" and rest.strip().upper() in cls._AUTH_PUBLIC:
+                return line
+            return f"{command} ***" if rest else line
+        if command == "PRIVMSG":
+            target, _, text = rest.partition(" ")
+            text = text.removeprefix(":")
+            redacted = cls.redact_message(target, text)
+            return line if redacted == text else f"{command} {target} :{redacted}"
+        if command in ("NS", "NICKSERV"):
+            redacted = cls.redact_message("nickserv", rest)
+            return line if redacted == rest else f"{command} {redacted}"
+        return line
+
+    def _record_raw(self, direction: str, line: str):
+        if direction == "->":
+            line = self._redact_raw(line)
+        with self._raw_log_lock:
+            log = self._raw_log
+            size = max(1, int(self.raw_log_size))
+            if log.maxlen != size:
+                log = self._raw_log = deque(log, maxlen=size)
+            log.append((time.time(), direction, line))
 
     # Networking helpers
+    # Sent ahead of queued traffic and without waiting for flood-control tokens
+    _PRIORITY_COMMANDS = frozenset(("PONG", "QUIT", "CAP", "AUTHENTICATE"))
+
     def _send_raw(self, line: str):
-        if not self._sock:
+        # Never blocks: the line is queued for the writer thread
+        outq = self._outq
+        if not self._sock or outq is None:
             return
+        if self.raw_log_enabled:
+            self._record_raw("->", line)
         data = (line + "\r\n").encode("utf-8", errors="ignore")
-        try:
-            self._sock.sendall(data)
-        except Exception as e:
-            self._emit_status(f"Send error: {e}")
+        command = line.split(" ", 1)[0].upper()
+        outq.put(data, priority=command in self._PRIORITY_COMMANDS)
+
+    def _on_send_error(self, e: Exception):
+        self._emit_status(f"Send error: {e}")
+
+    def _on_timer_error(self, callback, e: Exception):
+        self._emit_status(f"Timer error in {getattr(callback, '__name__', callback)}: {e}")
+
+    def send_queue_depth(self) -> int:
+        """Number of outbound lines waiting for the writer thread."""
+        outq = self._outq
+        return outq.depth() if outq is not None else 0
 
 
     def _is_ctcp(self, text: str) -> bool:
@@ -161,75 +310,131 @@ class IRCClient:
             self._reg_sent = True
 
     def _reader_loop(self):
-        buf = b""
+        framer = LineFramer(max_line_length=self.max_line_length)
+        dropped = 0
+        self._disconnect_reason = ""
         try:
             while not self._stop_event.is_set():
                 try:
-                    chunk = self._sock.recv(4096)
+                    n = framer.recv_into(self._sock)
                 except socket.timeout:
                     # Ignore periodic read timeouts and continue waiting for data
                     continue
-                if not chunk:
+                if not n:
                     break
-                buf += chunk
-                while b"\r\n" in buf:
-                    line, buf = buf.split(b"\r\n", 1)
+                for line in framer.lines():
                     try:
                         self._handle_line(line.decode("utf-8", errors="ignore"))
                     except Exception as e:
                         self._emit_status(f"Parse error: {e}")
+                if framer.dropped != dropped:
+                    self._emit_status(
+                        f"Dropped {framer.dropped - dropped} oversized line(s) "
+                        f"(limit {framer.max_line_length} bytes)"
+                    )
+                    dropped = framer.dropped
         except Exception as e:
             self._emit_status(f"Connection error: {e}")
         finally:
             self.connected = False
-            self._emit_status("Disconnected")
-
-    def _parse_prefix(self, prefix: str) -> tuple[str, Optional[str]]:
-        # returns (nick_or_server, userhost)
-        if "!" in prefix:
-            nick, rest = prefix.split("!", 1)
-            return nick, rest
-        return prefix, None
+            reason = self._disconnect_reason
+            self._emit_connection("disconnected", reason)
+            self._emit_status(f"Disconnected: {reason}" if reason else "Disconnected")
+
+    @classmethod
+    def _dispatch_table(cls) -> dict[str, Callable[..., None]]:
+        # Built once per class: COMMAND -> unbound _handle_<command> method
+        table = cls.__dict__.get("_DISPATCH")
+        if table is None:
+            table = {
+                name[len("_handle_"):].upper(): getattr(cls, name)
+                for name in dir(cls)
+                if name.startswith("_handle_") and name != "_handle_line"
+            }
+            setattr(cls, "_DISPATCH", table)
+        return table
 
     def _handle_line(self, line: str):
-        self._emit_status(f"<- {line}")
-        prefix = None
-        trailing = None
-        # IRCv3 message tags (ignore for now, but strip so parsing works)
-        if line.startswith("@"):
-            try:
-                _tags, line = line[1:].split(" ", 1)
-            except ValueError:
-                # Malformed line; drop
-                return
-        if line.startswith(":"):
-            prefix, line = line[1:].split(" ", 1)
-        if " :" in line:
-            line, trailing = line.split(" :", 1)
-        parts = line.split()
-        if not parts:
+        # Runs on the reader thread. Handlers answer the server directly
+        # (PONG, CAP, AUTHENTICATE, nick collisions) and only queue events for
+        # the dispatcher, so subscriber cost never delays the next line.
+        if self.raw_log_enabled:
+            self._record_raw("<-", line)
+        msg = parse_line(line)
+        if msg is None:
             return
-        cmd = parts[0]
-        params = parts[1:]
-
-        handler = getattr(self, f"_handle_{cmd.lower()}", None)
+        handler = self._dispatch_table().get(msg.command)
         if handler:
-            handler(prefix, params, trailing)
-
-    def _handle_ping(self, prefix, params, trailing):
-        self._send_raw(f"PONG :{trailing or 'ping'}")
+            handler(self, msg)
+        elif msg.command.isdigit():
+            # Numerics without a handler (MOTD, error replies, other WHOIS lines):
+            # show their text, minus our own nick
+            args = [p for p in msg.params[1:] if p]
+            text = (" ".join(args[:-1]) + ": " + args[-1]) if len(args) > 1 else "".join(args)
+            if text:
+                self._emit_status(text, msg=msg)
+
+    def _handle_error(self, msg: Message):
+        # The server is closing the link; its reason becomes the disconnect reason
+        reason = msg.param(-1) or "Closing link"
+        self._disconnect_reason = reason
+        self._emit_status(f"Server error: {reason}", msg=msg)
+
+    def _handle_topic(self, msg: Message):
+        if not msg.params:
+            return
+        channel = msg.params[0]
+        topic = msg.params[1] if len(msg.params) > 1 else ""
+        who = msg.nick or msg.source or "server"
+        if topic:
+            self._emit_status(f"{who} changed the topic for {channel} to: {topic}", msg=msg)
+        else:
+            self._emit_status(f"{who} cleared the topic for {channel}", msg=msg)
 
-    def _handle_notice(self, prefix, params, trailing):
-        if trailing is None:
+    def _handle_invite(self, msg: Message):
+        if len(msg.params) < 2:
+            return
+        who = msg.nick or msg.source or "server"
+        self._emit_status(f"{who} invited {msg.params[0]} to {msg.params[1]}", msg=msg)
+
+    def _handle_wallops(self, msg: Message):
+        who = msg.nick or msg.source or "server"
+        self._emit_status(f"WALLOPS from {who}: {msg.param(-1)}", msg=msg)
+
+    def _handle_001(self, msg: Message):  # RPL_WELCOME
+        if msg.params and msg.params[0]:
+            # The server may have adjusted our nick during registration
+            self.nick = msg.params[0]
+        self._registered = True
+        self._emit_connection("registered", msg.source or "")
+
+    def _handle_ping(self, msg: Message):
+        self._send_raw(f"PONG :{msg.param(-1) or 'ping'}")
+
+    def _handle_433(self, msg: Message):  # ERR_NICKNAMEINUSE
+        wanted = msg.param(1) or (self.nick or "")
+        if self._registered or not wanted:
+            self._emit_status(f"Nickname {wanted} is already in use")
+            return
+        # Still registering: the server waits for another NICK, so pick one now
+        alt = (wanted + "_") if len(wanted) < 30 else f"{wanted[:25]}{random.randint(10000, 99999)}"
+        self.nick = alt
+        self._send_raw(f"NICK {alt}")
+        self._emit_status(f"Nickname {wanted} is already in use; trying {alt}")
+
+    def _handle_notice(self, msg: Message):
+        if len(msg.params) < 2:
             return
-        target = params[0] if params else ""
-        sender, _ = self._parse_prefix(prefix or "")
-        if self._is_ctcp(trailing):
+        target = msg.params[0]
+        text = msg.params[-1]
+        sender = msg.nick or ""
+        if self._is_ctcp(text):
             # Suppress CTCP reply notices unless explicitly not ignored
             if not self.ignore_ctcp:
-                ctcp_cmd, ctcp_args = self._parse_ctcp(trailing)
+                ctcp_cmd, ctcp_args = self._parse_ctcp(text)
                 if ctcp_cmd:
-                    self._emit_status(f"CTCP {ctcp_cmd} reply from {sender}: {ctcp_args}")
+                    self._emit_status(f"CTCP {ctcp_cmd} reply from {sender}: {ctcp_args}",
+                                      msg=msg, ctcp=True)
             return
         # Route notices to the relevant tab when possible; otherwise, Console status
         is_channel = target.startswith("#") or target.startswith("&")
@@ -241,15 +446,17 @@ class IRCClient:
             pass
         if self.route_notices_inline and (is_channel or is_pm):
             # Annotate notice in-line for clarity
-            self._emit_message(target, sender, f"[notice] {trailing}")
+            self._emit_message(target, sender, f"[notice] {text}", msg=msg, notice=True)
         else:
-            self._emit_status(f"NOTICE from {sender}: {trailing}")
+            self._emit_status(f"NOTICE from {sender}: {text}", msg=msg, notice=True)
 
-    def _handle_cap(self, prefix, params, trailing):
+    def _handle_cap(self, msg: Message):
+        params = msg.params
         if len(params) < 2:
             return
         subcmd = params[1].upper()
-        if subcmd == "ACK" and trailing and "sasl" in trailing.lower():
+        caps = params[2] if len(params) > 2 else ""
+        if subcmd == "ACK" and "sasl" in caps.lower():
             self._send_raw("AUTHENTICATE PLAIN")
             self._awaiting_auth_plus = True
             return
@@ -260,8 +467,8 @@ class IRCClient:
                 self._send_registration()
             return
 
-    def _handle_authenticate(self, prefix, params, trailing):
-        arg = (params[0] if params else "").strip()
+    def _handle_authenticate(self, msg: Message):
+        arg = msg.param(0).strip()
         if arg == "+" and self._awaiting_auth_plus:
             u = self.sasl_username or (self.nick or "")
             p = self.sasl_password or ""
@@ -270,7 +477,7 @@ class IRCClient:
             self._send_raw("AUTHENTICATE " + b64)
             return
 
-    def _handle_903(self, prefix, params, trailing):
+    def _handle_903(self, msg: Message):
         self._emit_status("SASL authentication successful")
         if self._cap_in_progress:
             self._send_raw("CAP END")
@@ -278,7 +485,7 @@ class IRCClient:
         self._awaiting_auth_plus = False
         self._send_registration()
 
-    def _handle_904(self, prefix, params, trailing):
+    def _handle_904(self, msg: Message):
         self._emit_status(f"SASL authentication failed (904). Continuing without SASL.")
         if self._cap_in_progress:
             self._send_raw("CAP END")
@@ -286,7 +493,7 @@ class IRCClient:
         self._awaiting_auth_plus = False
         self._send_registration()
 
-    def _handle_905(self, prefix, params, trailing):
+    def _handle_905(self, msg: Message):
         self._emit_status(f"SASL authentication failed (905). Continuing without SASL.")
         if self._cap_in_progress:
             self._send_raw("CAP END")
@@ -294,7 +501,7 @@ class IRCClient:
         self._awaiting_auth_plus = False
         self._send_registration()
 
-    def _handle_906(self, prefix, params, trailing):
+    def _handle_906(self, msg: Message):
         self._emit_status(f"SASL authentication failed (906). Continuing without SASL.")
         if self._cap_in_progress:
             self._send_raw("CAP END")
@@ -302,26 +509,28 @@ class IRCClient:
         self._awaiting_auth_plus = False
         self._send_registration()
 
-    def _handle_privmsg(self, prefix, params, trailing):
-        if trailing is None:
+    def _handle_privmsg(self, msg: Message):
+        if len(msg.params) < 2:
             return
-        target = params[0]
-        sender, _ = self._parse_prefix(prefix or "")
+        target = msg.params[0]
+        text = msg.params[-1]
+        sender = msg.nick or ""
 
         # CTCP requests arrive via PRIVMSG
-        if self._is_ctcp(trailing):
+        if self._is_ctcp(text):
             # Special-case ACTION to show as an emote even if CTCP is ignored
-            ctcp_cmd, ctcp_args = self._parse_ctcp(trailing)
+            ctcp_cmd, ctcp_args = self._parse_ctcp(text)
             if ctcp_cmd == "ACTION":
                 # Emit as "* sender action" to the channel/pm target
                 action_text = ctcp_args or ""
-                self._emit_message(target, "*", f"{sender} {action_text}")
+                self._emit_message(target, "*", f"{sender} {action_text}", msg=msg, action=True)
                 return
             if self.ignore_ctcp:
                 return
             if ctcp_cmd:
                 # Only emit when not ignoring CTCP
-                self._emit_status(f"CTCP {ctcp_cmd} from {sender} (target {target})")
+                self._emit_status(f"CTCP {ctcp_cmd} from {sender} (target {target})",
+                                  msg=msg, ctcp=True)
                 if ctcp_cmd == "VERSION" and self.respond_to_ctcp_version:
                     self._send_ctcp_reply(sender, "VERSION", self.version_string)
                 elif ctcp_cmd == "PING" and ctcp_args:
@@ -329,22 +538,23 @@ class IRCClient:
             return
 
         # Not CTCP → normal chat message
-        self._emit_message(target, sender, trailing)
+        self._emit_message(target, sender, text, msg=msg)
 
-    def _handle_331(self, prefix, params, trailing):  # RPL_NOTOPIC
-        if len(params) < 2:
+    def _handle_331(self, msg: Message):  # RPL_NOTOPIC
+        if len(msg.params) < 2:
             return
-        channel = params[1]
+        channel = msg.params[1]
         self._emit_status(f"No topic set for {channel}")
 
-    def _handle_332(self, prefix, params, trailing):  # RPL_TOPIC
-        if len(params) < 2 or trailing is None:
+    def _handle_332(self, msg: Message):  # RPL_TOPIC
+        if len(msg.params) < 3:
             return
-        channel = params[1]
-        topic = trailing
+        channel = msg.params[1]
+        topic = msg.params[-1]
         self._emit_status(f"Topic for {channel}: {topic}")
 
-    def _handle_333(self, prefix, params, trailing):  # RPL_TOPICWHOTIME
+    def _handle_333(self, msg: Message):  # RPL_TOPICWHOTIME
+        params = msg.params
         if len(params) < 4:
             return
         channel = params[1]
@@ -356,196 +566,396 @@ class IRCClient:
             when = params[3]
         self._emit_status(f"Topic for {channel} set by {set_by} at {when}")
 
-    def _handle_311(self, prefix, params, trailing):  # RPL_WHOISUSER
-        if len(params) < 5 or trailing is None:
+    def _handle_311(self, msg: Message):  # RPL_WHOISUSER
+        params = msg.params
+        if len(params) < 6:
             return
         nick = params[1]; user = params[2]; host = params[3]
-        real = trailing
+        real = params[-1]
         self._emit_status(f"WHOIS {nick}: {user}@{host} — {real}")
 
-    def _handle_312(self, prefix, params, trailing):  # RPL_WHOISSERVER
-        if len(params) < 3 or trailing is None:
+    def _handle_312(self, msg: Message):  # RPL_WHOISSERVER
+        params = msg.params
+        if len(params) < 4:
             return
-        nick = params[1]; server = params[2]; info = trailing
+        nick = params[1]; server = params[2]; info = params[-1]
         self._emit_status(f"WHOIS {nick}: on {server} — {info}")
 
-    def _handle_317(self, prefix, params, trailing):  # RPL_WHOISIDLE
+    def _handle_317(self, msg: Message):  # RPL_WHOISIDLE
+        params = msg.params
         if len(params) < 3:
             return
         nick = params[1]
+        idle: int | str
         try:
             idle = int(params[2])
         except Exception:
             idle = params[2]
         signon = None
-        if len(params) >= 4:
+        # <me> <nick> <idle> <signon> :seconds idle, signon time
+        if len(params) >= 5:
             try:
                 signon_ts = int(params[3])
                 signon = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(signon_ts))
             except Exception:
                 signon = params[3]
-        msg = f"WHOIS {nick}: idle {idle}s"
+        text = f"WHOIS {nick}: idle {idle}s"
         if signon:
-            msg += f"; signon {signon}"
-        self._emit_status(msg)
+            text += f"; signon {signon}"
+        self._emit_status(text)
 
-    def _handle_319(self, prefix, params, trailing):  # RPL_WHOISCHANNELS
-        if len(params) < 2 or trailing is None:
+    def _handle_319(self, msg: Message):  # RPL_WHOISCHANNELS
+        if len(msg.params) < 3:
             return
-        nick = params[1]
-        chans = trailing
+        nick = msg.params[1]
+        chans = msg.params[-1]
         self._emit_status(f"WHOIS {nick}: channels: {chans}")
 
-    def _handle_318(self, prefix, params, trailing):  # RPL_ENDOFWHOIS
-        if len(params) < 2 or trailing is None:
+    def _handle_318(self, msg: Message):  # RPL_ENDOFWHOIS
+        if len(msg.params) < 3:
             return
-        nick = params[1]
-        self._emit_status(f"WHOIS {nick}: {trailing}")
+        nick = msg.params[1]
+        self._emit_status(f"WHOIS {nick}: {msg.params[-1]}")
+
+    def _is_me(self, nick: str) -> bool:
+        me = self.nick
+        return bool(me and nick.lower() == me.lower())
 
-    def _handle_join(self, prefix, params, trailing):
-        sender, _ = self._parse_prefix(prefix or "")
-        chan = (params[0] if params else trailing) or ""
+    def _handle_join(self, msg: Message):
+        sender = msg.nick or ""
+        chan = msg.param(0)
         if chan:
             # Track membership
             key = chan.lower()
             self._chan_display[key] = chan
-            users = self._chan_users.setdefault(key, set())
-            users.add(sender)
-            # Emit updated user list
-            self._emit_users(self._chan_display.get(key, chan), sorted(users))
+            if self._is_me(sender):
+                # Fresh list on our own join; NAMES will fill it in
+                self._set_members(key, [sender])
+                self._emit_users(chan, [sender])
+            elif self._add_member(key, sender):
+                self._emit_users_delta(self._chan_display.get(key, chan), added=[sender])
             # Emit notice or queue activity summary
             if self.activity_summaries:
                 self._queue_activity(chan, joined=[sender])
             elif self.show_join_part_notices:
-                self._emit_message(chan, "*", f"{sender} joined {chan}")
+                self._emit_message(chan, "*", f"{sender} joined {chan}", msg=msg)
 
-    def _handle_part(self, prefix, params, trailing):
-        sender, _ = self._parse_prefix(prefix or "")
-        chan = params[0] if params else ""
+    def _handle_part(self, msg: Message):
+        sender = msg.nick or ""
+        chan = msg.param(0)
         if chan:
-            reason = trailing or ""
+            reason = msg.param(1)
             if not self.activity_summaries and self.show_join_part_notices:
-                self._emit_message(chan, "*", f"{sender} left {chan}{(' (' + reason + ')') if reason else ''}")
+                why = f" ({reason})" if reason else ""
+                self._emit_message(chan, "*", f"{sender} left {chan}{why}", msg=msg)
             # Update membership
-            key = chan.lower()
-            users = self._chan_users.setdefault(key, set())
-            if sender in users:
-                users.remove(sender)
-            self._emit_users(self._chan_display.get(key, chan), sorted(users))
+            self._remove_member(chan, sender)
             if self.activity_summaries:
                 self._queue_activity(chan, parted=[sender])
 
-    def _handle_kick(self, prefix, params, trailing):
-        if len(params) < 2:
+    def _handle_kick(self, msg: Message):
+        if len(msg.params) < 2:
             return
-        chan = params[0]
-        victim = params[1]
-        kicker, _ = self._parse_prefix(prefix or "")
-        reason = trailing or ""
-        key = chan.lower()
-        users = self._chan_users.setdefault(key, set())
-        if victim in users:
-            users.remove(victim)
+        chan = msg.params[0]
+        victim = msg.params[1]
+        kicker = msg.nick or ""
+        reason = msg.param(2)
         # Update list regardless of notice preference
-        self._emit_users(self._chan_display.get(key, chan), sorted(users))
+        self._remove_member(chan, victim)
         # Treat like a PART-style notice (respect preference)
         if self.activity_summaries:
             self._queue_activity(chan, kicked=[victim])
         elif self.show_join_part_notices:
-            msg = f"{victim} was kicked from {chan} by {kicker}"
+            text = f"{victim} was kicked from {chan} by {kicker}"
             if reason:
-                msg += f" ({reason})"
-            self._emit_message(chan, "*", msg)
-
-    def _handle_quit(self, prefix, params, trailing):
-        sender, _ = self._parse_prefix(prefix or "")
-        reason = trailing or ""
-        # Without tracking channel membership, request NAMES on all known channels would be ideal
-        # If we are in any channels, the server will often send PART/QUIT effects; request a global NAMES refresh is not possible
+                text += f" ({reason})"
+            self._emit_message(chan, "*", text, msg=msg)
+
+    # Membership bookkeeping; keeps _chan_users and the _nick_chans index in sync
+    def _add_member(self, key: str, nick: str) -> bool:
+        members = self._chan_users.get(key)
+        if members is None:
+            members = self._chan_users[key] = ChannelMembers()
+        if not members.add(nick):
+            return False
+        self._nick_chans.setdefault(nick_key(nick), set()).add(key)
+        return True
+
+    def _discard_member(self, key: str, nick: str) -> str | None:
+        members = self._chan_users.get(key)
+        removed = members.discard(nick) if members is not None else None
+        if removed is not None:
+            nk = nick_key(nick)
+            chans = self._nick_chans.get(nk)
+            if chans is not None:
+                chans.discard(key)
+                if not chans:
+                    del self._nick_chans[nk]
+        return removed
+
+    def _set_members(self, key: str, nicks: list[str],
+                     prefixes: dict[str, str] | None = None) -> ChannelMembers:
+        self._drop_channel(key)
+        members = self._chan_users[key] = ChannelMembers(nicks, prefixes)
+        index = self._nick_chans
+        for nick in members.sorted_nicks():
+            index.setdefault(nick_key(nick), set()).add(key)
+        return members
+
+    def _drop_channel(self, key: str):
+        members = self._chan_users.pop(key, None)
+        if members is None:
+            return
+        index = self._nick_chans
+        for nick in members.sorted_nicks():
+            nk = nick_key(nick)
+            chans = index.get(nk)
+            if chans is not None:
+                chans.discard(key)
+                if not chans:
+                    del index[nk]
+
+    def _remove_member(self, chan: str, nick: str):
+        key = chan.lower()
+        display = self._chan_display.get(key, chan)
+        if self._is_me(nick):
+            # We left the channel: stop tracking it and clear the list
+            self._drop_channel(key)
+            self._emit_users(display, [])
+            return
+        removed = self._discard_member(key, nick)
+        if removed is not None:
+            self._emit_users_delta(display, removed=[removed])
+
+    def _handle_quit(self, msg: Message):
+        sender = msg.nick or ""
+        reason = msg.param(0)
         if self.show_quit_nick_notices:
             self._emit_status(f"{sender} quit IRC{(' (' + reason + ')') if reason else ''}")
-        # Remove from all tracked channels and emit user updates
-        for key, users in list(self._chan_users.items()):
-            if sender in users:
-                users.remove(sender)
-                self._emit_users(self._chan_display.get(key, key), sorted(users))
-
-    def _handle_nick(self, prefix, params, trailing):
-        sender, _ = self._parse_prefix(prefix or "")
-        new_nick = trailing or (params[0] if params else "")
+        # Remove from the channels we share with them and emit user updates
+        for key in self._nick_chans.pop(nick_key(sender), ()):
+            members = self._chan_users.get(key)
+            removed = members.discard(sender) if members is not None else None
+            if removed is not None:
+                self._emit_users_delta(self._chan_display.get(key, key), removed=[removed])
+
+    def _handle_nick(self, msg: Message):
+        sender = msg.nick or ""
+        new_nick = msg.param(0)
         if new_nick:
-            if self.nick and sender.lower() == self.nick.lower():
+            if self._is_me(sender):
                 self.nick = new_nick
             if self.show_quit_nick_notices:
                 self._emit_status(f"{sender} is now known as {new_nick}")
-            # Rename in all tracked channels
-            for key, users in list(self._chan_users.items()):
-                if sender in users:
-                    users.remove(sender)
-                    users.add(new_nick)
-                    self._emit_users(self._chan_display.get(key, key), sorted(users))
-
-    def _handle_353(self, prefix, params, trailing):  # RPL_NAMREPLY
-        if len(params) < 3 or trailing is None:
-            return
-        channel = params[2]
-        names = [n.lstrip("@+") for n in trailing.split()]
+            # Rename in the channels we share with them
+            chans = self._nick_chans.pop(nick_key(sender), None)
+            if not chans:
+                return
+            self._nick_chans.setdefault(nick_key(new_nick), set()).update(chans)
+            for key in chans:
+                members = self._chan_users.get(key)
+                old = members.rename(sender, new_nick) if members is not None else None
+                if old is not None:
+                    self._emit_users_delta(self._chan_display.get(key, key),
+                                           renamed=[(old, new_nick)])
+
+    def _handle_005(self, msg: Message):  # RPL_ISUPPORT
+        # <me> <token> [<token> ...] :are supported by this server
+        for token in msg.params[1:-1]:
+            name, _, value = token.partition("=")
+            if name.upper() == "PREFIX":
+                if value.startswith("(") and ")" in value:
+                    modes, _, symbols = value[1:].partition(")")
+                    if len(modes) == len(symbols):
+                        self._prefix_modes = modes
+                        self._prefix_symbols = symbols
+                elif not value:
+                    self._prefix_modes = ""
+                    self._prefix_symbols = ""
+            elif name.upper() == "CHANMODES":
+                groups = value.split(",")
+                if len(groups) >= 3:
+                    self._chanmodes_param = groups[0] + groups[1]
+                    self._chanmodes_param_set = groups[2]
+
+    def _handle_mode(self, msg: Message):
+        # Only channel membership modes matter here: <channel> <modes> [<args>...]
+        if len(msg.params) < 2:
+            return
+        key = msg.params[0].lower()
+        members = self._chan_users.get(key)
+        if members is None:
+            return
+        modes, symbols = self._prefix_modes, self._prefix_symbols
+        args = msg.params[2:]
+        arg_i = 0
+        adding = True
+        changed: dict[str, str] = {}
+        for ch in msg.params[1]:
+            if ch in "+-":
+                adding = ch == "+"
+                continue
+            if ch in modes:
+                if arg_i >= len(args):
+                    break
+                nick = args[arg_i]
+                arg_i += 1
+                stored = members.get(nick)
+                if stored is None:
+                    continue
+                sym = symbols[modes.index(ch)]
+                current = members.prefix(stored)
+                if adding:
+                    # Keep prefixes in rank order, highest first
+                    new = "".join(s for s in symbols if s in current or s == sym)
+                else:
+                    new = current.replace(sym, "")
+                if new != current:
+                    members.set_prefix(stored, new)
+                    changed[stored] = new
+            elif ch in self._chanmodes_param or (adding and ch in self._chanmodes_param_set):
+                arg_i += 1
+        if changed:
+            self._emit_users_delta(self._chan_display.get(key, msg.params[0]),
+                                   modes=list(changed.items()))
+
+    def _split_name_prefix(self, name: str) -> tuple[str, str]:
+        # "@+nick" -> ("nick", "@+"); multi-prefix servers may send several symbols
+        symbols = self._prefix_symbols
+        i = 0
+        while i < len(name) and name[i] in symbols:
+            i += 1
+        nick = name[i:]
+        # userhost-in-names: nick!user@host
+        bang = nick.find("!")
+        if bang >= 0:
+            nick = nick[:bang]
+        return nick, name[:i]
+
+    def _handle_353(self, msg: Message):  # RPL_NAMREPLY
+        if len(msg.params) < 3:
+            return
+        # <me> [=*@] <channel> :<names>; collected until RPL_ENDOFNAMES
+        channel = msg.params[-2]
         key = channel.lower()
         self._chan_display[key] = channel
-        self._chan_users[key] = set(names)
-        self._emit_users(channel, sorted(self._chan_users[key]))
-
-    # RPL_ENDOFNAMES (366) could be handled to signal completion
+        nicks, prefixes = self._names_pending.setdefault(key, ([], {}))
+        for name in msg.params[-1].split():
+            nick, prefix = self._split_name_prefix(name)
+            if not nick:
+                continue
+            nicks.append(nick)
+            if prefix:
+                prefixes[nick] = prefix
+
+    def _handle_366(self, msg: Message):  # RPL_ENDOFNAMES
+        if len(msg.params) < 2:
+            return
+        key = msg.params[1].lower()
+        pending = self._names_pending.pop(key, None)
+        if pending is None:
+            return
+        nicks, prefixes = pending
+        members = self._set_members(key, nicks, prefixes)
+        self._emit_users(self._chan_display.get(key, msg.params[1]), members.sorted_nicks(),
+                         members.prefixes())
 
     # Public API
     def connect(self, host: str, port: int, nick: str, *, real_name: str | None = None, use_tls: bool = True):
-        self.disconnect()
+        """Start connecting on a background thread and return immediately.
+
+        Progress is published as `irc.connection` events with `state` one of
+        resolving, connecting, tls, connected, registered, failed or cancelled.
+        """
         self.nick = nick
         self.real_name = (real_name or "").strip() or None
-        self._reg_sent = False
-        self._cap_in_progress = False
-        self._awaiting_auth_plus = False
-        self._quit_sent = False
-        self._stop_event.clear()
-        try:
-            raw_sock = socket.create_connection((host, port), timeout=15)
-            if use_tls:
-                ctx = ssl.create_default_context()
-                ctx.check_hostname = True
-                ctx.verify_mode = ssl.CERT_REQUIRED
-                try:
-                    if self.tls_client_certfile:
-                        ctx.load_cert_chain(certfile=self.tls_client_certfile, keyfile=self.tls_client_keyfile or None)
-                except Exception as e:
-                    self._emit_status(f"TLS client cert load failed: {e}")
-                self._sock = ctx.wrap_socket(raw_sock, server_hostname=host)
-            else:
-                self._sock = raw_sock
-            # Clear the connect-time timeout so recv() blocks indefinitely
+        with self._connect_state_lock:
+            self._connect_gen += 1
+            gen = self._connect_gen
+            self._connecting = True
+            self._abort_pending_sock()
+        t = threading.Thread(
+            target=self._connect_worker, args=(gen, host, port, nick, use_tls), name="irc-connect",
+            daemon=True,
+        )
+        t.start()
+
+    def cancel_connect(self) -> bool:
+        """Abort an in-progress connection attempt. Returns False if none is running."""
+        with self._connect_state_lock:
+            if not self._connecting:
+                return False
+            self._connect_gen += 1
+            self._connecting = False
+            self._abort_pending_sock()
+        return True
+
+    @property
+    def connecting(self) -> bool:
+        return self._connecting
+
+    def _abort_pending_sock(self):
+        # Called with _connect_state_lock held; wakes a blocked connect()/handshake
+        sock = self._pending_sock
+        self._pending_sock = None
+        if sock is not None:
             try:
-                self._sock.settimeout(None)
+                sock.shutdown(socket.SHUT_RDWR)
+            except Exception:
+                pass
+            try:
+                sock.close()
             except Exception:
                 pass
 
-            # Optionally enable TCP keepalive (best-effort; platform specific tuning)
-            if self.enable_tcp_keepalive:
-                try:
-                    self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
-                    # Linux: TCP_KEEPIDLE, TCP_KEEPINTVL, TCP_KEEPCNT
-                    if hasattr(socket, 'TCP_KEEPIDLE'):
-                        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, int(self.tcp_keepalive_idle))
-                    # macOS/BSD: TCP_KEEPALIVE (idle seconds)
-                    if hasattr(socket, 'TCP_KEEPALIVE'):
-                        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, int(self.tcp_keepalive_idle))
-                    if hasattr(socket, 'TCP_KEEPINTVL'):
-                        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, int(self.tcp_keepalive_interval))
-                    if hasattr(socket, 'TCP_KEEPCNT'):
-                        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, int(self.tcp_keepalive_count))
-                    self._emit_status("TCP keepalive enabled")
-                except Exception:
-                    # Non-fatal if keepalive tuning fails
-                    pass
-            self.connected = True
+    def _track_pending_sock(self, gen: int, sock: socket.socket):
+        with self._connect_state_lock:
+            if gen != self._connect_gen:
+                sock.close()
+                raise _ConnectCancelled()
+            self._pending_sock = sock
+
+    def _connect_worker(self, gen: int, host: str, port: int, nick: str, use_tls: bool):
+        # Attempts run one at a time; a superseded attempt bails out at its next check
+        with self._connect_lock:
+            sock = None
+            try:
+                if gen != self._connect_gen:
+                    raise _ConnectCancelled()
+                sock = self._open_connection(gen, host, port, use_tls)
+                with self._connect_state_lock:
+                    if gen != self._connect_gen:
+                        raise _ConnectCancelled()
+                    self._pending_sock = None
+                    self._outq = OutboundQueue(
+                        sock,
+                        burst=self.flood_burst,
+                        rate=self.flood_rate,
+                        on_error=self._on_send_error,
+                    )
+                    self._sock = sock
+                    self.connected = True
+                    self._connecting = False
+            except Exception as e:
+                if sock is not None:
+                    try:
+                        sock.close()
+                    except Exception:
+                        pass
+                with self._connect_state_lock:
+                    current = gen == self._connect_gen
+                    if current:
+                        self._pending_sock = None
+                        self._connecting = False
+                if isinstance(e, _ConnectCancelled) or not current:
+                    self._emit_connection("cancelled", f"{host}:{port}")
+                    self._emit_status(f"Connection to {host}:{port} cancelled")
+                else:
+                    self.connected = False
+                    self._emit_connection("failed", str(e))
+                    self._emit_status(f"Connect failed: {e}")
+                return
+            self._emit_connection("connected", f"{host}:{port}")
             self._emit_status(f"Connected to {host}:{port}{' (TLS)' if use_tls else ''}")
 
             self._rx_thread = threading.Thread(target=self._reader_loop, name="irc-reader", daemon=True)
@@ -565,10 +975,84 @@ class IRCClient:
                 self._send_raw(f"NICK {nick}")
                 self._send_raw(f"USER {nick} 0 * :{self._registration_realname()}")
                 self._reg_sent = True
-        except Exception as e:
-            self.connected = False
-            self._sock = None
-            self._emit_status(f"Connect failed: {e}")
+
+    def _open_connection(self, gen: int, host: str, port: int, use_tls: bool) -> socket.socket:
+        # Runs on the connect worker thread
+        self._teardown()
+        self._reg_sent = False
+        self._registered = False
+        self._cap_in_progress = False
+        self._awaiting_auth_plus = False
+        self._quit_sent = False
+        self._stop_event.clear()
+
+        self._emit_connection("resolving", host)
+        infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        sock = None
+        last_err: Exception | None = None
+        for family, socktype, proto, _, addr in infos:
+            if gen != self._connect_gen:
+                raise _ConnectCancelled()
+            self._emit_connection("connecting", f"{addr[0]}:{addr[1]!s}")
+            candidate = socket.socket(family, socktype, proto)
+            self._track_pending_sock(gen, candidate)
+            try:
+                candidate.settimeout(15)
+                candidate.connect(addr)
+                sock = candidate
+                break
+            except OSError as e:
+                last_err = e
+                try:
+                    candidate.close()
+                except Exception:
+                    pass
+        if sock is None:
+            if gen != self._connect_gen:
+                raise _ConnectCancelled()
+            raise last_err or OSError(f"No addresses found for {host}")
+
+        if use_tls:
+            self._emit_connection("tls", host)
+            ctx = ssl.create_default_context()
+            ctx.check_hostname = True
+            ctx.verify_mode = ssl.CERT_REQUIRED
+            try:
+                if self.tls_client_certfile:
+                    ctx.load_cert_chain(certfile=self.tls_client_certfile,
+                                        keyfile=self.tls_client_keyfile or None)
+            except Exception as e:
+                self._emit_status(f"TLS client cert load failed: {e}")
+            # Handshake separately so cancel_connect() can close the wrapped socket mid-handshake
+            sock = ctx.wrap_socket(sock, server_hostname=host, do_handshake_on_connect=False)
+            self._track_pending_sock(gen, sock)
+            sock.do_handshake()
+        # Clear the connect-time timeout so recv() blocks indefinitely
+        try:
+            sock.settimeout(None)
+        except Exception:
+            pass
+
+        # Optionally enable TCP keepalive (best-effort; platform specific tuning)
+        if self.enable_tcp_keepalive:
+            try:
+                tcp = socket.IPPROTO_TCP
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+                # Linux: TCP_KEEPIDLE, TCP_KEEPINTVL, TCP_KEEPCNT
+                if hasattr(socket, 'TCP_KEEPIDLE'):
+                    sock.setsockopt(tcp, socket.TCP_KEEPIDLE, int(self.tcp_keepalive_idle))
+                # macOS/BSD: TCP_KEEPALIVE (idle seconds)
+                if hasattr(socket, 'TCP_KEEPALIVE'):
+                    sock.setsockopt(tcp, socket.TCP_KEEPALIVE, int(self.tcp_keepalive_idle))
+                if hasattr(socket, 'TCP_KEEPINTVL'):
+                    sock.setsockopt(tcp, socket.TCP_KEEPINTVL, int(self.tcp_keepalive_interval))
+                if hasattr(socket, 'TCP_KEEPCNT'):
+                    sock.setsockopt(tcp, socket.TCP_KEEPCNT, int(self.tcp_keepalive_count))
+                self._emit_status("TCP keepalive enabled")
+            except Exception:
+                # Non-fatal if keepalive tuning fails
+                pass
+        return sock
 
     def join_channel(self, channel: str, key: str | None = None):
         if not self.connected:
@@ -620,6 +1104,26 @@ class IRCClient:
     def send_raw(self, line: str):
         self._send_raw(line)
 
+    def raw_log_snapshot(self, limit: int | None = None) -> list[tuple[float, str, str]]:
+        """Return recorded raw traffic, oldest first (at most `limit` newest entries)."""
+        with self._raw_log_lock:
+            entries = list(self._raw_log)
+        if limit is not None and limit >= 0:
+            entries = entries[-limit:] if limit else []
+        return entries
+
+    def event_queue_stats(self) -> tuple[int, dict[str, int]]:
+        """Events waiting for the dispatcher thread, and how many were dropped per topic."""
+        return self._dispatcher.pending(), dict(self._dispatcher.dropped_by_topic)
+
+    def pending_timers(self) -> int:
+        """Number of client timers currently scheduled."""
+        return self._scheduler.pending()
+
+    def clear_raw_log(self):
+        with self._raw_log_lock:
+            self._raw_log.clear()
+
     def quit(self, reason: str = "Bye"):
         if not self.connected:
             self._emit_status("Not connected.")
@@ -631,6 +1135,14 @@ class IRCClient:
             self._emit_status(f"Send error: {e}")
 
     def disconnect(self):
+        # Also abandons any connection attempt still in progress
+        with self._connect_state_lock:
+            self._connect_gen += 1
+            self._connecting = False
+            self._abort_pending_sock()
+        self._teardown()
+
+    def _teardown(self):
         try:
             if self._sock:
                 try:
@@ -639,6 +1151,9 @@ class IRCClient:
                         self._quit_sent = True
                 except Exception:
                     pass
+                if self._outq is not None:
+                    # Give the writer a moment to flush QUIT before the socket goes away
+                    self._outq.close(timeout=1.0)
                 try:
                     self._sock.shutdown(socket.SHUT_RDWR)
                 except Exception:
@@ -648,6 +1163,9 @@ class IRCClient:
                 except Exception:
                     pass
         finally:
+            if self._outq is not None:
+                self._outq.close(timeout=0)
+            self._outq = None
             self._sock = None
             self._stop_event.set()
             if self._rx_thread and self._rx_thread.is_alive():
@@ -656,15 +1174,17 @@ class IRCClient:
             self.connected = False
             # Clear tracked channels on disconnect
             self._chan_users.clear()
+            self._nick_chans.clear()
+            self._names_pending.clear()
+            self._prefix_modes = "ov"
+            self._prefix_symbols = "@+"
+            self._chanmodes_param = "beIk"
+            self._chanmodes_param_set = "l"
             self._chan_display.clear()
             # Cancel and clear activity timers
-            try:
-                for t in list(self._activity_timers.values()):
-                    try:
-                        t.cancel()
-                    except Exception:
-                        pass
-            finally:
+            with self._activity_lock:
+                for t in self._activity_timers.values():
+                    t.cancel()
                 self._activity_timers.clear()
                 self._activity.clear()
             # Do not clear nick; keep for PM routing until next connect
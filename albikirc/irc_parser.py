@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+_TAG_ESCAPES = {":": ";", "s": " ", "\\": "\\", "r": "\r", "n": "\n"}
+
+
+def _unescape_tag_value(value: str) -> str:
+    if "\\" not in value:
+        return value
+    out: list[str] = []
+    i = 0
+    n = len(value)
+    while i < n:
+        ch = value[i]
+        if ch == "\\":
+            i += 1
+            if i < n:
+                nxt = value[i]
+                out.append(_TAG_ESCAPES.get(nxt, nxt))
+            # A lone trailing backslash is dropped
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def parse_tags(raw: str) -> dict[str, str]:
+    """Parse an IRCv3 tag string (without the leading '@') into a dict."""
+    tags: dict[str, str] = {}
+    for item in raw.split(";"):
+        if not item:
+            continue
+        key, sep, value = item.partition("=")
+        tags[key] = _unescape_tag_value(value) if sep else ""
+    return tags
+
+
+class Message:
+    """A parsed IRC protocol line.
+
+    ``params`` includes the trailing parameter as its last element. Tags are
+    kept as the raw string until ``tags`` is first read.
+    """
+
+    __slots__ = ("raw_tags", "_tags", "source", "nick", "user", "host", "command", "params")
+
+    def __init__(
+        self,
+        command: str,
+        params: list[str],
+        source: str | None = None,
+        raw_tags: str | None = None,
+    ):
+        self.command = command
+        self.params = params
+        self.source = source
+        self.raw_tags = raw_tags
+        self._tags: dict[str, str] | None = None
+        nick = user = host = None
+        if source:
+            nick, sep, host = source.partition("@")
+            if not sep:
+                host = None
+            nick, sep, user = nick.partition("!")
+            if not sep:
+                user = None
+        self.nick: str | None = nick
+        self.user: str | None = user
+        self.host: str | None = host
+
+    @property
+    def tags(self) -> dict[str, str]:
+        if self._tags is None:
+            self._tags = parse_tags(self.raw_tags) if self.raw_tags else {}
+        return self._tags
+
+    def param(self, index: int, default: str = "") -> str:
+        params = self.params
+        return params[index] if -len(params) <= index < len(params) else default
+
+    def __repr__(self) -> str:
+        return f"Message(command={self.command!r}, params={self.params!r}, source={self.source!r})"
+
+
+def parse_line(line: str) -> Message | None:
+    """Parse one line (without CRLF). Returns None for empty or malformed lines."""
+    pos = 0
+    raw_tags = None
+    if line.startswith("@"):
+        sp = line.find(" ")
+        if sp < 0:
+            return None
+        raw_tags = line[1:sp]
+        pos = sp + 1
+    source = None
+    if line.startswith(":", pos):
+        sp = line.find(" ", pos)
+        if sp < 0:
+            return None
+        source = line[pos + 1:sp]
+        pos = sp + 1
+    trailing_at = line.find(" :", pos)
+    if trailing_at >= 0:
+        params = line[pos:trailing_at].split()
+        if not params:
+            return None
+        params.append(line[trailing_at + 2:])
+    else:
+        params = line[pos:].split()
+        if not params:
+            return None
+    command = params.pop(0).upper()
+    return Message(command, params, source, raw_tags)
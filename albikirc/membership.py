@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Iterable
+
+
+def nick_key(nick: str) -> str:
+    """Case-insensitive sort/lookup key for a nickname."""
+    return nick.lower()
+
+
+class ChannelMembers:
+    """Channel membership kept in sorted order as it changes.
+
+    Nicks are ordered by `nick_key`. Adding or removing one member is a
+    binary search plus a single list insert/delete, so it never re-sorts or
+    copies the whole channel. Channel status prefixes (e.g. "@", "+") are
+    tracked per member, highest rank first.
+    """
+
+    __slots__ = ("_keys", "_nicks", "_prefixes")
+
+    def __init__(self, nicks: Iterable[str] = (), prefixes: dict[str, str] | None = None):
+        self._keys: list[str] = []
+        self._nicks: dict[str, str] = {}
+        self._prefixes: dict[str, str] = {}
+        self.replace(nicks, prefixes)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, nick: str) -> bool:
+        return nick_key(nick) in self._nicks
+
+    def replace(self, nicks: Iterable[str], prefixes: dict[str, str] | None = None):
+        self._nicks = {nick_key(n): n for n in nicks if n}
+        self._keys = sorted(self._nicks)
+        self._prefixes = {nick_key(n): p for n, p in (prefixes or {}).items()
+                          if p and nick_key(n) in self._nicks}
+
+    def prefix(self, nick: str) -> str:
+        return self._prefixes.get(nick_key(nick), "")
+
+    def set_prefix(self, nick: str, prefixes: str):
+        key = nick_key(nick)
+        if key not in self._nicks:
+            return
+        if prefixes:
+            self._prefixes[key] = prefixes
+        else:
+            self._prefixes.pop(key, None)
+
+    def get(self, nick: str) -> str | None:
+        return self._nicks.get(nick_key(nick))
+
+    def add(self, nick: str) -> bool:
+        """Insert `nick`; returns False if it was already present."""
+        key = nick_key(nick)
+        if key in self._nicks:
+            self._nicks[key] = nick
+            return False
+        self._keys.insert(bisect_left(self._keys, key), key)
+        self._nicks[key] = nick
+        return True
+
+    def discard(self, nick: str) -> str | None:
+        """Remove `nick`; returns the stored spelling, or None if absent."""
+        key = nick_key(nick)
+        stored = self._nicks.pop(key, None)
+        if stored is not None:
+            keys = self._keys
+            del keys[bisect_left(keys, key)]
+            self._prefixes.pop(key, None)
+        return stored
+
+    def rename(self, old: str, new: str) -> str | None:
+        """Rename `old` to `new`; returns the old stored spelling, or None if absent."""
+        prefixes = self.prefix(old)
+        stored = self.discard(old)
+        if stored is not None:
+            self.add(new)
+            if prefixes:
+                self._prefixes[nick_key(new)] = prefixes
+        return stored
+
+    def prefixes(self) -> dict[str, str]:
+        """Status prefixes keyed by stored nick (members without one are omitted)."""
+        nicks = self._nicks
+        return {nicks[k]: p for k, p in self._prefixes.items()}
+
+    def sorted_nicks(self) -> list[str]:
+        nicks = self._nicks
+        return [nicks[k] for k in self._keys]
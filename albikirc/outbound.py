@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+
+class TokenBucket:
+    """Flood-control bucket: `burst` lines at once, refilled at `rate` lines/second."""
+
+    def __init__(self, burst: int = 5, rate: float = 0.5):
+        self.capacity = float(max(1, int(burst)))
+        self.rate = max(0.01, float(rate))
+        self.tokens = self.capacity
+        self._last = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def delay(self) -> float:
+        """Seconds until one token is available (0 if one is available now)."""
+        self._refill()
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def consume(self):
+        self._refill()
+        # Priority lines may push the bucket below zero, which delays normal traffic
+        self.tokens -= 1.0
+
+
+class OutboundQueue:
+    """Per-connection send queue drained by a dedicated writer thread.
+
+    Callers never touch the socket: `put` appends and returns immediately.
+    Priority lines (PONG, QUIT, CAP...) jump the queue and are sent without
+    waiting for a token; everything else is paced by the token bucket.
+    """
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        *,
+        burst: int = 5,
+        rate: float = 0.5,
+        on_error: Callable[[Exception], None] | None = None,
+        name: str = "irc-writer",
+    ):
+        self._sock = sock
+        self._bucket = TokenBucket(burst, rate)
+        self._on_error = on_error
+        self._cond = threading.Condition()
+        self._priority: deque[bytes] = deque()
+        self._normal: deque[bytes] = deque()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, data: bytes, priority: bool = False):
+        with self._cond:
+            if self._closing:
+                return
+            (self._priority if priority else self._normal).append(data)
+            self._cond.notify()
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._priority) + len(self._normal)
+
+    def close(self, timeout: float = 1.0):
+        """Stop the writer after flushing queued priority lines; normal lines are dropped."""
+        with self._cond:
+            self._closing = True
+            self._normal.clear()
+            self._cond.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+    def _next(self) -> bytes | None:
+        # Called with self._cond held
+        while True:
+            if self._priority:
+                self._bucket.consume()
+                return self._priority.popleft()
+            if self._closing:
+                return None
+            if self._normal:
+                wait = self._bucket.delay()
+                if wait <= 0:
+                    self._bucket.consume()
+                    return self._normal.popleft()
+                self._cond.wait(wait)
+            else:
+                self._cond.wait()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                data = self._next()
+            if data is None:
+                return
+            try:
+                self._sock.sendall(data)
+            except Exception as e:
+                with self._cond:
+                    self._closing = True
+                    self._priority.clear()
+                    self._normal.clear()
+                if self._on_error:
+                    self._on_error(e)
+                return
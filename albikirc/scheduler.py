@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from typing import Any, Callable
+
+
+class TimerHandle:
+    """A scheduled callback returned by `Scheduler.call_later`."""
+
+    __slots__ = ("when", "callback", "args", "_seq", "_pending", "_scheduler")
+
+    def __init__(self, scheduler: Scheduler, callback: Callable[..., Any], args: tuple):
+        self._scheduler = scheduler
+        self.callback = callback
+        self.args = args
+        self.when = 0.0
+        self._seq = -1
+        self._pending = False
+
+    @property
+    def pending(self) -> bool:
+        return self._pending
+
+    def cancel(self) -> bool:
+        return self._scheduler.cancel(self)
+
+    def reschedule(self, delay: float) -> TimerHandle:
+        return self._scheduler.reschedule(self, delay)
+
+
+class Scheduler:
+    """Run timed callbacks from one daemon thread, ordered by a heap.
+
+    Cancelling or rescheduling leaves the old heap entry in place and marks it
+    stale, so both are O(log n). Callbacks run on the scheduler thread and
+    should be short; anything slow should hand off to another thread.
+
+    A callback that raises is counted in `errors` and its traceback kept in
+    `last_error`; `on_error(callback, exc)` is then called, if set.
+    """
+
+    def __init__(self, name: str = "albikirc-scheduler",
+                 on_error: Callable[[Callable[..., Any], Exception], None] | None = None):
+        self._name = name
+        self.on_error = on_error
+        self.errors = 0
+        self.last_error: str | None = None
+        self._cond = threading.Condition()
+        self._heap: list[tuple[float, int, TimerHandle]] = []
+        self._counter = itertools.count()
+        self._live = 0
+        self._thread: threading.Thread | None = None
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> TimerHandle:
+        handle = TimerHandle(self, callback, args)
+        with self._cond:
+            self._push(handle, time.monotonic() + max(0.0, float(delay)))
+        return handle
+
+    def reschedule(self, handle: TimerHandle, delay: float) -> TimerHandle:
+        """Move `handle` to fire `delay` seconds from now (re-arming it if it already ran)."""
+        with self._cond:
+            self._push(handle, time.monotonic() + max(0.0, float(delay)))
+        return handle
+
+    def cancel(self, handle: TimerHandle) -> bool:
+        with self._cond:
+            if not handle._pending:
+                return False
+            handle._pending = False
+            handle._seq = -1
+            self._live -= 1
+            return True
+
+    def cancel_all(self):
+        with self._cond:
+            for _, _, handle in self._heap:
+                handle._pending = False
+                handle._seq = -1
+            self._heap.clear()
+            self._live = 0
+
+    def pending(self) -> int:
+        """Number of timers that are scheduled and not yet run or cancelled."""
+        with self._cond:
+            return self._live
+
+    # Internals (call with self._cond held)
+    def _push(self, handle: TimerHandle, when: float):
+        if not handle._pending:
+            handle._pending = True
+            self._live += 1
+        seq = next(self._counter)
+        handle.when = when
+        handle._seq = seq
+        heapq.heappush(self._heap, (when, seq, handle))
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+        self._cond.notify()
+
+    def _next_due(self) -> TimerHandle:
+        heap = self._heap
+        while True:
+            while heap and heap[0][2]._seq != heap[0][1]:
+                heapq.heappop(heap)  # cancelled or rescheduled entry
+            if not heap:
+                self._cond.wait()
+                continue
+            when, _, handle = heap[0]
+            delay = when - time.monotonic()
+            if delay > 0:
+                self._cond.wait(delay)
+                continue
+            heapq.heappop(heap)
+            handle._pending = False
+            handle._seq = -1
+            self._live -= 1
+            return handle
+
+    def _run(self):
+        while True:
+            with self._cond:
+                handle = self._next_due()
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = traceback.format_exc()
+                on_error = self.on_error
+                if on_error is not None:
+                    try:
+                        on_error(handle.callback, e)
+                    except Exception:
+                        pass
@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import unquote
+
+from .chatlog import COMPRESSORS, LOG_SUFFIX, parse_line
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lines (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    network TEXT NOT NULL,
+    target TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lines_target_ts ON lines(target, ts);
+CREATE INDEX IF NOT EXISTS lines_sender ON lines(sender COLLATE NOCASE);
+CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(
+    text, content='lines', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS lines_ai AFTER INSERT ON lines BEGIN
+    INSERT INTO lines_fts(rowid, text) VALUES (new.id, new.text);
+END;
+-- Bytes of each day's plain log text already indexed; gz_size marks a compressed day as done
+CREATE TABLE IF NOT EXISTS progress (
+    day_key TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    gz_size INTEGER
+);
+"""
+
+# safe_name() of the Console tab; it holds local output only and is never indexed
+_CONSOLE = "console"
+
+_TERM = re.compile(r'"[^"]*"|\S+')
+
+
+class SearchHit(NamedTuple):
+    id: int
+    ts: float
+    network: str
+    target: str
+    sender: str
+    kind: str
+    text: str
+    snippet: str
+    score: float
+
+
+def fts5_available() -> bool:
+    try:
+        conn = sqlite3.connect(":memory:")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        finally:
+            conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def match_expression(terms: str) -> str:
+    """Turn user input into a safe FTS5 query.
+
+    Words are ANDed; "quoted phrases" stay phrases and a trailing `*`
+    makes a prefix search. FTS5 operators in the input are treated as
+    plain words, so no input can cause a syntax error.
+    """
+    parts = []
+    for tok in _TERM.findall(terms or ""):
+        prefix = tok.endswith("*") and len(tok) > 1
+        word = tok[:-1] if prefix else tok
+        word = word.strip('"')
+        if not word:
+            continue
+        quoted = '"' + word.replace('"', '""') + '"'
+        parts.append(quoted + ("*" if prefix else ""))
+    return " ".join(parts)
+
+
+class SearchIndex:
+    """Full-text index of the chat logs in an SQLite FTS5 database.
+
+    A background thread reads each daily log from where it last stopped
+    and adds new lines in small transactions, pausing between them so it
+    stays out of the way of the rest of the app. `notify()` (hooked to the
+    log writer) marks a file as changed. Logs that existed before the index
+    are swept on start, so old history becomes searchable incrementally.
+
+    `search()` may be called from any thread; each thread gets its own
+    read connection, and WAL mode lets reads run while the indexer writes.
+    """
+
+    def __init__(self, db_path: Path, log_root: Path, *, batch_lines: int = 2000,
+                 pause: float = 0.02, name: str = "albikirc-index"):
+        self.db_path = Path(db_path)
+        self.log_root = Path(log_root)
+        self.batch_lines = max(1, int(batch_lines))
+        self.pause = max(0.0, float(pause))
+        self.name = name
+        self.indexed = 0
+        self.last_error: str | None = None
+        self._dirty: set[Path] = set()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # Indexer thread
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def notify(self, network: str, target: str, path: Path):
+        """A log file has grown; index it soon. Cheap enough to call from the log writer thread."""
+        if Path(path).parent.name == _CONSOLE:
+            return
+        with self._cond:
+            self._dirty.add(Path(path))
+            self._cond.notify()
+
+    def close(self, timeout: float = 2.0):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _run(self):
+        try:
+            self._sweep()
+        except Exception as e:
+            self.last_error = str(e)
+        while True:
+            with self._cond:
+                while not self._dirty and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    break
+                paths = sorted(self._dirty)
+                self._dirty.clear()
+            for path in paths:
+                try:
+                    self._index_file(path)
+                except Exception as e:
+                    self.last_error = f"{path}: {e}"
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _sweep(self):
+        # Oldest first, so history fills in chronologically
+        files = []
+        for dirpath, _, filenames in os.walk(self.log_root):
+            if os.path.basename(dirpath) == _CONSOLE:
+                continue
+            for fn in filenames:
+                if LOG_SUFFIX in fn and not fn.endswith(".tmp"):
+                    files.append(Path(dirpath) / fn)
+        files.sort(key=lambda p: p.name)
+        for path in files:
+            if self._stopping:
+                return
+            try:
+                self._index_file(path)
+            except Exception as e:
+                # e.g. the file was compressed away meanwhile; the next notify or start retries it
+                self.last_error = f"{path}: {e}"
+
+    def _day_key(self, path: Path) -> tuple[str, str, str]:
+        # logs/<network>/<target>/<day>.log[.gz] -> (network dir, target dir, day)
+        return path.parent.parent.name, path.parent.name, path.name.partition(LOG_SUFFIX)[0]
+
+    def _index_file(self, path: Path):
+        net_dir, tgt_dir, day = self._day_key(path)
+        key = f"{net_dir}/{tgt_dir}/{day}"
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT offset, gz_size FROM progress WHERE day_key = ?", (key,),
+        ).fetchone()
+        offset, gz_size = row if row else (0, None)
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return
+        if path.name.endswith(LOG_SUFFIX):
+            suffixes = [suffix for suffix, _ in COMPRESSORS.values()]
+            if any(path.with_name(path.name + suffix).exists() for suffix in suffixes):
+                # Late lines for a compressed day; they are indexed once merged into it
+                return
+            if size <= offset:
+                return
+            with open(path, "rb") as fh:
+                fh.seek(offset)
+                data = fh.read(size - offset)
+            base = offset
+            new_gz = None
+        else:
+            if gz_size == size:
+                return
+            opener = next((op for suffix, op in COMPRESSORS.values()
+                           if path.name.endswith(suffix)), None)
+            if opener is None:
+                return
+            with opener(path, "rb") as fh:
+                data = fh.read()
+            data = data[offset:]
+            base = offset
+            new_gz = size
+        # Only whole lines; a partial last line is picked up next time
+        end = data.rfind(b"\n") + 1
+        network, target = unquote(net_dir), unquote(tgt_dir)
+        pos = 0
+        while True:
+            if self._stopping:
+                return
+            rows: list[tuple[float, str, str, str, str, str]] = []
+            chunk_end = pos
+            while chunk_end < end and len(rows) < self.batch_lines:
+                nl = data.index(b"\n", chunk_end)
+                parsed = parse_line(data[chunk_end:nl].decode("utf-8", "replace"))
+                chunk_end = nl + 1
+                if parsed is not None:
+                    ts, sender, text, kind = parsed
+                    rows.append((ts, network, target, sender, kind, text))
+            done = chunk_end >= end
+            with conn:
+                if rows:
+                    conn.executemany(
+                        "INSERT INTO lines(ts, network, target, sender, kind, text) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", rows,
+                    )
+                conn.execute(
+                    "INSERT OR REPLACE INTO progress(day_key, offset, gz_size) VALUES (?, ?, ?)",
+                    (key, base + chunk_end, new_gz if done else gz_size),
+                )
+            self.indexed += len(rows)
+            pos = chunk_end
+            if done:
+                return
+            if self.pause:
+                time.sleep(self.pause)
+
+    # Queries
+    def search(self, terms: str, *, target: str | None = None, sender: str | None = None,
+               network: str | None = None, since: float | None = None, until: float | None = None,
+               limit: int = 200) -> list[SearchHit]:
+        """Best matches first (bm25); with no terms, the newest lines matching the filters."""
+        # Console logs from older versions held local output only (status lines, /rawlog dumps)
+        where: list[str] = [f"l.target != '{_CONSOLE}'"]
+        args: list = []
+        if target:
+            where.append("l.target = ?")
+            args.append(target.lower())
+        if sender:
+            where.append("l.sender = ? COLLATE NOCASE")
+            args.append(sender)
+        if network:
+            where.append("l.network = ?")
+            args.append(network.lower())
+        if since is not None:
+            where.append("l.ts >= ?")
+            args.append(since)
+        if until is not None:
+            where.append("l.ts < ?")
+            args.append(until)
+        expr = match_expression(terms)
+        if expr:
+            sql = ("SELECT l.id, l.ts, l.network, l.target, l.sender, l.kind, l.text, "
+                   "snippet(lines_fts, 0, '[', ']', '…', 16), bm25(lines_fts) AS score "
+                   "FROM lines_fts JOIN lines l ON l.id = lines_fts.rowid "
+                   "WHERE lines_fts MATCH ? AND ")
+            args.insert(0, expr)
+            sql += " AND ".join(where) + " ORDER BY score, l.ts DESC LIMIT ?"
+        else:
+            sql = ("SELECT l.id, l.ts, l.network, l.target, l.sender, l.kind, l.text, l.text, 0.0 "
+                   "FROM lines l WHERE " + " AND ".join(where) + " ORDER BY l.ts DESC LIMIT ?")
+        args.append(max(1, int(limit)))
+        rows = self._connect().execute(sql, args).fetchall()
+        return [SearchHit(*row) for row in rows]
+
+    def context(self, hit_id: int, before: int = 5, after: int = 5) -> list[SearchHit]:
+        """Lines around a hit in the same network and target, oldest first."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT network, target, ts FROM lines WHERE id = ?", (hit_id,),
+        ).fetchone()
+        if row is None:
+            return []
+        network, target, ts = row
+        cols = "id, ts, network, target, sender, kind, text, text, 0.0"
+        older = conn.execute(
+            f"SELECT {cols} FROM lines WHERE target = ? AND network = ? "
+            "AND (ts < ? OR (ts = ? AND id < ?)) ORDER BY ts DESC, id DESC LIMIT ?",
+            (target, network, ts, ts, hit_id, before),
+        ).fetchall()
+        newer = conn.execute(
+            f"SELECT {cols} FROM lines WHERE target = ? AND network = ? "
+            "AND (ts > ? OR (ts = ? AND id >= ?)) ORDER BY ts, id LIMIT ?",
+            (target, network, ts, ts, hit_id, after + 1),
+        ).fetchall()
+        return [SearchHit(*r) for r in reversed(older)] + [SearchHit(*r) for r in newer]
+
+
+def parse_date(value: str, end: bool = False) -> float | None:
+    """Local midnight of a YYYY-MM-DD date (the following midnight when `end`), or None."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        ts = time.mktime(time.strptime(value, "%Y-%m-%d"))
+    except (ValueError, OverflowError):
+        return None
+    if end:
+        # Add a day via the calendar so DST changes do not shift the boundary
+        t = time.localtime(ts + 36 * 3600)
+        ts = time.mktime((t.tm_year, t.tm_mon, t.tm_mday, 0, 0, 0, 0, 0, -1))
+    return ts
+
+
+def parse_query(text: str) -> dict[str, str]:
+    """Split `/search` input into terms and filters.
+
+    `#chan` or `in:<target>` picks a channel or query, `from:<nick>` a
+    sender, `since:`/`until:` take YYYY-MM-DD dates; the rest are terms.
+    """
+    out = {"terms": "", "target": "", "sender": "", "since": "", "until": ""}
+    terms = []
+    for tok in _TERM.findall(text or ""):
+        low = tok.lower()
+        if low.startswith("in:") and len(tok) > 3:
+            out["target"] = tok[3:]
+        elif low.startswith("from:") and len(tok) > 5:
+            out["sender"] = tok[5:]
+        elif low.startswith("since:"):
+            out["since"] = tok[6:]
+        elif low.startswith("until:"):
+            out["until"] = tok[6:]
+        elif tok[:1] in "#&" and len(tok) > 1 and not out["target"]:
+            out["target"] = tok
+        else:
+            terms.append(tok)
+    out["terms"] = " ".join(terms)
+    return out
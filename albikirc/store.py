@@ -0,0 +1,428 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from typing import Iterable, Iterator, NamedTuple
+
+from .classify import (
+    KIND_ACTION,
+    KIND_ACTIVITY,
+    KIND_CHANNEL,
+    KIND_NOTICE,
+    KIND_PRIVATE,
+    KIND_STATUS,
+)
+
+# Kind codes stored per message (one byte each); the index is the code
+KINDS = (KIND_STATUS, KIND_CHANNEL, KIND_PRIVATE, KIND_NOTICE, KIND_ACTION, KIND_ACTIVITY)
+_KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+# Approximate resident cost of one message besides its text: a double, a
+# uint32 and a byte in the column arrays plus one list slot for the text.
+_ENTRY_OVERHEAD = 8 + 4 + 1 + 8
+
+DEFAULT_MEMORY_BUDGET = 32 * 1024 * 1024
+
+
+class StoredMessage(NamedTuple):
+    ts: float
+    sender: str
+    kind: str
+    text: str
+
+
+class _History:
+    """Messages for one target, oldest first.
+
+    The first `spilled` messages live in the spill file; `offsets[i]` is the
+    byte offset of spilled message `i` and `spill_end` the end of the last
+    one. The rest are resident in parallel
+    column arrays. `spilling` is set while a spill of this history is queued
+    or being written.
+    """
+
+    __slots__ = ("key", "times", "senders", "kinds", "texts", "nbytes", "spilled", "offsets",
+                 "spill_end", "path", "spilling")
+
+    def __init__(self, key: tuple[int, str]):
+        self.key = key
+        self.times = array("d")
+        self.senders = array("I")
+        self.kinds = array("B")
+        self.texts: list[str] = []
+        self.nbytes = 0
+        self.spilled = 0
+        self.offsets = array("q")
+        self.spill_end = 0
+        self.path: str | None = None
+        self.spilling = False
+
+    def __len__(self) -> int:
+        return self.spilled + len(self.texts)
+
+
+class MessageStore:
+    """Per-connection, per-target message history, independent of any UI.
+
+    Each target's messages are kept column-wise: timestamps, interned sender
+    ids and kind codes in typed arrays, plus a list of text references, so a
+    message costs a few bytes beyond its text and no object of its own.
+
+    Resident memory is bounded by `memory_budget` bytes across all targets.
+    When it is exceeded, the oldest half of the least recently used targets'
+    histories is handed to a spill thread, which writes it to a spill file
+    without holding the store lock; only then is it dropped from memory, so
+    appends never wait on the disk. Reads that reach into spilled ranges load
+    them back from disk transparently, also outside the lock: the spill file
+    is append-only, so the byte range noted under the lock stays valid. The newest `min_resident`
+    messages of every target always stay in memory. Spill files are private
+    to this store and removed by `close()`.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET, *, spill_dir: str | None = None,
+                 min_resident: int = 200):
+        self.memory_budget = max(0, int(memory_budget))
+        self.min_resident = max(0, int(min_resident))
+        self._spill_root = spill_dir
+        self._spill_dir: str | None = None
+        self._lock = threading.Lock()
+        # Least recently used first
+        self._histories: OrderedDict[tuple[int, str], _History] = OrderedDict()
+        self._sender_names: list[str] = []
+        self._sender_ids: dict[str, int] = {}
+        self._resident = 0
+        # Spills waiting for the spill thread, and the bytes they will free
+        self._jobs: deque[tuple] = deque()
+        self._jobs_cond = threading.Condition(self._lock)
+        self._pending_free = 0
+        # Do not plan spills again until resident use passes this (set when nothing was spillable)
+        self._evict_floor = 0
+        self._spiller: threading.Thread | None = None
+        self._closing = False
+
+    @staticmethod
+    def _key(conn_id: int, target: str) -> tuple[int, str]:
+        return (conn_id, target.lower())
+
+    def _intern(self, sender: str) -> int:
+        sid = self._sender_ids.get(sender)
+        if sid is None:
+            sid = len(self._sender_names)
+            sender = sys.intern(sender)
+            self._sender_names.append(sender)
+            self._sender_ids[sender] = sid
+        return sid
+
+    def _history(self, conn_id: int, target: str) -> _History:
+        # Created on first use; either way it becomes the most recently used
+        key = self._key(conn_id, target)
+        hist = self._histories.get(key)
+        if hist is None:
+            hist = self._histories[key] = _History(key)
+        else:
+            self._histories.move_to_end(key)
+        return hist
+
+    def _existing(self, conn_id: int, target: str) -> _History | None:
+        key = self._key(conn_id, target)
+        hist = self._histories.get(key)
+        if hist is not None:
+            self._histories.move_to_end(key)
+        return hist
+
+    # Writing
+    def append(self, conn_id: int, target: str, sender: str, text: str, kind: str = KIND_STATUS,
+               ts: float | None = None) -> int:
+        """Record one message; returns its index within the target's history."""
+        return self.extend(conn_id, target, [(ts, sender, text, kind)])
+
+    def extend(self, conn_id: int, target: str,
+               entries: Iterable[tuple[float | None, str, str, str]]) -> int:
+        """Record `(ts, sender, text, kind)` entries; returns the index of the last one.
+
+        A `ts` of None means now.
+        """
+        now = time.time()
+        with self._lock:
+            hist = self._history(conn_id, target)
+            times, senders, kinds, texts = hist.times, hist.senders, hist.kinds, hist.texts
+            added = 0
+            for ts, sender, text, kind in entries:
+                times.append(now if ts is None else ts)
+                senders.append(self._intern(sender))
+                kinds.append(_KIND_CODES.get(kind, 0))
+                texts.append(text)
+                added += _ENTRY_OVERHEAD + sys.getsizeof(text)
+            hist.nbytes += added
+            self._resident += added
+            over = self._resident - self._pending_free > self.memory_budget
+            if over and self._resident >= self._evict_floor:
+                self._evict()
+            return len(hist) - 1
+
+    # Reading
+    def count(self, conn_id: int, target: str) -> int:
+        with self._lock:
+            hist = self._histories.get(self._key(conn_id, target))
+            return len(hist) if hist is not None else 0
+
+    def targets(self, conn_id: int | None = None) -> list[tuple[int, str]]:
+        """`(conn_id, lowercased target)` keys with stored history."""
+        with self._lock:
+            return [k for k in self._histories if conn_id is None or k[0] == conn_id]
+
+    def slice(self, conn_id: int, target: str, start: int = 0,
+              stop: int | None = None) -> list[StoredMessage]:
+        """Messages `start` to `stop` (exclusive) of a target, oldest first."""
+        spill = None
+        with self._lock:
+            hist = self._existing(conn_id, target)
+            if hist is None:
+                return []
+            total = len(hist)
+            start, stop, _ = slice(start, stop).indices(total)
+            if start >= stop:
+                return []
+            if start < hist.spilled:
+                # Note the byte range now; the file is read after the lock is released
+                spilled_stop = min(stop, hist.spilled)
+                end = hist.offsets[spilled_stop] if spilled_stop < hist.spilled else hist.spill_end
+                spill = (hist.path, hist.offsets[start], end)
+            first = max(start, hist.spilled) - hist.spilled
+            last = stop - hist.spilled
+            resident: list[StoredMessage] = []
+            if first < last:
+                names = self._sender_names
+                resident = [
+                    StoredMessage(hist.times[i], names[hist.senders[i]], KINDS[hist.kinds[i]],
+                                  hist.texts[i])
+                    for i in range(first, last)
+                ]
+        if spill is None:
+            return resident
+        return self._read_spilled(*spill) + resident
+
+    def tail(self, conn_id: int, target: str, n: int) -> list[StoredMessage]:
+        """The newest `n` messages of a target, oldest first."""
+        if n <= 0:
+            return []
+        return self.slice(conn_id, target, -n)
+
+    def iter_messages(self, conn_id: int, target: str,
+                      chunk: int = 1000) -> Iterator[StoredMessage]:
+        """Walk a target's whole history in chunks, without holding the lock between them."""
+        i = 0
+        while True:
+            batch = self.slice(conn_id, target, i, i + chunk)
+            if not batch:
+                return
+            yield from batch
+            i += len(batch)
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held in memory across all targets."""
+        with self._lock:
+            return self._resident
+
+    # Removal
+    def discard(self, conn_id: int, target: str):
+        """Forget a target's history, including anything spilled to disk."""
+        with self._lock:
+            hist = self._histories.pop(self._key(conn_id, target), None)
+            if hist is not None:
+                self._resident -= hist.nbytes
+                self._evict_floor = 0
+                self._remove_spill(hist)
+
+    def close(self):
+        with self._lock:
+            self._closing = True
+            self._jobs.clear()
+            self._jobs_cond.notify_all()
+            spiller, self._spiller = self._spiller, None
+        if spiller is not None:
+            spiller.join(5)
+        with self._lock:
+            self._histories.clear()
+            self._resident = 0
+            self._pending_free = 0
+            if self._spill_dir:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+                self._spill_dir = None
+
+    # Spilling
+    def _evict(self):
+        # Called with the lock held. Queue spills of least recently used targets
+        # until the bytes they will free bring resident use below 90% of the
+        # budget; the spill thread does the writing.
+        if self._closing:
+            return
+        need = self._resident - self._pending_free - self.memory_budget * 9 // 10
+        names = self._sender_names
+        for hist in self._histories.values():
+            if need <= 0:
+                break
+            if hist.spilling:
+                continue
+            n = len(hist.texts) - self.min_resident
+            if n <= 0:
+                continue
+            # Spill in large chunks so a busy target is not rewritten on every append
+            n = max(n // 2, min(n, 1000))
+            texts = hist.texts[:n]
+            freed = n * _ENTRY_OVERHEAD + sum(map(sys.getsizeof, texts))
+            senders = [names[i] for i in hist.senders[:n]]
+            rows = list(zip(hist.times[:n], senders, hist.kinds[:n], texts))
+            hist.spilling = True
+            self._pending_free += freed
+            need -= freed
+            self._jobs.append((hist, hist.path, n, freed, rows))
+        if need > 0:
+            # Everything spillable is already queued or resident by rule; wait for real growth
+            self._evict_floor = self._resident + max(1, self.memory_budget // 10)
+        if self._jobs:
+            if self._spiller is None:
+                self._spiller = threading.Thread(
+                    target=self._spill_loop, name="albikirc-store-spill", daemon=True,
+                )
+                self._spiller.start()
+            self._jobs_cond.notify()
+
+    def _spill_loop(self):
+        while True:
+            with self._lock:
+                while not self._jobs and not self._closing:
+                    self._jobs_cond.wait()
+                if self._closing:
+                    return
+                hist, path, n, freed, rows = self._jobs.popleft()
+            try:
+                path, offsets, spill_end = self._write_spill(path, rows)
+            except OSError:
+                offsets, spill_end = None, 0
+            with self._lock:
+                self._commit_spill(hist, path, n, freed, offsets, spill_end)
+
+    def _write_spill(self, path: str | None, rows) -> tuple[str, list[int], int]:
+        # Runs on the spill thread without the lock; it is the only writer of spill files
+        if path is None:
+            if self._spill_dir is None:
+                if self._spill_root:
+                    os.makedirs(self._spill_root, exist_ok=True)
+                self._spill_dir = tempfile.mkdtemp(prefix="albikirc-store-", dir=self._spill_root)
+            fd, path = tempfile.mkstemp(suffix=".spill", dir=self._spill_dir)
+            os.close(fd)
+        offsets = []
+        with open(path, "ab") as f:
+            pos = f.tell()
+            chunks = []
+            for row in rows:
+                record = json.dumps(row, ensure_ascii=False).encode("utf-8") + b"\n"
+                offsets.append(pos)
+                pos += len(record)
+                chunks.append(record)
+            f.write(b"".join(chunks))
+        return path, offsets, pos
+
+    def _commit_spill(self, hist: _History, path: str | None, n: int, freed: int,
+                      offsets: list[int] | None, spill_end: int):
+        # Called with the lock held: drop the written rows from memory
+        hist.spilling = False
+        self._pending_free -= freed
+        self._evict_floor = 0
+        if self._histories.get(hist.key) is not hist:
+            # Discarded while the spill was being written
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return
+        if offsets is None:
+            # Writing failed; leave the rows resident and do not retry until use grows further
+            self._evict_floor = self._resident + max(1, self.memory_budget // 10)
+            return
+        hist.path = path
+        hist.offsets.extend(offsets)
+        hist.spill_end = spill_end
+        del hist.times[:n]
+        del hist.senders[:n]
+        del hist.kinds[:n]
+        del hist.texts[:n]
+        hist.spilled += n
+        hist.nbytes -= freed
+        self._resident -= freed
+        if self._resident - self._pending_free > self.memory_budget:
+            # Appends outran the spill; keep going without waiting for the next one
+            self._evict()
+
+    @staticmethod
+    def _read_spilled(path: str | None, begin: int, end: int) -> list[StoredMessage]:
+        # Runs without the lock; the file may vanish if the target is discarded meanwhile
+        out: list[StoredMessage] = []
+        try:
+            with open(path, "rb") as f:  # type: ignore[arg-type]
+                f.seek(begin)
+                data = f.read(end - begin)
+        except (OSError, TypeError):
+            return out
+        for raw in data.splitlines():
+            try:
+                ts, sender, code, text = json.loads(raw)
+                kind = KINDS[code] if 0 <= code < len(KINDS) else KIND_STATUS
+                out.append(StoredMessage(ts, sender, kind, text))
+            except (ValueError, TypeError):
+                continue
+        return out
+
+    def _remove_spill(self, hist: _History):
+        if hist.path:
+            try:
+                os.remove(hist.path)
+            except OSError:
+                pass
+            hist.path = None
+
+
+class HistoryView:
+    """A single target's history in a `MessageStore`, as seen by one tab.
+
+    `on_extend(target, entries)` is called with every batch recorded through
+    the view (used for logging).
+    """
+
+    __slots__ = ("store", "conn_id", "target", "on_extend")
+
+    def __init__(self, store: MessageStore, conn_id: int, target: str, on_extend=None):
+        self.store = store
+        self.conn_id = conn_id
+        self.target = target
+        self.on_extend = on_extend
+
+    def __len__(self) -> int:
+        return self.store.count(self.conn_id, self.target)
+
+    def extend(self, entries: Iterable[tuple[float | None, str, str, str]]) -> int:
+        entries = list(entries)
+        last = self.store.extend(self.conn_id, self.target, entries)
+        if self.on_extend is not None:
+            self.on_extend(self.target, entries)
+        return last
+
+    def slice(self, start: int = 0, stop: int | None = None) -> list[StoredMessage]:
+        return self.store.slice(self.conn_id, self.target, start, stop)
+
+    def tail(self, n: int) -> list[StoredMessage]:
+        return self.store.tail(self.conn_id, self.target, n)
+
+    def discard(self):
+        self.store.discard(self.conn_id, self.target)
@@ -1,15 +1,255 @@
+import itertools
+import time
 import wx
-from datetime import datetime
+from collections import deque
+
+from ..chatlog import LogCursor
+from ..classify import KIND_ACTIVITY, KIND_STATUS
+from ..membership import nick_key
+from .user_list import UserListCtrl
+
+DEFAULT_SCROLLBACK = 5000
+
+# Lines that do not count as unread in a hidden tab
+_QUIET_KINDS = (KIND_STATUS, KIND_ACTIVITY)
+
+_ts_minute = -1
+_ts_text = ""
+
+
+def _timestamp(ts: float | None = None) -> str:
+    """Local "[HH:MM] " prefix for `ts` (default now); calls within the same minute reuse it."""
+    global _ts_minute, _ts_text
+    now = time.time() if ts is None else ts
+    minute = int(now // 60)
+    if minute != _ts_minute:
+        _ts_text = time.strftime("[%H:%M] ", time.localtime(now))
+        _ts_minute = minute
+    return _ts_text
+
+
+def format_entry(sender: str, text: str) -> str:
+    """Transcript text for a stored message (without the timestamp)."""
+    if not sender:
+        return text
+    if sender == "*":
+        return f"* {text}"
+    return f"{sender}: {text}"
 
 
 class ChatPanel(wx.Panel):
-    def __init__(self, parent, on_send=None):
+    """One conversation tab.
+
+    With `lazy=True` the panel starts as an empty page: messages only go to
+    its history and user list changes to a small dict model. The transcript,
+    input and user list are created by `ensure_ui()`, normally when the tab is
+    first selected, and then filled from the history in one edit.
+
+    A built tab that is not visible does no rendering either: messages only
+    bump `unread`/`highlighted` (reported through `on_unread`) and the user
+    list stops redrawing. `set_visible(True)` renders everything the history
+    gained meanwhile in a single batch.
+    """
+
+    def __init__(self, parent, on_send=None, history=None, on_user_activate=None,
+                 lazy: bool = False, title: str = "", on_unread=None):
         super().__init__(parent)
         self.on_send = on_send
+        self.on_user_activate = on_user_activate
+        self.on_unread = on_unread
+        self.title = title
+        # HistoryView backing this tab; the transcript shows its newest lines
+        self.history = history
+        # Number of history entries already rendered into the transcript
+        self._rendered = 0
+        # History index of the oldest history line on screen, and log-only lines loaded above it
+        self._top_index = 0
+        self._extra_top = 0
+        # Source of lines older than the history (a chatlog.LogCursor), used by load_older()
+        self.log_cursor: LogCursor | None = None
+        # Lines to show from log_cursor above the history when the widgets are first built
+        self.restore_lines = 0
+        self._visible = not lazy
+        self.unread = 0
+        self.highlighted = False
         self.show_timestamps: bool = True
         self._theme: str = "system"  # system|light|dark
+        # Lines currently in the transcript, oldest first; the control never holds more
+        # than scrollback_lines plus a small trim slack, so memory and append cost stay flat
+        self.scrollback_lines: int = DEFAULT_SCROLLBACK
+        self._lines: deque[str] = deque()
+        self._built = False
+        # Users while the widgets do not exist: (nick key -> nick, nick key -> prefixes, symbols)
+        self._pending_users: tuple[dict[str, str], dict[str, str], str | None] | None = None
+
+        if not lazy:
+            self.ensure_ui()
+
+    @property
+    def is_built(self) -> bool:
+        return self._built
+
+    def ensure_ui(self):
+        """Create the widgets if needed and show the history and users collected so far."""
+        if self._built:
+            return
+        self._built = True
+        self.Freeze()
+        try:
+            self._build_ui()
+            self.apply_theme(self._theme)
+            self._catch_up()
+            self._restore()
+            self.user_list.set_live(self._visible)
+            pending, self._pending_users = self._pending_users, None
+            if pending is not None:
+                nicks, prefixes, symbols = pending
+                self.user_list.set_users(list(nicks.values()), prefixes, symbols)
+            self.Layout()
+        finally:
+            self.Thaw()
+
+    @property
+    def is_visible(self) -> bool:
+        return self._visible
+
+    def set_visible(self, visible: bool):
+        """Mark the tab as on screen or hidden; becoming visible catches up and clears unread."""
+        visible = bool(visible)
+        if visible == self._visible:
+            return
+        self._visible = visible
+        if not visible:
+            if self._built:
+                self.user_list.set_live(False)
+            return
+        if not self._built:
+            self.ensure_ui()
+        else:
+            self._catch_up()
+            self.user_list.set_live(True)
+        if self.unread or self.highlighted:
+            self.unread = 0
+            self.highlighted = False
+            if callable(self.on_unread):
+                self.on_unread(self)
+
+    def reset(self, history=None, title: str = ""):
+        """Clear the tab for reuse as a different conversation."""
+        self.history = history
+        self.title = title
+        self._pending_users = None
+        self._rendered = 0
+        self._top_index = 0
+        self._extra_top = 0
+        self.log_cursor = None
+        self.restore_lines = 0
+        self._visible = False
+        self.unread = 0
+        self.highlighted = False
+        if not self._built:
+            return
+        self.user_list.set_live(False)
+        self.transcript.Clear()
+        self._lines.clear()
+        self.input.SetValue("")
+        self.user_filter.SetValue("")
+        self.user_list.set_users([])
+
+    def _catch_up(self):
+        """Render everything the history gained since the transcript was last updated."""
+        if self.history is None:
+            return
+        total = len(self.history)
+        # Only the newest scrollback_lines can be on screen; older ones stay in the store
+        start = max(self._rendered, total - self.scrollback_lines)
+        if start >= total:
+            return
+        if start > self._rendered and self._lines:
+            # The backlog alone fills the scrollback, so nothing currently shown would survive
+            self.transcript.Clear()
+            self._lines.clear()
+        self._rendered = total
+        msgs = self.history.slice(start, total)
+        self._append_lines([self._format_stored(m.ts, m.sender, m.text) for m in msgs], first=start)
+
+    def _format_stored(self, ts: float, sender: str, text: str) -> str:
+        line = format_entry(sender, text)
+        return _timestamp(ts) + line if self.show_timestamps else line
+
+    def _restore(self):
+        """Show the end of the log above the history, once, when the tab is first built.
+
+        Done here rather than when the tab opens so background tabs never read
+        (or decompress) their logs until someone looks at them.
+        """
+        n, self.restore_lines = self.restore_lines, 0
+        # With history beyond the scrollback, log lines are reached through load_older()
+        if n <= 0 or self.log_cursor is None or self._top_index > 0:
+            return
+        msgs = self.log_cursor.older(n)
+        if not msgs:
+            return
+        lines = [self._format_stored(ts, sender, text) for ts, sender, text, _ in msgs]
+        note = f"[log] Restored {len(msgs)} earlier line(s)"
+        lines.append(self._format_stored(time.time(), "", note))
+        self._extra_top += len(lines)
+        self._prepend_lines(lines)
+
+    def load_older(self, n: int = 200) -> int:
+        """Show up to `n` lines older than the oldest one on screen; returns how many were added.
 
-        self._build_ui()
+        Lines come from the history first, then from the on-disk log.
+        """
+        if not self._built or not self._lines:
+            return 0
+        if self.history is not None and self._extra_top == 0 and self._top_index > 0:
+            start = max(0, self._top_index - n)
+            msgs = [(m.ts, m.sender, m.text) for m in self.history.slice(start, self._top_index)]
+            self._top_index = start
+        elif self.log_cursor is not None:
+            msgs = [(ts, sender, text) for ts, sender, text, _ in self.log_cursor.older(n)]
+            self._extra_top += len(msgs)
+        else:
+            return 0
+        if not msgs:
+            return 0
+        self._prepend_lines([self._format_stored(ts, sender, text) for ts, sender, text in msgs])
+        return len(msgs)
+
+    def _prepend_lines(self, lines: list[str]):
+        block = "".join(f"{line}\n" for line in lines)
+        ctrl = self.transcript
+        start, end = ctrl.GetSelection()
+        ctrl.Freeze()
+        try:
+            ctrl.Replace(0, 0, block)
+            self._lines.extendleft(reversed(lines))
+            # Keep the caret on the line the reader was on
+            ctrl.SetSelection(start + len(block), end + len(block))
+            ctrl.ShowPosition(start + len(block))
+        finally:
+            ctrl.Thaw()
+
+    def reveal(self, sender: str, text: str, max_pages: int = 25) -> bool:
+        """Select the newest line showing `text` from `sender`, paging back as needed."""
+        self.ensure_ui()
+        wanted = format_entry(sender, text)
+        # Lines to check: everything at first, then only what each page prepended
+        unseen = len(self._lines)
+        for _ in range(max_pages + 1):
+            for i in range(unseen - 1, -1, -1):
+                if self._lines[i].endswith(wanted):
+                    pos = sum(len(line) + 1 for line in itertools.islice(self._lines, i))
+                    ctrl = self.transcript
+                    ctrl.SetSelection(pos, pos + len(self._lines[i]))
+                    ctrl.ShowPosition(pos)
+                    ctrl.SetFocus()
+                    return True
+            unseen = self.load_older()
+            if not unseen:
+                break
+        return False
 
     def _build_ui(self):
         self.SetName("Chat panel")
@@ -25,6 +265,7 @@ class ChatPanel(wx.Panel):
         )
         self.transcript.SetName("Chat transcript")
         self.transcript.SetToolTip("Chat transcript")
+        self.transcript.Bind(wx.EVT_KEY_DOWN, self._on_transcript_key)
 
         input_row = wx.BoxSizer(wx.HORIZONTAL)
         self.input = wx.TextCtrl(self, style=wx.TE_PROCESS_ENTER)
@@ -44,35 +285,155 @@ class ChatPanel(wx.Panel):
         left.Add(self.transcript, 1, wx.EXPAND | wx.BOTTOM, 6)
         left.Add(input_row, 0, wx.EXPAND)
 
-        # Right column: user list
-        self.user_list = wx.ListBox(self)
+        # Right column: user filter + user list
+        right = wx.BoxSizer(wx.VERTICAL)
+        self.user_filter = wx.TextCtrl(self)
+        self.user_filter.SetName("Filter users")
+        self.user_filter.SetToolTip("Type to show only nicks containing this text")
+        self.user_filter.SetHint("Filter users")
+        self.user_filter.Bind(
+            wx.EVT_TEXT, lambda evt: self.user_list.set_filter(self.user_filter.GetValue()),
+        )
+
+        self.user_list = UserListCtrl(self)
         self.user_list.SetName("User list")
         self.user_list.SetToolTip("Users in channel")
+        self.user_list.SetMinSize((160, -1))
+        self.user_list.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self._on_user_activated)
+
+        right.Add(self.user_filter, 0, wx.EXPAND | wx.BOTTOM, 6)
+        right.Add(self.user_list, 1, wx.EXPAND)
 
         root.Add(left, 1, wx.EXPAND | wx.ALL, 8)
-        root.Add(self.user_list, 0, wx.EXPAND | wx.TOP | wx.BOTTOM | wx.RIGHT, 8)
+        root.Add(right, 0, wx.EXPAND | wx.TOP | wx.BOTTOM | wx.RIGHT, 8)
 
         self.SetSizer(root)
 
-        # Tab order: transcript -> input -> send -> users
+        # Tab order: transcript -> input -> send -> user filter -> users
         self.input.MoveAfterInTabOrder(self.transcript)
         self.send_btn.MoveAfterInTabOrder(self.input)
-        self.user_list.MoveAfterInTabOrder(self.send_btn)
+        self.user_filter.MoveAfterInTabOrder(self.send_btn)
+        self.user_list.MoveAfterInTabOrder(self.user_filter)
 
     # Public helpers
     def append_message(self, text: str):
+        self.append_messages([text])
+
+    def append_messages(self, texts: list[str]):
+        """Append preformatted lines (local status and feedback)."""
+        self.append_entries([("", t, KIND_STATUS) for t in texts])
+
+    def echo(self, text: str):
+        """Show a preformatted line in the transcript only, leaving history and log untouched."""
+        if self._built:
+            self._render_entries(time.time(), [("", text, KIND_STATUS)])
+
+    def append_entry(self, sender: str, text: str, kind: str = KIND_STATUS):
+        self.append_entries([(sender, text, kind)])
+
+    def append_entries(self, entries: list[tuple[str, str, str]], highlight: bool = False):
+        """Record `(sender, text, kind)` messages in the history and show them in one edit.
+
+        On a hidden tab they are only counted as unread; `highlight` marks the
+        tab as highlighted until it is next shown.
+        """
+        if not entries:
+            return
+        now = time.time()
+        if self.history is None:
+            if self._built:
+                self._render_entries(now, entries)
+            return
+        last = self.history.extend((now, sender, text, kind) for sender, text, kind in entries)
+        if self._built and self._visible:
+            if self._rendered == last + 1 - len(entries):
+                self._rendered = last + 1
+                self._render_entries(now, entries, first=self._rendered - len(entries))
+            else:
+                self._catch_up()
+            return
+        new = sum(1 for _, _, kind in entries if kind not in _QUIET_KINDS)
+        if new or (highlight and not self.highlighted):
+            self.unread += new
+            self.highlighted = self.highlighted or highlight
+            if callable(self.on_unread):
+                self.on_unread(self)
+
+    def _render_entries(self, now: float, entries: list[tuple[str, str, str]],
+                        first: int | None = None):
+        texts = [format_entry(sender, text) for sender, text, _ in entries]
         if self.show_timestamps:
-            ts = datetime.now().strftime("%H:%M")
-            line = f"[{ts}] {text}"
+            ts = _timestamp(now)
+            self._append_lines([ts + t for t in texts], first)
         else:
-            line = text
-        self.transcript.AppendText(line + "\n")
+            self._append_lines(texts, first)
+
+    def _append_lines(self, lines: list[str], first: int | None = None):
+        """Append a batch of lines with a single edit and repaint.
+
+        `first` is the history index of the first line, when they come from the history.
+        """
+        if not self._lines and first is not None:
+            self._top_index = first
+            self._extra_top = 0
+        ctrl = self.transcript
+        # Follow new output only when the caret is at the end; otherwise keep the reader's place
+        start, end = ctrl.GetSelection()
+        follow = max(start, end) >= ctrl.GetLastPosition()
+        ctrl.Freeze()
+        try:
+            ctrl.AppendText("".join(f"{line}\n" for line in lines))
+            self._lines.extend(lines)
+            # While the reader is scrolled back (e.g. after loading older lines) let the
+            # transcript grow to twice the cap before trimming under their feet
+            overgrown = len(self._lines) >= 2 * self.scrollback_lines
+            removed = self._trim_scrollback() if follow or overgrown else 0
+            if not follow:
+                start = max(0, start - removed)
+                end = max(0, end - removed)
+                ctrl.SetSelection(start, end)
+                ctrl.ShowPosition(start)
+        finally:
+            ctrl.Thaw()
+
+    def transcript_lines(self) -> list[str]:
+        """Lines currently held in the transcript, oldest first."""
+        return list(self._lines)
 
     def set_show_timestamps(self, enabled: bool):
         self.show_timestamps = bool(enabled)
 
+    def set_scrollback(self, lines: int):
+        self.scrollback_lines = max(100, int(lines))
+        if self._built:
+            self._trim_scrollback(force=True)
+
+    def _trim_scrollback(self, force: bool = False) -> int:
+        """Drop lines beyond the scrollback cap; returns the number of characters removed."""
+        excess = len(self._lines) - self.scrollback_lines
+        if excess <= 0:
+            return 0
+        # Trim in chunks so the control is edited once per ~10% of growth, not on every append
+        if not force and excess < max(50, self.scrollback_lines // 10):
+            return 0
+        lines = self._lines
+        chars = 0
+        for _ in range(excess):
+            chars += len(lines.popleft()) + 1
+        # Log-only lines are the oldest, so they go first
+        from_log = min(excess, self._extra_top)
+        self._extra_top -= from_log
+        self._top_index += excess - from_log
+        try:
+            self.transcript.Remove(0, chars)
+        except Exception:
+            return 0
+        return chars
+
     def apply_theme(self, theme: str):
         self._theme = theme
+        if not self._built:
+            return
         try:
             if theme == "dark":
                 bg = wx.Colour(30, 30, 30)
@@ -83,7 +444,7 @@ class ChatPanel(wx.Panel):
             else:  # system
                 bg = wx.NullColour
                 fg = wx.NullColour
-            for ctrl in (self.transcript, self.input, self.user_list):
+            for ctrl in (self.transcript, self.input, self.user_filter, self.user_list):
                 if bg.IsOk():
                     ctrl.SetBackgroundColour(bg)
                 if fg.IsOk():
@@ -93,16 +454,70 @@ class ChatPanel(wx.Panel):
             pass
 
     def focus_input(self):
+        self.ensure_ui()
         self.input.SetFocus()
         self.input.SetInsertionPointEnd()
 
     def clear_input(self):
-        self.input.SetValue("")
+        if self._built:
+            self.input.SetValue("")
+
+    def set_users(self, users: list[str], prefixes: dict[str, str] | None = None,
+                  symbols: str | None = None):
+        if self._built:
+            self.user_list.set_users(users, prefixes, symbols)
+            return
+        self._pending_users = (
+            {nick_key(u): u for u in users},
+            {nick_key(n): p for n, p in (prefixes or {}).items() if p},
+            symbols,
+        )
 
-    def set_users(self, users: list[str]):
-        self.user_list.Set(users)
+    def apply_user_delta(self, added: list[str], removed: list[str], renamed: list[tuple[str, str]],
+                         modes: list[tuple[str, str]] | None = None):
+        if self._built:
+            self.user_list.apply_delta(added, removed, renamed, modes or ())
+            return
+        if self._pending_users is None:
+            self._pending_users = ({}, {}, None)
+        nicks, prefixes, _ = self._pending_users
+        for old, new in renamed:
+            old_key, new_key = nick_key(old), nick_key(new)
+            if nicks.pop(old_key, None) is not None:
+                nicks[new_key] = new
+                if old_key in prefixes:
+                    prefixes[new_key] = prefixes.pop(old_key)
+        for nick in removed:
+            nicks.pop(nick_key(nick), None)
+            prefixes.pop(nick_key(nick), None)
+        for nick in added:
+            nicks[nick_key(nick)] = nick
+        for nick, prefix in modes or ():
+            key = nick_key(nick)
+            if key in nicks:
+                if prefix:
+                    prefixes[key] = prefix
+                else:
+                    prefixes.pop(key, None)
+
+    def selected_user(self) -> str | None:
+        return self.user_list.selected_nick() if self._built else None
 
     # Events
+    def _on_transcript_key(self, evt):
+        # Moving up from the first line (Up, Page Up, Ctrl+Home) loads older lines
+        key = evt.GetKeyCode()
+        upward = key in (wx.WXK_UP, wx.WXK_PAGEUP) or (key == wx.WXK_HOME and evt.ControlDown())
+        if upward and self._lines and self.transcript.GetInsertionPoint() <= len(self._lines[0]):
+            self.load_older()
+        evt.Skip()
+
+    def _on_user_activated(self, evt):
+        # Enter or double-click on a user
+        nick = self.user_list.nick_at(evt.GetIndex())
+        if nick and callable(self.on_user_activate):
+            self.on_user_activate(nick)
+
     def _on_send_clicked(self, evt):
         text = self.input.GetValue().strip()
         if not text:
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Any, Callable
+
+import wx
+
+# deliver(events, users); see UIEventPump
+Deliver = Callable[[list[tuple[str, tuple]], dict[str, tuple[str, Any, list]]], None]
+
+
+class UIEventPump:
+    """Marshal event-bus callbacks from background threads to the wx main thread.
+
+    Producers call `post`/`post_users` from any thread. At most one
+    `wx.CallAfter` is pending at a time; when it runs, queued events are
+    handed to `deliver(events, users)` in one batch. `events` is an ordered
+    list of `(kind, args)` tuples; `users` maps a lower-cased target to
+    `(target, snapshot, deltas)`: the latest snapshot posted for it (or
+    None) and the deltas posted after that snapshot, in order. A new snapshot
+    discards everything queued before it for the same target. Batches are
+    capped at `max_batch` events so input handling gets a turn between
+    batches under flood.
+    """
+
+    def __init__(self, deliver: Deliver, max_batch: int = 500):
+        self._deliver = deliver
+        self.max_batch = max(1, int(max_batch))
+        self._lock = threading.Lock()
+        self._events: deque[tuple[str, tuple]] = deque()
+        self._users: dict[str, tuple[str, Any, list]] = {}
+        self._scheduled = False
+        self._closed = False
+
+    def post(self, kind: str, *args: Any):
+        with self._lock:
+            if self._closed:
+                return
+            self._events.append((kind, args))
+            schedule = not self._scheduled
+            self._scheduled = True
+        if schedule:
+            wx.CallAfter(self._drain)
+
+    def post_users(self, target: str, users: Any):
+        with self._lock:
+            if self._closed:
+                return
+            self._users[target.lower()] = (target, users, [])
+            schedule = not self._scheduled
+            self._scheduled = True
+        if schedule:
+            wx.CallAfter(self._drain)
+
+    def post_users_delta(self, target: str, delta: Any):
+        with self._lock:
+            if self._closed:
+                return
+            key = target.lower()
+            entry = self._users.get(key)
+            if entry is None:
+                entry = self._users[key] = (target, None, [])
+            entry[2].append(delta)
+            schedule = not self._scheduled
+            self._scheduled = True
+        if schedule:
+            wx.CallAfter(self._drain)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._events) + len(self._users)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._events.clear()
+            self._users.clear()
+
+    def _drain(self):
+        with self._lock:
+            if self._closed:
+                return
+            q = self._events
+            n = min(len(q), self.max_batch)
+            events = [q.popleft() for _ in range(n)]
+            users = self._users
+            self._users = {}
+            more = bool(q)
+            self._scheduled = more
+        try:
+            self._deliver(events, users)
+        finally:
+            if more:
+                wx.CallAfter(self._drain)
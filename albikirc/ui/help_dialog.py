@@ -10,6 +10,7 @@ HELP_TEXT = (
     "- Close Tab: Cmd/Ctrl+W\n"
     "- Preferences: Cmd/Ctrl+,\n"
     "- Focus Message Input: Cmd/Ctrl+Shift+M\n"
+    "- Search Logs: Cmd/Ctrl+Shift+F\n"
     "- Send Message: Enter (with input focused)\n"
     "- Start Private Message: Enter on a selected user (user list)\n"
     "\n"
@@ -25,12 +26,17 @@ HELP_TEXT = (
     "- /topic [#chan] [text] — Show or set the topic for a channel.\n"
     "- /whois <nick> — Query WHOIS information for a user.\n"
     "- /raw <line> — Send a raw IRC command.\n"
+    "- /rawlog [on|off|clear|<count>] — Record raw protocol traffic, or show the last lines (default 100) in Console.\n"
+    "- /busstats [errors|reset] — Show event bus counters and subscriber timings in Console (errors adds the last traceback).\n"
+    "- /search [words] [#chan|in:<target>] [from:<nick>] [since:YYYY-MM-DD] [until:YYYY-MM-DD] — Search the chat logs.\n"
     "\n"
     "Navigation Tips\n"
     "\n"
     "- Tabs: focus the tab bar to switch between conversations (arrow keys or Ctrl+Tab on some systems).\n"
-    "- Chat panel: Tab cycles transcript → input → Send → user list.\n"
+    "- Chat panel: Tab cycles transcript → input → Send → user filter → user list.\n"
+    "- In the transcript: Up, Page Up or Ctrl+Home on the first line loads older lines (from the log when needed).\n"
     "- In user list: Enter or double-click opens a private message with the selected user.\n"
+    "- Search dialog: Enter in any field searches; Enter on a result opens its tab with the line selected.\n"
     "- Connect dialog: All fields are labeled (host, port, nick, TLS, optional SASL and client certificate).\n"
     "- Status messages appear in the status bar at the bottom.\n"
 )
@@ -6,13 +6,21 @@ import wx.adv
 
 from .chat_panel import ChatPanel
 from ..irc_client import IRCClient
-from ..config import save, _default_sound_path
+from ..config import APP_DIR, save, _default_sound_path
 from ..mac_speech import MacSpeechBackend
 from .connect_dialog import ConnectDialog
 from .preferences_dialog import PreferencesDialog
 from .saved_servers_dialog import SavedServersDialog
 from .help_dialog import HelpDialog
-from ..event_bus import event_bus
+from .search_dialog import SearchDialog
+from .event_pump import UIEventPump
+from ..event_bus import event_bus, COALESCE_LATEST, DROP_OLDEST
+from ..events import MessageEvent, StatusEvent
+from ..classify import (Classification, MessageClassifier, KIND_ACTION, KIND_ACTIVITY, KIND_CHANNEL,
+                        KIND_NOTICE, KIND_PRIVATE)
+from ..store import DEFAULT_MEMORY_BUDGET, HistoryView, MessageStore
+from ..chatlog import FSYNC_NEVER, LogCursor, LogWriter
+from ..search import SearchIndex, fts5_available
 
 
 class MainFrame(wx.Frame):
@@ -32,9 +40,23 @@ class MainFrame(wx.Frame):
         app_cfg = self.settings.get('appearance', {})
         self._theme = (app_cfg.get('theme') or 'system').lower()
         self._timestamps = bool(app_cfg.get('timestamps', True))
+        self._scrollback = self._scrollback_setting(app_cfg)
+        # Message history for every tab, independent of the widgets that show it
+        self._store = MessageStore(self._history_budget(self.settings.get('history', {})))
+        # Per-target chat logs on disk; lines are handed to a writer thread
+        self._network = "local"
+        self._log_writer = self._start_log_writer(self.settings.get('logging', {}))
+        try:
+            restore = self.settings.get('logging', {}).get('restore_lines', 200)
+            self._restore_lines = max(0, int(restore))
+        except Exception:
+            self._restore_lines = 200
+        # Full-text index of the logs, filled in the background from the log writer
+        self._search_index = self._start_search_index(self.settings.get('search', {}))
 
         # Experimental beeps
         self._beeps_enabled = bool(self.settings.get('beeps', {}).get('enabled', False))
+        self._refresh_classifier()
         self._tts_proc = None
         self._tts_av = None
         self._tts_queue = deque()
@@ -57,9 +79,14 @@ class MainFrame(wx.Frame):
             self.irc.tcp_keepalive_idle = int(conn.get('tcp_keepalive_idle', self.irc.tcp_keepalive_idle))
             self.irc.tcp_keepalive_interval = int(conn.get('tcp_keepalive_interval', self.irc.tcp_keepalive_interval))
             self.irc.tcp_keepalive_count = int(conn.get('tcp_keepalive_count', self.irc.tcp_keepalive_count))
+            self.irc.max_line_length = int(conn.get('max_line_length', self.irc.max_line_length))
+            self.irc.raw_log_size = int(conn.get('raw_log_size', self.irc.raw_log_size))
+            self.irc.flood_burst = int(conn.get('flood_burst', self.irc.flood_burst))
+            self.irc.flood_rate = float(conn.get('flood_rate', self.irc.flood_rate))
         except Exception:
             pass
-        # Note: receive beeps are handled on each incoming message in _on_irc_message
+        self.irc.raw_log_enabled = bool(conn.get('raw_log_enabled', False))
+        # Note: receive beeps are handled on each incoming message in _render_message
 
         self._bind_events()
 
@@ -90,8 +117,14 @@ class MainFrame(wx.Frame):
         self.notebook.SetToolTip("Conversation tabs; each tab is a channel or private message")
 
         # Start with a default tab (e.g., console)
-        self._target_tabs: dict[str, int] = {}
-        self._add_chat_tab("Console")
+        # Lowercased tab title -> page, kept up to date as tabs are added and closed
+        self._target_tabs: dict[str, ChatPanel] = {}
+        # Closed, already-built panels kept for reuse by new tabs
+        self._panel_pool: list[ChatPanel] = []
+        # The one tab whose widgets are kept up to date; the others only count unread lines
+        self._visible_chat: ChatPanel | None = None
+        self.notebook.Bind(wx.EVT_NOTEBOOK_PAGE_CHANGED, self._on_tab_changed)
+        self._add_chat_tab("Console", select=True)
 
         # Restore tabs and window geometry
         try:
@@ -119,20 +152,95 @@ class MainFrame(wx.Frame):
         if not restored_size:
             self.SetSize((920, 600))
 
-    def _add_chat_tab(self, title: str):
-        chat = ChatPanel(self.notebook, on_send=self._on_send_message)
+    @staticmethod
+    def _scrollback_setting(app_cfg) -> int:
+        try:
+            return max(100, int(app_cfg.get('scrollback_lines', 5000)))
+        except Exception:
+            return 5000
+
+    @staticmethod
+    def _history_budget(hist_cfg) -> int:
+        try:
+            return max(1, int(hist_cfg.get('memory_budget_mb', 32))) * 1024 * 1024
+        except Exception:
+            return DEFAULT_MEMORY_BUDGET
+
+    @staticmethod
+    def _start_log_writer(log_cfg) -> LogWriter | None:
+        if not log_cfg.get('enabled', True):
+            return None
+        try:
+            writer = LogWriter(
+                APP_DIR / "logs",
+                flush_lines=int(log_cfg.get('flush_lines', 1000)),
+                flush_interval=float(log_cfg.get('flush_interval', 1.0)),
+                fsync=log_cfg.get('fsync', FSYNC_NEVER) or FSYNC_NEVER,
+                compress=log_cfg.get('compress', 'gzip') or None,
+            )
+        except (TypeError, ValueError):
+            writer = LogWriter(APP_DIR / "logs")
+        writer.start()
+        return writer
+
+    def _start_search_index(self, search_cfg) -> SearchIndex | None:
+        if self._log_writer is None or not search_cfg.get('enabled', True) or not fts5_available():
+            return None
+        try:
+            index = SearchIndex(APP_DIR / "search.db", self._log_writer.root)
+        except Exception:
+            return None
+        index.start()
+        self._log_writer.add_listener(index.notify)
+        return index
+
+    def _log_entries(self, target: str, entries):
+        writer = self._log_writer
+        if writer is not None:
+            writer.write(self._network, target, entries)
+
+    def _restore_from_log(self, chat: ChatPanel, history: HistoryView):
+        # Point a new tab at the end of its log; the lines themselves are read when the tab
+        # is first shown (ChatPanel.ensure_ui), and load_older() keeps paging back from there.
+        # Creating the cursor only lists the log directory, so opening tabs stays cheap.
+        if self._log_writer is None or self._restore_lines <= 0:
+            return
+        if history.target.lower() == "console":
+            return
+        try:
+            chat.log_cursor = LogCursor(self._log_writer.root, self._network, history.target)
+        except Exception:
+            return
+        chat.restore_lines = self._restore_lines
+
+    def _add_chat_tab(self, title: str, select: bool = False):
+        # Background tabs stay placeholders until first selected, so a burst of new
+        # channels or queries costs a notebook page each rather than a full widget tree.
+        # Console only holds local output (status lines, /rawlog and /busstats dumps), so it is
+        # not logged
+        logged = title.lower() != "console"
+        history = HistoryView(self._store, self.irc.conn_id, title,
+                              on_extend=self._log_entries if logged else None)
+        if self._panel_pool:
+            chat = self._panel_pool.pop()
+            chat.reset(history, title)
+            chat.Show()
+        else:
+            chat = ChatPanel(self.notebook, on_send=self._on_send_message, history=history,
+                             on_user_activate=self._on_user_list_activate, lazy=True,
+                             title=title, on_unread=self._on_chat_unread)
         # Apply appearance
         chat.set_show_timestamps(self._timestamps)
+        chat.set_scrollback(self._scrollback)
         chat.apply_theme(self._theme)
-        # Bind user list interactions (double-click or Enter to PM)
-        try:
-            chat.user_list.Bind(wx.EVT_LISTBOX_DCLICK, lambda evt, t=title: self._on_user_list_dclick(evt, t))
-            chat.user_list.Bind(wx.EVT_CHAR_HOOK, lambda evt, t=title: self._on_user_list_key(evt, t))
-        except Exception:
-            pass
+        self._restore_from_log(chat, history)
         idx = self.notebook.GetPageCount()
-        self.notebook.AddPage(chat, title, select=True)
-        self._rebuild_tab_index_map()
+        self._target_tabs[title.lower()] = chat
+        if select:
+            chat.ensure_ui()
+        self.notebook.AddPage(chat, title, select=select)
+        if select:
+            self._show_chat(chat)
         return idx
 
     def _current_chat(self) -> ChatPanel | None:
@@ -141,19 +249,55 @@ class MainFrame(wx.Frame):
             return None
         return self.notebook.GetPage(idx)
 
-    def _chat_for_target(self, target: str, create: bool = True) -> ChatPanel:
-        key = target.lower()
-        if key in self._target_tabs:
-            return self.notebook.GetPage(self._target_tabs[key])
+    def _chat_for_target(self, target: str, create: bool = True, select: bool = False) -> ChatPanel:
+        # New tabs open in the background unless the user asked for them (select=True)
+        chat = self._target_tabs.get(target.lower())
+        if chat is not None:
+            return chat
         if not create:
             return self._current_chat()
-        idx = self._add_chat_tab(target)
+        idx = self._add_chat_tab(target, select=select)
         return self.notebook.GetPage(idx)
 
-    def _rebuild_tab_index_map(self):
-        self._target_tabs = {
-            self.notebook.GetPageText(i).lower(): i for i in range(self.notebook.GetPageCount())
-        }
+    def _select_chat(self, chat: ChatPanel):
+        idx = self.notebook.FindPage(chat)
+        if idx != wx.NOT_FOUND and idx != self.notebook.GetSelection():
+            self.notebook.SetSelection(idx)
+
+    def _show_chat(self, chat: ChatPanel | None):
+        # Hide the previous tab and bring the new one up to date in one batch
+        prev = self._visible_chat
+        if prev is chat:
+            return
+        if prev is not None:
+            prev.set_visible(False)
+        self._visible_chat = chat
+        if chat is not None:
+            chat.set_visible(True)
+
+    def _on_tab_changed(self, evt):
+        try:
+            page = self.notebook.GetPage(evt.GetSelection())
+            if isinstance(page, ChatPanel):
+                self._show_chat(page)
+        except Exception:
+            pass
+        evt.Skip()
+
+    def _on_chat_unread(self, chat: ChatPanel):
+        # Tab label shows unread lines in hidden tabs, e.g. "#python (12)" or "#python (3, mention)"
+        idx = self.notebook.FindPage(chat)
+        if idx == wx.NOT_FOUND:
+            return
+        label = chat.title
+        if chat.unread and chat.highlighted:
+            label = f"{chat.title} ({chat.unread}, mention)"
+        elif chat.unread:
+            label = f"{chat.title} ({chat.unread})"
+        elif chat.highlighted:
+            label = f"{chat.title} (mention)"
+        if self.notebook.GetPageText(idx) != label:
+            self.notebook.SetPageText(idx, label)
 
     # Menus and shortcuts
     def _make_menu(self):
@@ -161,11 +305,13 @@ class MainFrame(wx.Frame):
 
         self.ID_CONNECT = wx.NewIdRef()
         self.ID_CONNECT_SAVED = wx.NewIdRef()
+        self.ID_CANCEL_CONNECT = wx.NewIdRef()
         self.ID_EXPORT_SERVERS = wx.NewIdRef()
         self.ID_IMPORT_SERVERS = wx.NewIdRef()
         self.ID_JOIN = wx.NewIdRef()
         self.ID_CLOSE_TAB = wx.NewIdRef()
         self.ID_PREFERENCES = wx.NewIdRef()
+        self.ID_SEARCH_LOGS = wx.NewIdRef()
         self.ID_FOCUS_INPUT = wx.NewIdRef()
         self.ID_ABOUT = wx.ID_ABOUT
         self.ID_HELP_SHORTCUTS = wx.NewIdRef()
@@ -176,6 +322,7 @@ class MainFrame(wx.Frame):
         file_menu = wx.Menu()
         file_menu.Append(self.ID_CONNECT, "&Connect\tCtrl-N", "Connect to a server")
         file_menu.Append(self.ID_CONNECT_SAVED, "Connect to &Saved…\tCtrl-Shift-N", "Connect to a saved server")
+        file_menu.Append(self.ID_CANCEL_CONNECT, "C&ancel Connection Attempt", "Stop a connection attempt that is still in progress")
         file_menu.AppendSeparator()
         file_menu.Append(self.ID_EXPORT_SERVERS, "E&xport Servers…", "Export saved servers to a JSON file")
         file_menu.Append(self.ID_IMPORT_SERVERS, "&Import Servers…", "Import servers from a JSON file")
@@ -186,6 +333,8 @@ class MainFrame(wx.Frame):
         file_menu.Append(wx.ID_EXIT, "E&xit\tCtrl-Q", "Quit albikirc")
 
         edit_menu = wx.Menu()
+        edit_menu.Append(self.ID_SEARCH_LOGS, "&Search Logs…\tCtrl-Shift-F", "Search the chat logs")
+        edit_menu.AppendSeparator()
         edit_menu.Append(self.ID_PREFERENCES, "&Preferences…\tCtrl-,", "Open preferences")
 
         view_menu = wx.Menu()
@@ -215,11 +364,13 @@ class MainFrame(wx.Frame):
 
         self.Bind(wx.EVT_MENU, self._on_connect, id=self.ID_CONNECT)
         self.Bind(wx.EVT_MENU, self._on_connect_saved, id=self.ID_CONNECT_SAVED)
+        self.Bind(wx.EVT_MENU, self._on_cancel_connect, id=self.ID_CANCEL_CONNECT)
         self.Bind(wx.EVT_MENU, self._on_export_servers, id=self.ID_EXPORT_SERVERS)
         self.Bind(wx.EVT_MENU, self._on_import_servers, id=self.ID_IMPORT_SERVERS)
         self.Bind(wx.EVT_MENU, self._on_join_channel, id=self.ID_JOIN)
         self.Bind(wx.EVT_MENU, self._on_close_tab, id=self.ID_CLOSE_TAB)
         self.Bind(wx.EVT_MENU, self._on_preferences, id=self.ID_PREFERENCES)
+        self.Bind(wx.EVT_MENU, lambda evt: self._open_search(), id=self.ID_SEARCH_LOGS)
         self.Bind(wx.EVT_MENU, self._on_focus_input, id=self.ID_FOCUS_INPUT)
         self.Bind(wx.EVT_MENU, self._on_about, id=self.ID_ABOUT)
         self.Bind(wx.EVT_MENU, self._on_help_shortcuts, id=self.ID_HELP_SHORTCUTS)
@@ -406,6 +557,7 @@ class MainFrame(wx.Frame):
             cfg = self.settings.setdefault('tts', {})
             cfg['enabled'] = bool(evt.IsChecked())
             save(self.settings)
+            self._refresh_classifier()
             self._tts_init()
         except Exception:
             pass
@@ -655,18 +807,51 @@ class MainFrame(wx.Frame):
         self.SetAcceleratorTable(wx.AcceleratorTable(entries))
 
     def _bind_events(self):
+        # Bus callbacks run on the network thread; the pump batches them onto the UI thread
+        self._event_pump = UIEventPump(self._on_irc_events)
+        pump = self._event_pump
         self._event_handlers = [
-            ("irc.status", lambda text: wx.CallAfter(self._on_irc_status, text)),
-            ("irc.message", lambda target, sender, text: wx.CallAfter(self._on_irc_message, target, sender, text)),
-            ("irc.users", lambda target, users: wx.CallAfter(self._on_irc_users, target, users)),
+            # Classified here, on the dispatcher thread, so the UI only renders and plays
+            ("irc.status",
+             lambda event: pump.post("status", event, self._classifier.classify(event))),
+            ("irc.message",
+             lambda event: pump.post("message", event, self._classifier.classify(event))),
+            ("irc.connection", lambda event: pump.post("connection", event)),
+            ("irc.users", lambda event: pump.post_users(event.target, event)),
+            ("irc.users.delta", lambda event: pump.post_users_delta(event.target, event)),
         ]
         for event_type, callback in self._event_handlers:
             event_bus.subscribe(event_type, callback)
+        self._start_async_events()
+
+    def _start_async_events(self):
+        events = self.settings.get('events', {}) or {}
+        if not events.get('async_delivery', False) or event_bus.async_enabled:
+            return
+        try:
+            workers = int(events.get('workers', 2))
+        except Exception:
+            workers = 2
+        # Status lines are expendable under flood; only the latest connection state matters.
+        # Snapshots and deltas share a queue so a delta never overtakes its snapshot.
+        event_bus.configure_topic("irc.status", policy=DROP_OLDEST, maxsize=2000)
+        event_bus.configure_topic("irc.connection", policy=COALESCE_LATEST)
+        event_bus.configure_topic("irc.message", maxsize=5000)
+        event_bus.configure_topic("irc.users", maxsize=5000)
+        event_bus.configure_topic("irc.users.delta", share_with="irc.users")
+        event_bus.start_async(workers)
+        self._owns_async_events = True
 
     def _unbind_events(self):
         for event_type, callback in getattr(self, "_event_handlers", []):
             event_bus.unsubscribe(event_type, callback)
         self._event_handlers = []
+        pump = getattr(self, "_event_pump", None)
+        if pump is not None:
+            pump.close()
+        if getattr(self, "_owns_async_events", False):
+            self._owns_async_events = False
+            event_bus.stop_async(wait=False)
 
     # Event handlers
     def _on_connect(self, evt):
@@ -695,8 +880,10 @@ class MainFrame(wx.Frame):
                 self.irc.tls_client_keyfile = getattr(dlg, 'keyfile', '') or None
                 self.irc.enable_tcp_keepalive = bool(tcp_keepalive)
                 self.irc.server_password = server_password or None
+                self._network = host
                 self.irc.connect(host, port, nick, real_name=real_name, use_tls=use_tls)
                 self.settings['nick'] = nick
+                self._refresh_classifier()
                 self.settings['realname'] = real_name
                 # Save server if requested
                 try:
@@ -732,7 +919,7 @@ class MainFrame(wx.Frame):
                 channel = parts[0]
                 key = parts[1] if len(parts) > 1 else None
                 self.irc.join_channel(channel, key)
-                self._chat_for_target(channel, create=True)
+                self._select_chat(self._chat_for_target(channel, create=True, select=True))
         dlg.Destroy()
 
 
@@ -809,8 +996,10 @@ class MainFrame(wx.Frame):
                     self.irc.enable_tcp_keepalive = bool(sel.get('tcp_keepalive', True))
                     # Server password is not stored; default empty unless provided in entry
                     self.irc.server_password = sel.get('server_password', '') or None
+                    self._network = host
                     self.irc.connect(host, port, nick, real_name=real_name, use_tls=use_tls)
                     self.settings['nick'] = nick
+                    self._refresh_classifier()
                     self.settings['realname'] = real_name
                     self.SetStatusText(f"Connecting to {host}:{port} as {nick}{' with TLS' if use_tls else ''}")
         # Persist any removals the dialog made
@@ -818,11 +1007,47 @@ class MainFrame(wx.Frame):
         save(self.settings)
         dlg.Destroy()
 
+    def _on_cancel_connect(self, evt):
+        if not self.irc.cancel_connect():
+            self.SetStatusText("No connection attempt in progress")
+
+    def _on_irc_connection(self, state: str, detail: str):
+        # Connection setup runs in the background; mirror its progress in the status bar
+        labels = {
+            'resolving': f"Resolving {detail}…",
+            'connecting': f"Connecting to {detail}…",
+            'tls': f"Negotiating TLS with {detail}…",
+            'connected': f"Connected to {detail}; registering…",
+            'registered': "Registered",
+            'failed': f"Connection failed: {detail}",
+            'cancelled': "Connection attempt cancelled",
+            'disconnected': f"Disconnected: {detail}" if detail else "Disconnected",
+        }
+        try:
+            self.SetStatusText(labels.get(state, f"{state} {detail}".strip()))
+        except Exception:
+            pass
+
     def _on_close_tab(self, evt):
         idx = self.notebook.GetSelection()
         if idx != wx.NOT_FOUND and self.notebook.GetPageCount() > 1:
-            self.notebook.DeletePage(idx)
-            self._rebuild_tab_index_map()
+            page = self.notebook.GetPage(idx)
+            title = page.title if isinstance(page, ChatPanel) else self.notebook.GetPageText(idx)
+            if self._target_tabs.get(title.lower()) is page:
+                del self._target_tabs[title.lower()]
+            if page is self._visible_chat:
+                self._visible_chat = None
+            if isinstance(page, ChatPanel) and page.history is not None:
+                page.history.discard()
+            if isinstance(page, ChatPanel) and page.is_built and len(self._panel_pool) < 4:
+                # Keep a few built panels around; new tabs reuse them instead of building widgets
+                self.notebook.RemovePage(idx)
+                page.reset()
+                page.Hide()
+                self._panel_pool.append(page)
+            else:
+                self.notebook.DeletePage(idx)
+            self._show_chat(self._current_chat())
 
     def _on_preferences(self, evt):
         dlg = PreferencesDialog(self, self.settings)
@@ -851,21 +1076,28 @@ class MainFrame(wx.Frame):
                 self.irc.tcp_keepalive_idle = int(self.settings['connection'].get('tcp_keepalive_idle', self.irc.tcp_keepalive_idle))
                 self.irc.tcp_keepalive_interval = int(self.settings['connection'].get('tcp_keepalive_interval', self.irc.tcp_keepalive_interval))
                 self.irc.tcp_keepalive_count = int(self.settings['connection'].get('tcp_keepalive_count', self.irc.tcp_keepalive_count))
+                self.irc.max_line_length = int(self.settings['connection'].get('max_line_length', self.irc.max_line_length))
+                self.irc.raw_log_size = int(self.settings['connection'].get('raw_log_size', self.irc.raw_log_size))
+                self.irc.flood_burst = int(self.settings['connection'].get('flood_burst', self.irc.flood_burst))
+                self.irc.flood_rate = float(self.settings['connection'].get('flood_rate', self.irc.flood_rate))
             except Exception:
                 pass
             # Beeps
             self._beeps_enabled = bool(self.settings.get('beeps', {}).get('enabled', False))
+            self._refresh_classifier()
             # TTS
             self._tts_init()
             # Apply appearance to all tabs
             app_cfg = self.settings.get('appearance', {})
             self._theme = (app_cfg.get('theme') or 'system').lower()
             self._timestamps = bool(app_cfg.get('timestamps', True))
+            self._scrollback = self._scrollback_setting(app_cfg)
             try:
                 for i in range(self.notebook.GetPageCount()):
                     page = self.notebook.GetPage(i)
                     if isinstance(page, ChatPanel):
                         page.set_show_timestamps(self._timestamps)
+                        page.set_scrollback(self._scrollback)
                         page.apply_theme(self._theme)
             except Exception:
                 pass
@@ -1290,6 +1522,57 @@ class MainFrame(wx.Frame):
         except Exception:
             wx.MessageBox("albikirc 0.1.0", "About", wx.OK | wx.ICON_INFORMATION)
 
+    def _open_search(self, query: str = ""):
+        if self._search_index is None:
+            self._on_irc_status(
+                "Log search is unavailable (chat logging is off or SQLite lacks FTS5)"
+            )
+            return
+        dlg = SearchDialog(self, self._search_index, query, network=self._network)
+        hit = dlg.selected if dlg.ShowModal() == wx.ID_OK else None
+        dlg.Destroy()
+        if hit is not None:
+            self._jump_to_hit(hit)
+
+    def _jump_to_hit(self, hit):
+        # Open the conversation and page back through its history and log to the line.
+        # Hits from another network cannot be opened on this connection; show their context instead.
+        try:
+            lines = self._search_index.context(hit.id)
+        except Exception:
+            lines = [hit]
+        if hit.network != self._network.lower():
+            self._show_search_context(hit, lines, f"from {hit.network}, not the current network")
+            return
+        title = self._search_target_title(hit, lines)
+        chat = self._chat_for_target(title, create=True, select=True)
+        self._select_chat(chat)
+        if not chat.reveal(hit.sender, hit.text):
+            self._show_search_context(hit, lines, "too far back to show in the tab")
+
+    def _search_target_title(self, hit, lines) -> str:
+        # Logs only keep the lowercased target; prefer an open tab's title, or the
+        # nick as the other party wrote it for a private conversation
+        chat = self._target_tabs.get(hit.target.lower())
+        if chat is not None:
+            return chat.title
+        if hit.target[:1] not in "#&":
+            for line in lines:
+                if line.sender.lower() == hit.target:
+                    return line.sender
+        return hit.target
+
+    def _show_search_context(self, hit, lines, reason: str):
+        # Console is not logged, so this never feeds back into the logs or the index
+        day = time.strftime('%Y-%m-%d', time.localtime(hit.ts))
+        out = [f"[search] {hit.target}, {day} ({reason})"]
+        for line in lines:
+            who = f"<{line.sender}> " if line.sender else ""
+            out.append(f"{time.strftime('%H:%M', time.localtime(line.ts))} {who}{line.text}")
+        console = self._chat_for_target("Console", create=True)
+        console.append_message("\n".join(out))
+        self._select_chat(console)
+
     def _on_help_shortcuts(self, evt):
         dlg = HelpDialog(self)
         dlg.ShowModal()
@@ -1299,8 +1582,8 @@ class MainFrame(wx.Frame):
         idx = self.notebook.GetSelection()
         if idx == wx.NOT_FOUND:
             return
-        target = self.notebook.GetPageText(idx)
         chat = self.notebook.GetPage(idx)
+        target = chat.title
         # Slash commands
         if text.startswith('/'):
             self._handle_slash_command(target, chat, text)
@@ -1308,7 +1591,7 @@ class MainFrame(wx.Frame):
         if target.lower() == "console":
             self._on_irc_status("Open or join a channel, or start a private message, before sending chat.")
             return
-        chat.append_message(f"me: {text}")
+        self._append_own(chat, target, text, self._own_kind(target))
         self.irc.send_message(target=target, text=text)
         # Optional sound when sending a message
         try:
@@ -1347,7 +1630,7 @@ class MainFrame(wx.Frame):
         chan = arg.strip()
         if chan:
             self.irc.join_channel(chan)
-            self._chat_for_target(chan, create=True)
+            self._select_chat(self._chat_for_target(chan, create=True, select=True))
 
     def _handle_slash_p(self, target, chat, arg):
         self._handle_slash_part(target, chat, arg)
@@ -1370,7 +1653,7 @@ class MainFrame(wx.Frame):
         if act:
             # Echo as "* <nick> action" to match incoming ACTION format
             nick = self.irc.nick or self.settings.get('nick', 'me')
-            chat.append_message(f"* {nick} {act}")
+            chat.append_entry("*", f"{nick} {act}", KIND_ACTION)
             self.irc.send_action(target, act)
             # Consistent send feedback (sound/beep)
             try:
@@ -1397,7 +1680,7 @@ class MainFrame(wx.Frame):
             return
         # Route echo to the target tab for consistency
         dest = self._chat_for_target(tgt, create=True)
-        dest.append_message(f"me: [notice] {msg}")
+        self._append_own(dest, tgt, msg, KIND_NOTICE, prefix="[notice] ")
         self.irc.send_notice(tgt, msg)
         # Consistent send feedback (sound/beep)
         try:
@@ -1452,6 +1735,78 @@ class MainFrame(wx.Frame):
             return
         self.irc.send_raw(raw)
 
+    def _handle_slash_rawlog(self, target, chat, arg):
+        a = arg.strip().lower()
+        if a in ("on", "off"):
+            enabled = a == "on"
+            self.irc.raw_log_enabled = enabled
+            self.settings.setdefault('connection', {})['raw_log_enabled'] = enabled
+            save(self.settings)
+            state = 'enabled' if enabled else 'disabled'
+            self._on_irc_status(
+                f"Raw traffic log {state} (keeps last {self.irc.raw_log_size} lines)"
+            )
+            return
+        if a == "clear":
+            self.irc.clear_raw_log()
+            self._on_irc_status("Raw traffic log cleared")
+            return
+        limit = 100
+        if a:
+            try:
+                limit = max(1, int(a))
+            except ValueError:
+                self._on_irc_status("Usage: /rawlog [on|off|clear|<count>]")
+                return
+        entries = self.irc.raw_log_snapshot(limit)
+        if not entries:
+            state = "empty" if self.irc.raw_log_enabled else "disabled; use /rawlog on"
+            self._on_irc_status(f"Raw traffic log is {state}")
+            return
+        lines = []
+        for ts, direction, line in entries:
+            stamp = time.strftime("%H:%M:%S", time.localtime(ts)) + f".{int((ts % 1) * 1000):03d}"
+            lines.append(f"[raw {stamp}] {direction} {line}")
+        console = self._chat_for_target("Console", create=True)
+        header = f"[status] Raw traffic log: last {len(entries)} line(s)"
+        console.append_message("\n".join([header, *lines]))
+
+    def _handle_slash_busstats(self, target, chat, arg):
+        a = arg.strip().lower()
+        if a == "reset":
+            event_bus.reset_stats()
+            self._on_irc_status("Event bus statistics reset")
+            return
+        if a not in ("", "errors"):
+            self._on_irc_status("Usage: /busstats [errors|reset]")
+            return
+        stats = event_bus.stats_snapshot()
+        if not stats:
+            self._on_irc_status("Event bus has not published anything yet")
+            return
+        mode = "async" if event_bus.async_enabled else "sync"
+        lines = [f"[status] Event bus statistics ({mode} delivery)"]
+        waiting, dropped = self.irc.event_queue_stats()
+        drops = ", ".join(f"{t} {n}" for t, n in sorted(dropped.items())) or "none"
+        lines.append(f"dispatcher: queued {waiting}, dropped {drops}")
+        for topic in sorted(stats):
+            t = stats[topic]
+            lines.append(f"{topic}: published {t['published']}, queued {t['queue_depth']}, "
+                         f"dropped {t['dropped']}")
+            for h in sorted(t['handlers'], key=lambda h: h['total_ms'], reverse=True):
+                lines.append(
+                    f"  {h['name']}: {h['calls']} call(s), {h['errors']} error(s), "
+                    f"total {h['total_ms']:.1f} ms, p50 {h['p50_ms']:.3f} ms, "
+                    f"p99 {h['p99_ms']:.3f} ms, max {h['max_ms']:.3f} ms"
+                )
+                if a == "errors" and h['last_error']:
+                    lines.extend("    " + l for l in h['last_error'].rstrip().splitlines())
+        console = self._chat_for_target("Console", create=True)
+        console.append_message("\n".join(lines))
+
+    def _handle_slash_search(self, target, chat, arg):
+        self._open_search(arg.strip())
+
     def _handle_slash_msg(self, target, chat, arg):
         self._handle_slash_query(target, chat, arg)
 
@@ -1464,9 +1819,10 @@ class MainFrame(wx.Frame):
         a = arg.split(None, 1)
         nick = a[0]
         msg = a[1] if len(a) > 1 else ""
-        pm = self._chat_for_target(nick, create=True)
+        pm = self._chat_for_target(nick, create=True, select=True)
+        self._select_chat(pm)
         if msg:
-            pm.append_message(f"me: {msg}")
+            self._append_own(pm, nick, msg, KIND_PRIVATE)
             self.irc.send_message(nick, msg)
             # Consistent send feedback (sound/beep)
             try:
@@ -1634,6 +1990,7 @@ class MainFrame(wx.Frame):
         try:
             self.settings.setdefault('sounds', {})['enabled'] = False
             save(self.settings)
+            self._refresh_classifier()
         except Exception:
             pass
         try:
@@ -1655,138 +2012,140 @@ class MainFrame(wx.Frame):
             self._disable_sounds_due_error("unexpected exception during playback")
 
     def _on_irc_status(self, text: str):
+        # Local status lines (usage hints, command feedback) share the Console path
+        event = StatusEvent(self.irc.conn_id, text)
+        chat, entry = self._render_status(event, self._classifier.classify(event))
+        chat.append_entries([entry])
+
+    @staticmethod
+    def _own_kind(target: str) -> str:
+        return KIND_CHANNEL if target[:1] in "#&" else KIND_PRIVATE
+
+    def _append_own(self, chat: ChatPanel, target: str, text: str, kind: str, prefix: str = ""):
+        # Our own line, under our nick so from:<nick> finds it, with NickServ passwords masked
+        # before it reaches the history, the log and the search index
+        nick = self.irc.nick or self.settings.get('nick', 'me')
+        chat.append_entry(nick, prefix + IRCClient.redact_message(target, text), kind)
+
+    def _on_irc_events(self, events, users):
+        """Apply one batch from the UI event pump: one append per tab, latest user lists."""
+        pending: dict[int, tuple[ChatPanel, list[tuple[str, str, str]], bool]] = {}
+        for kind, args in events:
+            if kind == "connection":
+                event = args[0]
+                self._on_irc_connection(event.state, event.detail)
+                continue
+            try:
+                if kind == "message":
+                    chat, entry = self._render_message(*args)
+                    # Mentions and private messages mark a hidden tab as highlighted
+                    highlight = args[1].highlight or args[1].private
+                elif kind == "status":
+                    chat, entry = self._render_status(*args)
+                    highlight = False
+                else:
+                    continue
+            except Exception:
+                continue
+            batch = pending.get(id(chat))
+            if batch is None:
+                pending[id(chat)] = (chat, [entry], highlight)
+            else:
+                batch[1].append(entry)
+                if highlight and not batch[2]:
+                    pending[id(chat)] = (chat, batch[1], True)
+        for chat, entries, highlight in pending.values():
+            chat.append_entries(entries, highlight)
+        for target, snapshot, deltas in users.values():
+            if snapshot is not None:
+                self._on_irc_users(target, snapshot.users, snapshot.prefixes, snapshot.symbols)
+            for delta in deltas:
+                self._on_irc_users_delta(target, delta.added, delta.removed, delta.renamed,
+                                         delta.modes)
+
+    def _refresh_classifier(self):
+        # Rebuild the notification snapshot used by the dispatcher thread after settings change
+        self._classifier = MessageClassifier(
+            self.settings, beeps_enabled=getattr(self, '_beeps_enabled', False),
+            tts=self._get_tts_cfg(), current_nick=lambda: self.irc.nick,
+        )
+        errors = self._classifier.matcher.errors
+        if errors and hasattr(self, 'notebook'):
+            self._on_irc_status("Ignoring invalid highlight regex: " + "; ".join(errors))
+
+    def _render_status(self, event: StatusEvent, cls: Classification):
         chat = self._chat_for_target("Console", create=True)
-        msg = text
-        if text.startswith("CTCP "):
-            msg = f"[CTCP] {text}"
-        chat.append_message(f"[status] {msg}")
-        self._handle_status_sound(text)
-        self._handle_status_tts(text)
-
-    def _on_irc_message(self, target: str, sender: str, text: str):
-        # Route to appropriate tab; for PMs, target is our nick → use sender
-        if target.lower() == (self.irc.nick or "").lower():
-            tab_target = sender
-        else:
-            tab_target = target
+        msg = event.text
+        if event.is_ctcp:
+            msg = f"[CTCP] {msg}"
+        self._notify(cls)
+        return chat, ("", f"[status] {msg}", cls.kind)
+
+    def _render_message(self, event: MessageEvent, cls: Classification):
+        # Route to appropriate tab; PMs arrive with tab_target set to the other party
+        tab_target = event.tab_target
         chat = self._chat_for_target(tab_target, create=True)
-        if sender == "*":
-            chat.append_message(f"* {text}")
-        else:
-            chat.append_message(f"{sender}: {text}")
 
         # Track last activity summary and surface it in the status bar
-        if text.startswith("[activity] "):
+        if cls.kind == KIND_ACTIVITY:
             if not hasattr(self, '_last_activity'):
                 self._last_activity = {}
-            self._last_activity[tab_target.lower()] = text
+            self._last_activity[tab_target.lower()] = event.text
             try:
-                self.SetStatusText(f"{tab_target}: {text}")
+                self.SetStatusText(f"{tab_target}: {event.text}")
             except Exception:
                 pass
 
-        self._handle_message_sound(target, sender, text)
-        self._handle_message_tts(target, sender, text)
-
-    def _handle_message_sound(self, target, sender, text):
-        # Optional sounds (safe no-op if files missing)
-        try:
-            snd_cfg = self.settings.get('sounds', {})
-            if snd_cfg.get('enabled'):
-                nick = self.settings.get('nick', '')
-                is_pm = target.lower() == (self.irc.nick or "").lower()
-                # Notices: play configured notice sound and skip regular message sound
-                if text.startswith('[notice] '):
-                    self._play_sound(snd_cfg.get('notice', ''))
-                elif not is_pm and nick and nick.lower() in text.lower():
-                    # Mentions only apply to channel messages
-                    self._play_sound(snd_cfg.get('mention', ''))
-                else:
-                    if is_pm:
-                        # Prefer private message sound, fallback to generic
-                        self._play_sound(snd_cfg.get('message_private', '') or snd_cfg.get('message', ''))
-                    else:
-                        # Prefer channel message sound, fallback to generic
-                        self._play_sound(snd_cfg.get('message_channel', '') or snd_cfg.get('message', ''))
-        except Exception:
-            pass
+        self._notify(cls)
+        return chat, (event.sender, event.text, cls.kind)
 
-        # Experimental beep on receive (skip activity summaries)
-        try:
-            if self._beeps_enabled and not text.startswith('[activity] '):
+    def _notify(self, cls: Classification):
+        # Sounds, beeps and speech were resolved by the classifier; just carry them out
+        if cls.sound:
+            try:
+                self._play_sound(cls.sound)
+            except Exception:
+                pass
+        if cls.beep:
+            try:
                 self._play_beep('recv')
-        except Exception:
-            pass
-
-    def _handle_message_tts(self, target, sender, text):
-        # Text-to-speech for incoming messages
-        try:
-            tts_cfg = self._get_tts_cfg()
-            if tts_cfg.get('enabled'):
-                nick = self.settings.get('nick', '')
-                is_pm = target.lower() == (self.irc.nick or "").lower()
-                # Notices: speak as notice when enabled
-                if text.startswith('[notice] ') and tts_cfg.get('events',{}).get('notice'):
-                    msg = text[len('[notice] '):]
-                    if is_pm:
-                        self._tts_speak(f"Notice from {sender}: {msg}")
-                    else:
-                        self._tts_speak(f"Notice from {sender} in {target}: {msg}")
-                # Mentions in channel
-                elif (not is_pm) and nick and nick.lower() in text.lower() and tts_cfg.get('events',{}).get('mention'):
-                    self._tts_speak(f"Mentioned by {sender} in {target}: {text}")
-                elif is_pm and tts_cfg.get('events',{}).get('private_message'):
-                    self._tts_speak(f"Private message from {sender}: {text}")
-                elif (not is_pm) and tts_cfg.get('events',{}).get('channel_message'):
-                    self._tts_speak(f"{sender} in {target}: {text}")
-        except Exception:
-            pass
-
-    def _handle_status_sound(self, text):
-        # Play notice sound only for NOTICEs, never for CTCP, to avoid spam
-        try:
-            if self.settings.get('sounds',{}).get('enabled'):
-                is_notice = text.startswith("NOTICE from ")
-                is_ctcp = text.startswith("CTCP ")
-                if is_notice and not is_ctcp:
-                    self._play_sound(self.settings.get('sounds',{}).get('notice',''))
-        except Exception:
-            pass
+            except Exception:
+                pass
+        if cls.speech:
+            try:
+                self._tts_speak(cls.speech)
+            except Exception:
+                pass
 
-    def _handle_status_tts(self, text):
-        # TTS for notices
-        try:
-            tts_cfg = self._get_tts_cfg()
-            if tts_cfg.get('enabled') and tts_cfg.get('events',{}).get('notice'):
-                is_notice = text.startswith("NOTICE from ")
-                is_ctcp = text.startswith("CTCP ")
-                if is_notice and not is_ctcp:
-                    speak_text = text
-                    self._tts_speak(speak_text)
-        except Exception:
-            pass
 
 
+    def _on_irc_users(self, target: str, users: list[str], prefixes: dict[str, str] | None = None,
+                      symbols: str | None = None):
+        chat = self._chat_for_target(target, create=True)
+        chat.set_users(users, prefixes, symbols)
 
-    def _on_irc_users(self, target: str, users: list[str]):
+    def _on_irc_users_delta(self, target: str, added: list[str], removed: list[str],
+                            renamed: list[tuple[str, str]],
+                            modes: list[tuple[str, str]] | None = None):
         chat = self._chat_for_target(target, create=True)
-        chat.set_users(users)
+        chat.apply_user_delta(added, removed, renamed, modes)
 
     # Read last activity summary action
     def _on_read_last_activity(self, evt):
         idx = self.notebook.GetSelection()
         if idx == wx.NOT_FOUND:
             return
-        target = self.notebook.GetPageText(idx)
+        target = self.notebook.GetPage(idx).title
         last = getattr(self, '_last_activity', {}).get(target.lower())
         if last:
             try:
                 self.SetStatusText(f"{target}: {last}")
             except Exception:
                 pass
-            # Also echo to transcript to ensure it's read without moving focus
+            # Also echo to transcript to ensure it's read without moving focus;
+            # only on screen, since it repeats a line already in the history
             chat = self.notebook.GetPage(idx)
-            chat.append_message(f"* {last}")
+            chat.echo(f"* {last}")
 
     def _on_test_sounds(self, evt):
         # Diagnostic: report and attempt to play configured sounds
@@ -1867,6 +2226,11 @@ class MainFrame(wx.Frame):
     def Destroy(self):
         try:
             self._unbind_events()
+            self._store.close()
+            if self._log_writer is not None:
+                self._log_writer.close()
+            if self._search_index is not None:
+                self._search_index.close()
             # Save window geometry and open tabs
             try:
                 size = self.GetSize(); pos = self.GetPosition()
@@ -1931,32 +2295,10 @@ class MainFrame(wx.Frame):
             pass
 
     # User list interactions
-    def _on_user_list_dclick(self, evt, tab_title: str):
+    def _on_user_list_activate(self, nick: str):
         try:
-            lb = evt.GetEventObject()
-            sel = lb.GetSelection()
-            if sel != wx.NOT_FOUND:
-                nick = lb.GetString(sel)
-                pm = self._chat_for_target(nick, create=True)
-                pm.focus_input()
+            pm = self._chat_for_target(nick, create=True, select=True)
+            self._select_chat(pm)
+            pm.focus_input()
         except Exception:
             pass
-
-    def _on_user_list_key(self, evt, tab_title: str):
-        try:
-            key = evt.GetKeyCode()
-            if key in (wx.WXK_RETURN, wx.WXK_NUMPAD_ENTER):
-                lb = evt.GetEventObject()
-                sel = lb.GetSelection()
-                if sel != wx.NOT_FOUND:
-                    nick = lb.GetString(sel)
-                    pm = self._chat_for_target(nick, create=True)
-                    pm.focus_input()
-                    return  # handled
-            # Not handled; propagate
-            evt.Skip()
-        except Exception:
-            try:
-                evt.Skip()
-            except Exception:
-                pass
@@ -37,6 +37,10 @@ class PreferencesDialog(wx.Dialog):
         self.choice_theme.SetName("Theme choice")
         self.choice_theme.SetToolTip("Choose a light or dark theme, or follow the system")
 
+        self.spin_scrollback = wx.SpinCtrl(p_app, min=100, max=1000000, initial=int(app.get('scrollback_lines', 5000)))
+        self.spin_scrollback.SetName("Scrollback lines per tab")
+        self.spin_scrollback.SetToolTip("Oldest lines are removed from a tab's transcript beyond this many")
+
         # --- CTCP ---
         ctcp = self._settings.get('ctcp', {})
         self.chk_ctcp_version = wx.CheckBox(p_ctcp, label="Auto-respond to CTCP VERSION")
@@ -189,7 +193,7 @@ class PreferencesDialog(wx.Dialog):
         # Layout per tab
         # Appearance
         s_app = wx.BoxSizer(wx.VERTICAL)
-        help_app = wx.StaticText(p_app, label="Choose theme and whether to show timestamps in chat.")
+        help_app = wx.StaticText(p_app, label="Choose theme, whether to show timestamps in chat, and how much history each tab keeps.")
         try:
             help_app.SetForegroundColour(wx.Colour(90, 90, 90))
             f = help_app.GetFont()
@@ -203,6 +207,10 @@ class PreferencesDialog(wx.Dialog):
         rowt.Add(self.choice_theme, 0)
         s_app.Add(rowt, 0, wx.EXPAND | wx.ALL, 6)
         s_app.Add(self.chk_timestamps, 0, wx.ALL, 6)
+        row_sb = wx.BoxSizer(wx.HORIZONTAL)
+        row_sb.Add(wx.StaticText(p_app, label="Scrollback lines per tab:"), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 6)
+        row_sb.Add(self.spin_scrollback, 0)
+        s_app.Add(row_sb, 0, wx.EXPAND | wx.ALL, 6)
         p_app.SetSizer(s_app)
 
         # Identity
@@ -1005,6 +1013,7 @@ class PreferencesDialog(wx.Dialog):
             'appearance': {
                 'timestamps': self.chk_timestamps.GetValue(),
                 'theme': ["system", "light", "dark"][max(0, self.choice_theme.GetSelection())],
+                'scrollback_lines': int(self.spin_scrollback.GetValue()),
             },
             'ctcp': {
                 'respond_to_ctcp_version': self.chk_ctcp_version.GetValue(),
@@ -1019,6 +1028,8 @@ class PreferencesDialog(wx.Dialog):
                 'notices_inline': self.chk_notices_inline.GetValue(),
             },
             'connection': {
+                # Keep connection settings that are not exposed in this dialog
+                **(self._settings.get('connection', {}) or {}),
                 'tcp_keepalive_enabled': self.chk_tcp_keepalive.GetValue(),
                 'tcp_keepalive_idle': int(self.spin_tcp_idle.GetValue()),
                 'tcp_keepalive_interval': int(self.spin_tcp_interval.GetValue()),
@@ -0,0 +1,204 @@
+import time
+
+import wx
+
+from ..search import SearchHit, parse_date, parse_query
+from .chat_panel import format_entry
+
+
+class SearchDialog(wx.Dialog):
+    """Search the chat logs and pick a result to jump to.
+
+    Results are ranked best match first. Selecting one shows the lines
+    around it; "Go to" closes the dialog with `selected` set. The network
+    filter starts at `network` (the current connection); clearing it
+    searches every network.
+    """
+
+    def __init__(self, parent, index, query: str = "", network: str = "", limit: int = 200):
+        super().__init__(parent, title="Search Logs",
+                         style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        self.SetName("Search logs dialog")
+        self._index = index
+        self._limit = limit
+        self._hits: list[SearchHit] = []
+        q = parse_query(query)
+
+        terms_label = wx.StaticText(self, label="Search for:")
+        self.terms_ctrl = wx.TextCtrl(self, value=q["terms"], style=wx.TE_PROCESS_ENTER)
+        self.terms_ctrl.SetName("Search terms field")
+        self.terms_ctrl.SetToolTip(
+            'Words to find; use "quotes" for a phrase and a trailing * for a prefix'
+        )
+
+        network_label = wx.StaticText(self, label="Network (empty for all):")
+        self.network_ctrl = wx.TextCtrl(self, value=network, style=wx.TE_PROCESS_ENTER)
+        self.network_ctrl.SetName("Network filter field")
+        self.network_ctrl.SetToolTip(
+            "Only search logs from this network; clear it to search all networks"
+        )
+
+        target_label = wx.StaticText(self, label="Channel or query (optional):")
+        self.target_ctrl = wx.TextCtrl(self, value=q["target"], style=wx.TE_PROCESS_ENTER)
+        self.target_ctrl.SetName("Channel filter field")
+        self.target_ctrl.SetToolTip("Only search this channel or private conversation")
+
+        sender_label = wx.StaticText(self, label="Nick (optional):")
+        self.sender_ctrl = wx.TextCtrl(self, value=q["sender"], style=wx.TE_PROCESS_ENTER)
+        self.sender_ctrl.SetName("Nick filter field")
+        self.sender_ctrl.SetToolTip("Only search lines sent by this nick")
+
+        since_label = wx.StaticText(self, label="From date (YYYY-MM-DD, optional):")
+        self.since_ctrl = wx.TextCtrl(self, value=q["since"], style=wx.TE_PROCESS_ENTER)
+        self.since_ctrl.SetName("From date field")
+        self.since_ctrl.SetToolTip("Only search lines on or after this date")
+
+        until_label = wx.StaticText(self, label="To date (YYYY-MM-DD, optional):")
+        self.until_ctrl = wx.TextCtrl(self, value=q["until"], style=wx.TE_PROCESS_ENTER)
+        self.until_ctrl.SetName("To date field")
+        self.until_ctrl.SetToolTip("Only search lines on or before this date")
+
+        btn_search = wx.Button(self, label="&Search")
+        btn_search.SetName("Search button")
+        btn_search.SetToolTip("Run the search")
+        btn_search.SetDefault()
+
+        self.status_label = wx.StaticText(self, label="")
+        self.status_label.SetName("Search status")
+
+        self.results = wx.ListCtrl(self, style=wx.LC_REPORT | wx.LC_SINGLE_SEL)
+        self.results.SetName("Search results list")
+        self.results.SetToolTip(
+            "Matching lines, best first. Press Enter to go to the selected line."
+        )
+        self.results.InsertColumn(0, "Date", width=130)
+        self.results.InsertColumn(1, "Network", width=110)
+        self.results.InsertColumn(2, "Channel", width=110)
+        self.results.InsertColumn(3, "Nick", width=100)
+        self.results.InsertColumn(4, "Message", width=330)
+
+        style = wx.TE_MULTILINE | wx.TE_READONLY | wx.TE_DONTWRAP
+        self.context_ctrl = wx.TextCtrl(self, style=style, size=(-1, 120))
+        self.context_ctrl.SetName("Result context")
+        self.context_ctrl.SetToolTip("Lines around the selected result")
+
+        self.btn_goto = wx.Button(self, wx.ID_OK, "&Go to")
+        self.btn_goto.SetName("Go to button")
+        self.btn_goto.SetToolTip("Open the conversation and select this line")
+        self.btn_goto.Enable(False)
+
+        btn_close = wx.Button(self, wx.ID_CANCEL, "Close")
+        btn_close.SetName("Close button")
+        btn_close.SetToolTip("Close this dialog")
+
+        grid = wx.FlexGridSizer(0, 2, 6, 6)
+        grid.AddGrowableCol(1, 1)
+        for label, ctrl in (
+            (terms_label, self.terms_ctrl),
+            (network_label, self.network_ctrl),
+            (target_label, self.target_ctrl),
+            (sender_label, self.sender_ctrl),
+            (since_label, self.since_ctrl),
+            (until_label, self.until_ctrl),
+        ):
+            grid.Add(label, 0, wx.ALIGN_CENTER_VERTICAL)
+            grid.Add(ctrl, 1, wx.EXPAND)
+
+        row = wx.BoxSizer(wx.HORIZONTAL)
+        row.Add(btn_search, 0, wx.RIGHT, 12)
+        row.Add(self.status_label, 1, wx.ALIGN_CENTER_VERTICAL)
+
+        btns = wx.BoxSizer(wx.HORIZONTAL)
+        btns.Add(self.btn_goto, 0, wx.RIGHT, 6)
+        btns.Add(btn_close, 0)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(grid, 0, wx.EXPAND | wx.ALL, 8)
+        sizer.Add(row, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 8)
+        sizer.Add(self.results, 1, wx.EXPAND | wx.ALL, 8)
+        sizer.Add(wx.StaticText(self, label="Context:"), 0, wx.LEFT | wx.RIGHT, 8)
+        sizer.Add(self.context_ctrl, 0, wx.EXPAND | wx.ALL, 8)
+        sizer.Add(btns, 0, wx.ALIGN_RIGHT | wx.ALL, 8)
+        self.SetSizerAndFit(sizer)
+        self.SetSize((760, 620))
+
+        self.Bind(wx.EVT_BUTTON, self._on_search, btn_search)
+        for ctrl in (self.terms_ctrl, self.network_ctrl, self.target_ctrl, self.sender_ctrl,
+                     self.since_ctrl, self.until_ctrl):
+            ctrl.Bind(wx.EVT_TEXT_ENTER, self._on_search)
+        self.results.Bind(wx.EVT_LIST_ITEM_SELECTED, self._on_result_selected)
+        self.results.Bind(wx.EVT_LIST_ITEM_ACTIVATED, lambda evt: self.EndModal(wx.ID_OK))
+
+        self.terms_ctrl.SetFocus()
+        if query.strip():
+            wx.CallAfter(self._run_search)
+
+    def _on_search(self, evt):
+        self._run_search()
+
+    def _run_search(self):
+        since_text = self.since_ctrl.GetValue().strip()
+        until_text = self.until_ctrl.GetValue().strip()
+        since = parse_date(since_text)
+        until = parse_date(until_text, end=True)
+        if (since_text and since is None) or (until_text and until is None):
+            self.status_label.SetLabel("Dates must look like 2024-05-31")
+            return
+        started = time.perf_counter()
+        try:
+            hits = self._index.search(
+                self.terms_ctrl.GetValue(),
+                target=self.target_ctrl.GetValue().strip() or None,
+                sender=self.sender_ctrl.GetValue().strip() or None,
+                network=self.network_ctrl.GetValue().strip() or None,
+                since=since,
+                until=until,
+                limit=self._limit,
+            )
+        except Exception as e:
+            self.status_label.SetLabel(f"Search failed: {e}")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        self._hits = hits
+        self.results.Freeze()
+        try:
+            self.results.DeleteAllItems()
+            for i, hit in enumerate(hits):
+                self.results.InsertItem(i, time.strftime("%Y-%m-%d %H:%M", time.localtime(hit.ts)))
+                self.results.SetItem(i, 1, hit.network)
+                self.results.SetItem(i, 2, hit.target)
+                self.results.SetItem(i, 3, hit.sender)
+                self.results.SetItem(i, 4, hit.snippet)
+        finally:
+            self.results.Thaw()
+        self.context_ctrl.SetValue("")
+        self.btn_goto.Enable(False)
+        more = "+" if len(hits) >= self._limit else ""
+        self.status_label.SetLabel(f"{len(hits)}{more} result(s) in {elapsed:.0f} ms")
+        if hits:
+            self.results.Select(0)
+            self.results.Focus(0)
+            self.results.SetFocus()
+
+    def _on_result_selected(self, evt):
+        hit = self.selected
+        self.btn_goto.Enable(hit is not None)
+        if hit is None:
+            return
+        try:
+            lines = self._index.context(hit.id)
+        except Exception:
+            lines = [hit]
+        text = []
+        for line in lines:
+            mark = ">" if line.id == hit.id else " "
+            stamp = time.strftime('%H:%M', time.localtime(line.ts))
+            text.append(f"{mark} {stamp} {format_entry(line.sender, line.text)}")
+        self.context_ctrl.SetValue("\n".join(text))
+
+    @property
+    def selected(self) -> SearchHit | None:
+        idx = self.results.GetFirstSelected()
+        if idx == wx.NOT_FOUND or idx >= len(self._hits):
+            return None
+        return self._hits[idx]
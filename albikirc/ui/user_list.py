@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+
+import wx
+
+from ..membership import nick_key
+
+
+class UserListCtrl(wx.ListCtrl):
+    """Virtual channel user list.
+
+    Rows are drawn on demand from a sorted model of `(rank, nick_key)`
+    entries, so joins, parts and mode changes are a binary search plus one
+    list insert/delete and a refresh of the rows that moved; nothing is
+    re-created. Members are grouped by their highest status prefix (ops,
+    then voices, then everyone else) and shown with that prefix. A filter
+    narrows the rows to nicks containing the given text.
+
+    While the list is not live (its tab is hidden) the model keeps updating
+    but nothing is redrawn; `set_live(True)` brings the display up to date
+    in one refresh.
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent,
+                         style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_NO_HEADER | wx.LC_SINGLE_SEL)
+        self.InsertColumn(0, "Nick")
+        self._symbols = "@+"
+        self._rows: list[tuple[int, str]] = []
+        self._nicks: dict[str, str] = {}
+        self._prefixes: dict[str, str] = {}
+        self._filter = ""
+        # Row indexes into _rows while a filter is active
+        self._view: list[int] | None = None
+        self._view_pending = False
+        self._live = True
+        self._stale = False
+        self.Bind(wx.EVT_SIZE, self._on_size)
+
+    # wx.ListCtrl virtual hook
+    def OnGetItemText(self, item, column):
+        nick = self.nick_at(item)
+        if nick is None:
+            return ""
+        prefix = self._prefixes.get(nick_key(nick), "")
+        return (prefix[:1] + nick) if prefix else nick
+
+    # Model
+    def _rank(self, prefix: str) -> int:
+        symbols = self._symbols
+        ranks = [symbols.index(s) for s in prefix if s in symbols]
+        return min(ranks) if ranks else len(symbols)
+
+    def _row(self, key: str) -> tuple[int, str]:
+        return (self._rank(self._prefixes.get(key, "")), key)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def nick_at(self, index: int) -> str | None:
+        if self._view is not None:
+            if not 0 <= index < len(self._view):
+                return None
+            index = self._view[index]
+        if not 0 <= index < len(self._rows):
+            return None
+        return self._nicks.get(self._rows[index][1])
+
+    def selected_nick(self) -> str | None:
+        index = self.GetFirstSelected()
+        return self.nick_at(index) if index != -1 else None
+
+    def set_users(self, users: list[str], prefixes: dict[str, str] | None = None,
+                  symbols: str | None = None):
+        if symbols is not None:
+            self._symbols = symbols
+        self._nicks = {nick_key(u): u for u in users}
+        self._prefixes = {nick_key(n): p for n, p in (prefixes or {}).items() if p}
+        self._rows = sorted(self._row(k) for k in self._nicks)
+        self._refresh_all()
+
+    def apply_delta(self, added=(), removed=(), renamed=(), modes=()):
+        for old, new in renamed:
+            prefix = self._prefixes.get(nick_key(old), "")
+            self._remove(old)
+            self._insert(new, prefix)
+        for nick in removed:
+            self._remove(nick)
+        for nick in added:
+            self._insert(nick, self._prefixes.get(nick_key(nick), ""))
+        for nick, prefix in modes:
+            # Re-file the member under its new group
+            if nick_key(nick) in self._nicks:
+                self._remove(nick)
+                self._insert(nick, prefix)
+
+    def _insert(self, nick: str, prefix: str = ""):
+        key = nick_key(nick)
+        if key in self._nicks:
+            self._nicks[key] = nick
+            index = bisect_left(self._rows, self._row(key))
+            self._refresh_rows(index, index)
+            return
+        self._nicks[key] = nick
+        if prefix:
+            self._prefixes[key] = prefix
+        else:
+            self._prefixes.pop(key, None)
+        row = self._row(key)
+        index = bisect_left(self._rows, row)
+        self._rows.insert(index, row)
+        self._refresh_rows(index, len(self._rows) - 1, count_changed=True)
+
+    def _remove(self, nick: str):
+        key = nick_key(nick)
+        if key not in self._nicks:
+            return
+        row = self._row(key)
+        index = bisect_left(self._rows, row)
+        if index < len(self._rows) and self._rows[index] == row:
+            del self._rows[index]
+        del self._nicks[key]
+        self._prefixes.pop(key, None)
+        self._refresh_rows(index, len(self._rows), count_changed=True)
+
+    def set_live(self, live: bool):
+        self._live = bool(live)
+        if self._live and self._stale:
+            self._refresh_all()
+
+    # Filtering
+    def set_filter(self, text: str):
+        self._filter = (text or "").strip().lower()
+        self._refresh_all()
+
+    def _rebuild_view(self):
+        self._view_pending = False
+        if not self._filter:
+            self._view = None
+            return
+        needle = self._filter
+        self._view = [i for i, (_, key) in enumerate(self._rows) if needle in key]
+
+    def _flush_view(self):
+        if not self._view_pending:
+            return
+        try:
+            self._refresh_all()
+        except Exception:
+            # The tab may have been closed before this ran
+            pass
+
+    # Display updates
+    def _refresh_all(self):
+        if not self._live:
+            self._stale = True
+            return
+        self._stale = False
+        self._rebuild_view()
+        self.SetItemCount(len(self._view) if self._view is not None else len(self._rows))
+        self.Refresh()
+
+    def _refresh_rows(self, first: int, last: int, count_changed: bool = False):
+        if not self._live:
+            self._stale = True
+            return
+        if self._filter:
+            # Filtered indexes all shift; rebuild once per batch of changes
+            if not self._view_pending:
+                self._view_pending = True
+                wx.CallAfter(self._flush_view)
+            return
+        if count_changed:
+            self.SetItemCount(len(self._rows))
+        last = min(last, len(self._rows) - 1)
+        if first <= last:
+            self.RefreshItems(first, last)
+
+    def _on_size(self, evt):
+        try:
+            self.SetColumnWidth(0, max(60, self.GetClientSize().width - 4))
+        except Exception:
+            pass
+        evt.Skip()
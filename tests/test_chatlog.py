@@ -0,0 +1,77 @@
+import gzip
+import time
+
+from albikirc.chatlog import LogCursor, LogWriter, format_line, parse_line, target_dir
+from albikirc.classify import KIND_CHANNEL
+
+
+def write_day(root, day, rows, compress=False):
+    directory = target_dir(root, "net", "#a")
+    directory.mkdir(parents=True, exist_ok=True)
+    data = "".join(format_line(ts, sender, text, KIND_CHANNEL) for ts, sender, text in rows).encode("utf-8")
+    if compress:
+        path = directory / f"{day}.log.gz"
+        path.write_bytes(gzip.compress(data))
+    else:
+        path = directory / f"{day}.log"
+        with open(path, "ab") as fh:
+            fh.write(data)
+    return path
+
+
+def rows(first, n):
+    return [(1_700_000_000.0 + i, f"nick{i}", f"line {i}") for i in range(first, first + n)]
+
+
+def test_format_and_parse_round_trip():
+    line = format_line(1_700_000_000.5, "al", "tab\there\nnew\\line", KIND_CHANNEL)
+    assert line.endswith("\n") and line.count("\n") == 1
+    ts, sender, text, kind = parse_line(line.rstrip("\n"))
+    assert (sender, text, kind) == ("al", "tab\there\nnew\\line", KIND_CHANNEL)
+    assert abs(ts - 1_700_000_000.5) < 1
+    assert parse_line("garbage") is None
+
+
+def test_cursor_pages_back_across_plain_and_compressed_days(tmp_path):
+    write_day(tmp_path, "2024-01-01", rows(0, 5), compress=True)
+    write_day(tmp_path, "2024-01-02", rows(5, 5))
+    cursor = LogCursor(tmp_path, "net", "#a")
+    assert [text for _, _, text, _ in cursor.older(3)] == ["line 7", "line 8", "line 9"]
+    assert [text for _, _, text, _ in cursor.older(4)] == ["line 3", "line 4", "line 5", "line 6"]
+    assert [text for _, _, text, _ in cursor.older(10)] == ["line 0", "line 1", "line 2"]
+    assert cursor.older(10) == []
+    assert cursor.exhausted
+
+
+def test_cursor_ignores_lines_written_after_creation(tmp_path):
+    write_day(tmp_path, "2024-01-02", rows(0, 3))
+    cursor = LogCursor(tmp_path, "net", "#a")
+    write_day(tmp_path, "2024-01-02", rows(3, 3))
+    assert [text for _, _, text, _ in cursor.older(10)] == ["line 0", "line 1", "line 2"]
+
+
+def test_cursor_follows_a_day_compressed_after_creation(tmp_path):
+    now = time.time()
+    old = [(now - 30, "al", "before 0"), (now - 20, "al", "before 1")]
+    path = write_day(tmp_path, "2024-01-02", old)
+    cursor = LogCursor(tmp_path, "net", "#a")
+    # A later line lands, then the day is compressed and the plain file removed
+    late = [(now + 60, "al", "after")]
+    write_day(tmp_path, "2024-01-02", late)
+    path.with_name(path.name + ".gz").write_bytes(gzip.compress(path.read_bytes()))
+    path.unlink()
+    assert [text for _, _, text, _ in cursor.older(10)] == ["before 0", "before 1"]
+
+
+def test_writer_writes_one_file_per_target_and_day(tmp_path):
+    writer = LogWriter(tmp_path, compress=None, flush_interval=0.05)
+    writer.start()
+    try:
+        writer.write("net", "#a", [(1_700_000_000.0, "al", "hello", KIND_CHANNEL)])
+        writer.write("net", "#B", [(None, "bo", "hi", KIND_CHANNEL)])
+        assert writer.flush()
+        assert writer.written == 2
+    finally:
+        writer.close()
+    assert [text for _, _, text, _ in LogCursor(tmp_path, "net", "#a").older(5)] == ["hello"]
+    assert [text for _, _, text, _ in LogCursor(tmp_path, "NET", "#b").older(5)] == ["hi"]
@@ -0,0 +1,69 @@
+import threading
+import time
+
+from albikirc.dispatch import EventDispatcher
+from albikirc.event_bus import EventBus
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_events_are_published_in_order():
+    bus = EventBus()
+    got = []
+    bus.subscribe("t", got.append)
+    dispatcher = EventDispatcher(bus)
+    for i in range(1000):
+        dispatcher.submit("t", i)
+    assert wait_for(lambda: len(got) == 1000)
+    assert got == list(range(1000))
+
+
+def test_submit_does_not_block_on_a_full_async_bus_queue():
+    bus = EventBus()
+    release = threading.Event()
+    got = []
+
+    def slow(event):
+        release.wait(5)
+        got.append(event)
+
+    bus.subscribe("t", slow)
+    bus.configure_topic("t", maxsize=2)  # default BLOCK policy
+    bus.start_async(1)
+    try:
+        dispatcher = EventDispatcher(bus)
+        started = time.monotonic()
+        for i in range(20):
+            dispatcher.submit("t", i)
+        assert time.monotonic() - started < 0.5
+        release.set()
+        assert wait_for(lambda: len(got) == 20)
+        assert got == list(range(20))
+    finally:
+        release.set()
+        bus.stop_async()
+
+
+def test_queue_is_bounded_and_drops_oldest():
+    bus = EventBus()
+    release = threading.Event()
+    got = []
+    bus.subscribe("t", lambda e: (release.wait(5), got.append(e)))
+    dispatcher = EventDispatcher(bus, maxsize=10)
+    dispatcher.submit("t", -1)
+    assert wait_for(lambda: dispatcher.pending() == 0)  # -1 is being delivered
+    for i in range(50):
+        dispatcher.submit("t", i)
+    assert dispatcher.pending() == 10
+    assert dispatcher.dropped == 40
+    assert dispatcher.dropped_by_topic == {"t": 40}
+    release.set()
+    assert wait_for(lambda: len(got) == 11)
+    assert got == [-1] + list(range(40, 50))
@@ -0,0 +1,107 @@
+import threading
+import time
+
+from albikirc.event_bus import COALESCE_LATEST, DROP_OLDEST, EventBus
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_sync_publish_calls_subscribers_in_order():
+    bus = EventBus()
+    got = []
+    bus.subscribe("t", lambda x: got.append(("a", x)))
+    cb = bus.subscribe("t", lambda x: got.append(("b", x)))
+    bus.publish("t", 1)
+    bus.unsubscribe("t", cb)
+    bus.publish("t", 2)
+    assert got == [("a", 1), ("b", 1), ("a", 2)]
+
+
+def test_subscriber_errors_are_isolated_and_counted():
+    bus = EventBus()
+    got = []
+
+    def broken(x):
+        raise RuntimeError("boom")
+
+    bus.subscribe("t", broken)
+    bus.subscribe("t", got.append)
+    bus.publish("t", 1)
+    assert got == [1]
+    stats = bus.stats_snapshot()["t"]
+    assert stats["published"] == 1
+    errors = {h["name"].rsplit(".", 1)[-1]: h["errors"] for h in stats["handlers"]}
+    assert errors["broken"] == 1
+    assert "boom" in next(h["last_error"] for h in stats["handlers"] if h["errors"])
+
+
+def test_async_delivery_keeps_topic_order():
+    bus = EventBus()
+    got = []
+    bus.subscribe("t", got.append)
+    bus.start_async(2)
+    try:
+        for i in range(500):
+            bus.publish("t", i)
+        assert wait_for(lambda: len(got) == 500)
+        assert got == list(range(500))
+    finally:
+        bus.stop_async()
+
+
+def block_first(bus, topic, got):
+    release = threading.Event()
+    started = threading.Event()
+
+    def handler(x):
+        started.set()
+        release.wait(5)
+        got.append(x)
+
+    bus.subscribe(topic, handler)
+    bus.publish(topic, "first")
+    assert started.wait(5)
+    return release
+
+
+def test_drop_oldest_policy_keeps_newest():
+    bus = EventBus()
+    got = []
+    bus.configure_topic("t", policy=DROP_OLDEST, maxsize=3)
+    bus.start_async(1)
+    try:
+        release = block_first(bus, "t", got)
+        for i in range(10):
+            bus.publish("t", i)
+        assert bus.queue_depth("t") == 3
+        release.set()
+        assert wait_for(lambda: len(got) == 4)
+        assert got == ["first", 7, 8, 9]
+        assert bus.stats_snapshot()["t"]["dropped"] == 7
+    finally:
+        bus.stop_async()
+
+
+def test_coalesce_latest_keeps_one_event_per_key():
+    bus = EventBus()
+    got = []
+    bus.configure_topic("t", policy=COALESCE_LATEST, key=lambda x: x[0] if isinstance(x, tuple) else x)
+    bus.start_async(1)
+    try:
+        release = block_first(bus, "t", got)
+        for i in range(5):
+            bus.publish("t", ("a", i))
+            bus.publish("t", ("b", i))
+        assert bus.queue_depth("t") == 2
+        release.set()
+        assert wait_for(lambda: len(got) == 3)
+        assert got == ["first", ("a", 4), ("b", 4)]
+    finally:
+        bus.stop_async()
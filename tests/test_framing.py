@@ -0,0 +1,65 @@
+from albikirc.framing import LineFramer
+
+
+class ChunkSocket:
+    """Feeds pre-split chunks to `recv_into`, one per call."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def recv_into(self, view, nbytes):
+        if not self.chunks:
+            return 0
+        chunk = self.chunks.pop(0)
+        assert len(chunk) <= nbytes
+        view[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def read_all(framer, chunks):
+    sock = ChunkSocket(chunks)
+    out = []
+    while framer.recv_into(sock):
+        out.extend(framer.lines())
+    return out
+
+
+def test_crlf_and_bare_lf():
+    framer = LineFramer()
+    assert read_all(framer, [b"PING :a\r\nPING :b\nPART"]) == [b"PING :a", b"PING :b"]
+    assert framer.pending() == 4
+
+
+def test_line_split_across_reads():
+    framer = LineFramer()
+    assert read_all(framer, [b"PRIV", b"MSG #a :hi\r", b"\n"]) == [b"PRIVMSG #a :hi"]
+
+
+def test_max_length_line_with_crlf_split_across_reads():
+    framer = LineFramer(max_line_length=512, recv_size=512)
+    line = b"x" * 512
+    assert read_all(framer, [line[:300], line[300:] + b"\r", b"\nNEXT\r\n"]) == [line, b"NEXT"]
+    assert framer.dropped == 0
+
+
+def test_every_chunk_boundary_keeps_max_length_lines():
+    framer_len = 512
+    data = (b"a" * framer_len + b"\r\n") * 3 + b"end\r\n"
+    for cut in range(1, len(data)):
+        framer = LineFramer(max_line_length=framer_len, recv_size=2048)
+        lines = read_all(framer, [data[:cut], data[cut:]])
+        assert lines == [b"a" * framer_len] * 3 + [b"end"], cut
+        assert framer.dropped == 0
+
+
+def test_oversized_line_is_dropped_and_resyncs():
+    framer = LineFramer(max_line_length=512, recv_size=512)
+    chunks = [b"y" * 512, b"y" * 100, b"y" * 10 + b"\r\nOK\r\n"]
+    assert read_all(framer, chunks) == [b"OK"]
+    assert framer.dropped == 1
+
+
+def test_oversized_complete_line_is_dropped():
+    framer = LineFramer(max_line_length=512)
+    assert read_all(framer, [b"z" * 600 + b"\r\nOK\n"]) == [b"OK"]
+    assert framer.dropped == 1
@@ -0,0 +1,53 @@
+from albikirc.highlight import HighlightMatcher
+
+
+def make_matcher():
+    return HighlightMatcher(
+        nicks=["al", "[bot]"],
+        keywords=["deploy", "deploy now"],
+        regexes=[r"build #\d+ failed", "("],
+        channels={"#ops": {"keywords": ["pager"]}},
+    )
+
+
+def test_nicks_match_whole_words_only():
+    m = make_matcher()
+    assert m.matches("hey al, ping")
+    assert not m.matches("also almost")
+    assert m.matches("[bot]: status")
+
+
+def test_matches_agrees_with_find():
+    m = make_matcher()
+    samples = [
+        "nothing here",
+        "please deploy now",
+        "build #12 failed again",
+        "AL?",
+        "pager duty",
+        "",
+    ]
+    for text in samples:
+        for channel in (None, "#ops", "#other"):
+            assert m.matches(text, channel) == bool(m.find(text, channel)), (text, channel)
+
+
+def test_channel_rules_add_to_global_rules():
+    m = make_matcher()
+    assert m.matches("pager went off", "#OPS")
+    assert not m.matches("pager went off", "#other")
+    assert m.matches("deploy", "#ops")
+
+
+def test_find_returns_spans_in_text_order():
+    m = make_matcher()
+    text = "al: deploy now"
+    spans = m.find(text)
+    assert spans == sorted(spans)
+    found = {text[s:e] for s, e, _ in spans}
+    assert {"al", "deploy now"} <= found
+
+
+def test_invalid_regex_is_reported_and_skipped():
+    m = make_matcher()
+    assert m.errors and m.errors[0].startswith("(")
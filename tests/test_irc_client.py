@@ -0,0 +1,22 @@
+from albikirc.irc_client import IRCClient
+
+
+def test_redact_message_masks_nickserv_credentials():
+    redact = IRCClient.redact_message
+    assert redact("NickServ", "IDENTIFY hunter2") == "IDENTIFY ***"
+    assert redact("nickserv", "identify al hunter2") == "identify ***"
+    assert redact("NickServ", "REGISTER hunter2 al@example.org") == "REGISTER ***"
+    assert redact("NickServ", "GHOST al hunter2") == "GHOST ***"
+    assert redact("NickServ", "INFO al") == "INFO al"
+    assert redact("#chan", "IDENTIFY hunter2") == "IDENTIFY hunter2"
+
+
+def test_redact_raw_masks_outbound_secrets():
+    redact = IRCClient._redact_raw
+    assert redact("PASS hunter2") == "PASS ***"
+    assert redact("OPER al hunter2") == "OPER ***"
+    assert redact("AUTHENTICATE PLAIN") == "AUTHENTICATE PLAIN"
+    assert redact("AUTHENTICATE YWwAYWwAaHVudGVyMg==") == "AUTHENTICATE ***"
+    assert redact("PRIVMSG NickServ :IDENTIFY hunter2") == "PRIVMSG NickServ :IDENTIFY ***"
+    assert redact("NS IDENTIFY hunter2") == "NS IDENTIFY ***"
+    assert redact("PRIVMSG #chan :IDENTIFY hunter2") == "PRIVMSG #chan :IDENTIFY hunter2"
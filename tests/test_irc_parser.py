@@ -0,0 +1,44 @@
+from albikirc.irc_parser import parse_line, parse_tags
+
+
+def test_source_command_and_trailing_param():
+    msg = parse_line(":al!~al@host.example PRIVMSG #chan :hello there")
+    assert msg.command == "PRIVMSG"
+    assert msg.params == ["#chan", "hello there"]
+    assert (msg.nick, msg.user, msg.host) == ("al", "~al", "host.example")
+
+
+def test_server_source_and_no_trailing():
+    msg = parse_line(":irc.example 001 al Welcome")
+    assert msg.command == "001"
+    assert msg.params == ["al", "Welcome"]
+    assert (msg.nick, msg.user, msg.host) == ("irc.example", None, None)
+    assert parse_line("ping :token").command == "PING"
+
+
+def test_empty_trailing_and_colon_inside_it():
+    msg = parse_line("PRIVMSG #chan :")
+    assert msg.params == ["#chan", ""]
+    assert parse_line("PRIVMSG #chan :a :b").params == ["#chan", "a :b"]
+
+
+def test_param_accessor_defaults():
+    msg = parse_line("JOIN #chan")
+    assert msg.param(0) == "#chan"
+    assert msg.param(-1) == "#chan"
+    assert msg.param(3) == ""
+    assert msg.param(3, "x") == "x"
+
+
+def test_tags_are_parsed_lazily_and_unescaped():
+    msg = parse_line(r"@time=2024-01-01T00:00:00Z;msgid=a\sb\:c;flag :al PRIVMSG #c :hi")
+    assert msg.raw_tags.startswith("time=")
+    assert msg.tags == {"time": "2024-01-01T00:00:00Z", "msgid": "a b;c", "flag": ""}
+    # A lone trailing backslash is dropped; unknown escapes keep the character
+    assert parse_tags(r"k=trailing\;x=\n\r\z\\") == {"k": "trailing", "x": "\n\rz\\"}
+
+
+def test_malformed_lines():
+    assert parse_line("") is None
+    assert parse_line("@tagsonly") is None
+    assert parse_line(":sourceonly") is None
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from albikirc.outbound import OutboundQueue, TokenBucket
+
+
+class RecordingSocket:
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def sendall(self, data):
+        if self.fail:
+            raise OSError("broken pipe")
+        with self.lock:
+            self.sent.append(data)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(burst=3, rate=10)
+    for _ in range(3):
+        assert bucket.delay() == 0
+        bucket.consume()
+    assert 0 < bucket.delay() <= 0.1
+
+
+def test_lines_are_sent_in_order_after_the_burst():
+    sock = RecordingSocket()
+    q = OutboundQueue(sock, burst=2, rate=50)
+    try:
+        for i in range(6):
+            q.put(b"L%d\r\n" % i)
+        assert wait_for(lambda: len(sock.sent) == 6)
+        assert sock.sent == [b"L%d\r\n" % i for i in range(6)]
+    finally:
+        q.close()
+
+
+def test_priority_lines_skip_ahead_of_paced_traffic():
+    sock = RecordingSocket()
+    q = OutboundQueue(sock, burst=1, rate=0.01)
+    try:
+        q.put(b"A\r\n")
+        assert wait_for(lambda: len(sock.sent) == 1)
+        q.put(b"B\r\n")
+        q.put(b"PONG :x\r\n", priority=True)
+        assert wait_for(lambda: len(sock.sent) == 2)
+        assert sock.sent == [b"A\r\n", b"PONG :x\r\n"]
+        assert q.depth() == 1
+    finally:
+        q.close()
+
+
+def test_close_flushes_priority_and_drops_normal_lines():
+    sock = RecordingSocket()
+    q = OutboundQueue(sock, burst=1, rate=0.01)
+    q.put(b"A\r\n")
+    assert wait_for(lambda: len(sock.sent) == 1)
+    q.put(b"B\r\n")
+    q.put(b"QUIT :bye\r\n", priority=True)
+    q.close()
+    assert sock.sent == [b"A\r\n", b"QUIT :bye\r\n"]
+
+
+def test_send_error_is_reported_and_stops_the_writer():
+    errors = []
+    q = OutboundQueue(RecordingSocket(fail=True), on_error=errors.append)
+    q.put(b"A\r\n")
+    q.put(b"B\r\n")
+    assert wait_for(lambda: errors)
+    assert isinstance(errors[0], OSError)
+    assert wait_for(lambda: q.depth() == 0)
+    q.put(b"C\r\n")
+    assert q.depth() == 0
@@ -0,0 +1,56 @@
+import threading
+
+from albikirc.scheduler import Scheduler
+
+
+def test_timers_fire_in_due_order():
+    sched = Scheduler()
+    got = []
+    done = threading.Event()
+    sched.call_later(0.06, lambda: (got.append("late"), done.set()))
+    sched.call_later(0.02, got.append, "early")
+    sched.call_later(0.04, got.append, "middle")
+    assert sched.pending() == 3
+    assert done.wait(5)
+    assert got == ["early", "middle", "late"]
+    assert sched.pending() == 0
+
+
+def test_cancel_and_reschedule():
+    sched = Scheduler()
+    got = []
+    done = threading.Event()
+    cancelled = sched.call_later(0.02, got.append, "cancelled")
+    moved = sched.call_later(0.01, got.append, "moved")
+    assert cancelled.cancel()
+    assert not cancelled.cancel()
+    assert not cancelled.pending
+    moved.reschedule(0.05)
+    sched.call_later(0.03, got.append, "first")
+    sched.call_later(0.08, done.set)
+    assert done.wait(5)
+    assert got == ["first", "moved"]
+
+
+def test_errors_are_reported_and_do_not_stop_the_thread():
+    reported = []
+    sched = Scheduler(on_error=lambda cb, e: reported.append((cb.__name__, str(e))))
+    done = threading.Event()
+
+    def broken():
+        raise ValueError("bad timer")
+
+    sched.call_later(0, broken)
+    sched.call_later(0.02, done.set)
+    assert done.wait(5)
+    assert reported == [("broken", "bad timer")]
+    assert sched.errors == 1
+    assert "bad timer" in sched.last_error
+
+
+def test_cancel_all():
+    sched = Scheduler()
+    handles = [sched.call_later(10, lambda: None) for _ in range(5)]
+    sched.cancel_all()
+    assert sched.pending() == 0
+    assert not any(h.pending for h in handles)
@@ -0,0 +1,70 @@
+import time
+
+from albikirc.chatlog import LogWriter, log_files
+from albikirc.classify import KIND_CHANNEL, KIND_PRIVATE
+from albikirc.irc_client import IRCClient
+from albikirc.search import SearchIndex
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def make_index(tmp_path):
+    writer = LogWriter(tmp_path / "logs", compress=None, flush_interval=0.05)
+    index = SearchIndex(tmp_path / "search.db", writer.root, pause=0)
+    writer.add_listener(index.notify)
+    writer.start()
+    index.start()
+    return writer, index
+
+
+def write_and_index(writer, index, network, target, entries):
+    expected = index.indexed + len(entries)
+    writer.write(network, target, entries)
+    assert writer.flush()
+    assert wait_for(lambda: index.indexed >= expected)
+
+
+def test_nickserv_password_is_not_logged_or_indexed(tmp_path):
+    writer, index = make_index(tmp_path)
+    try:
+        # What /msg NickServ IDENTIFY hunter2 records for our own line
+        text = IRCClient.redact_message("NickServ", "IDENTIFY hunter2")
+        write_and_index(writer, index, "libera", "NickServ", [(None, "al", text, KIND_PRIVATE)])
+        logged = b"".join(p.read_bytes() for p in log_files(writer.root, "libera", "NickServ"))
+        assert b"IDENTIFY" in logged
+        assert b"hunter2" not in logged
+        assert index.search("hunter2") == []
+        hits = index.search("IDENTIFY", sender="al")
+        assert [h.target for h in hits] == ["nickserv"]
+    finally:
+        index.close()
+        writer.close()
+
+
+def test_context_stays_on_the_hit_network(tmp_path):
+    writer, index = make_index(tmp_path)
+    try:
+        base = 1_700_000_000.0
+        write_and_index(writer, index, "libera", "#python", [
+            (base + i, "al", f"libera {i}", KIND_CHANNEL) for i in range(0, 10, 2)
+        ])
+        write_and_index(writer, index, "oftc", "#python", [
+            (base + i, "bo", f"oftc {i}", KIND_CHANNEL) for i in range(1, 10, 2)
+        ])
+        hit, = index.search('"libera 4"')
+        assert hit.network == "libera"
+        around = index.context(hit.id, before=5, after=5)
+        assert [h.text for h in around] == [f"libera {i}" for i in range(0, 10, 2)]
+        assert {h.network for h in around} == {"libera"}
+        assert [h.network for h in index.search("oftc", network="oftc")] == ["oftc"] * 5
+        assert index.search("oftc", network="libera") == []
+    finally:
+        index.close()
+        writer.close()
@@ -0,0 +1,82 @@
+import time
+
+from albikirc.classify import KIND_CHANNEL, KIND_STATUS
+from albikirc.store import MessageStore
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def fill(store, target, n, start=0):
+    store.extend(1, target, [(float(i), f"nick{i % 7}", f"line {i} " + "x" * 40, KIND_CHANNEL)
+                             for i in range(start, start + n)])
+
+
+def test_append_and_read_back():
+    store = MessageStore()
+    try:
+        assert store.append(1, "#a", "al", "hello") == 0
+        assert store.append(1, "#A", "bo", "hi", KIND_CHANNEL, ts=5.0) == 1
+        msgs = store.slice(1, "#a")
+        assert [(m.sender, m.text, m.kind) for m in msgs] == [("al", "hello", KIND_STATUS), ("bo", "hi", KIND_CHANNEL)]
+        assert msgs[1].ts == 5.0
+        assert store.tail(1, "#a", 1) == msgs[1:]
+        assert store.count(1, "#b") == 0
+        assert store.slice(1, "#b") == []
+    finally:
+        store.close()
+
+
+def test_spilled_history_reads_back_in_order(tmp_path):
+    store = MessageStore(memory_budget=20_000, spill_dir=str(tmp_path), min_resident=10)
+    try:
+        for chunk in range(10):
+            fill(store, "#a", 100, chunk * 100)
+        assert wait_for(lambda: store.memory_usage() <= 20_000)
+        assert store.count(1, "#a") == 1000
+        msgs = store.slice(1, "#a")
+        assert [m.ts for m in msgs] == [float(i) for i in range(1000)]
+        assert msgs[0].text.startswith("line 0 ") and msgs[0].sender == "nick0"
+        assert [m.ts for m in store.slice(1, "#a", 95, 105)] == [float(i) for i in range(95, 105)]
+        assert [m.ts for m in store.iter_messages(1, "#a", chunk=64)] == [float(i) for i in range(1000)]
+    finally:
+        store.close()
+
+
+def test_spilled_reads_do_not_hold_the_lock(tmp_path):
+    store = MessageStore(memory_budget=10_000, spill_dir=str(tmp_path), min_resident=10)
+    try:
+        fill(store, "#a", 500)
+        assert wait_for(lambda: store.memory_usage() <= 10_000)
+        read = store._read_spilled
+        held = []
+
+        def checked(*args):
+            held.append(store._lock.locked())
+            return read(*args)
+
+        store._read_spilled = checked
+        assert len(store.slice(1, "#a")) == 500
+        assert held == [False]
+    finally:
+        store.close()
+
+
+def test_discard_removes_history(tmp_path):
+    store = MessageStore(memory_budget=10_000, spill_dir=str(tmp_path), min_resident=10)
+    try:
+        fill(store, "#a", 500)
+        fill(store, "#b", 5)
+        assert wait_for(lambda: store.memory_usage() <= 10_000)
+        store.discard(1, "#a")
+        assert store.count(1, "#a") == 0
+        assert store.slice(1, "#a") == []
+        assert len(store.slice(1, "#b")) == 5
+    finally:
+        store.close()